@@ -0,0 +1 @@
+"""Offline benchmarks of the bot's hot paths (run with ``python -m benchmarks.run``)."""
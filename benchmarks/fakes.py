@@ -0,0 +1,68 @@
+import itertools
+
+# Message ids of the fake Discord objects
+_message_ids = itertools.count(1)
+
+
+class FakeUser:
+    def __init__(self, id, bot=False):
+        self.id = id
+        self.bot = bot
+        self.mention = f"<@{id}>"
+
+
+class FakeMessage:
+    """A message of a user, or of the bot when ``author`` is the bot user."""
+
+    _state = None  # Read by commands.Context
+
+    def __init__(self, content, channel, author=None, guild=None):
+        self.id = next(_message_ids)
+        self.content = content
+        self.channel = channel
+        self.author = author
+        self.guild = guild
+        self.embeds = []
+        self.attachments = []
+        self.reactions = []
+
+    async def add_reaction(self, emoji):
+        self.reactions.append(emoji)
+
+
+class FakeGuild:
+    def __init__(self, id):
+        self.id = id
+
+
+class FakeChannel:
+    """A channel; messages sent to it are authored by ``bot_user``."""
+
+    def __init__(self, id=1, bot_user=None):
+        self.id = id
+        self.bot_user = bot_user
+        self.sent = 0
+        self.last_message = None
+
+    async def send(self, content=None, file=None, **kwargs):
+        self.sent += 1
+        self.last_message = FakeMessage(content, self, author=self.bot_user)
+        return self.last_message
+
+
+class FakeContext:
+    """The ``ctx`` of a command: replies go to its channel."""
+
+    def __init__(self, author_id, channel=None, guild=None):
+        self.author = FakeUser(author_id)
+        self.channel = channel or FakeChannel()
+        self.guild = guild
+
+    async def send(self, content=None, file=None, **kwargs):
+        return await self.channel.send(content, file=file, **kwargs)
+
+
+class FakeReaction:
+    def __init__(self, message, emoji="❤️"):
+        self.message = message
+        self.emoji = emoji
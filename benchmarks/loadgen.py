@@ -0,0 +1,339 @@
+"""
+Replays a trace of user commands through the bot's real command processing
+(prefix parsing, admission checks, invoke hooks, error handler) with fake
+Discord messages, and reports per-command throughput, latency percentiles and
+event loop lag: how many users one bot process can serve.
+
+    python -m benchmarks.loadgen benchmarks/traces/sample.jsonl --speed 4
+    python -m benchmarks.loadgen trace.jsonl --upstream simulator --sim-latency lognormal:0.05,0.6
+    python -m benchmarks.loadgen trace.jsonl --upstream http://127.0.0.1:8099
+    python -m benchmarks.loadgen --synthesize trace.jsonl --users 500 --rate 50 --duration 120
+
+A trace has one JSON object per line: ``ts`` (seconds), ``user``, ``guild``
+(null for direct messages) and either ``text`` (e.g. "!cena btc") or
+``reaction`` (e.g. "❤️", added to the bot's last reply to that user).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from discord.ext import commands
+
+from benchmarks.fakes import (
+    FakeChannel,
+    FakeGuild,
+    FakeMessage,
+    FakeReaction,
+    FakeUser,
+)
+from benchmarks.replay import ReplayUpstream
+from benchmarks.run import isolated, percentile
+from benchmarks.simulator import UpstreamSimulator
+from src import app
+from src.services import charts, http_client, symbols
+
+BOT_USER_ID = 1
+LAG_INTERVAL = 0.05
+# Command mix of synthesized traces: (weight, command text)
+COMMAND_MIX = [
+    (30, "!cena btc"),
+    (10, "!price eth"),
+    (6, "!cena sol"),
+    (6, "!price usd"),
+    (4, "!cena eur"),
+    (8, "!wykres btc 7d"),
+    (5, "!wykres eth usdt 7d 4h"),
+    (3, "!chart btc usdt 30d 1d purple"),
+    (8, "!ulubione"),
+    (3, "!waluta"),
+    (2, "!help"),
+    (10, "❤️"),
+]
+
+
+class LoadContext(commands.Context):
+    """Context whose replies go to the fake channel instead of the Discord API."""
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+    async def reply(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+
+def load_trace(path):
+    with open(path, encoding="utf-8") as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    return sorted(events, key=lambda event: event["ts"])
+
+
+def synthesize_trace(users, rate, duration, seed=0):
+    """Poisson arrivals of the COMMAND_MIX; a few users send most commands."""
+    rng = random.Random(seed)
+    weights, texts = zip(*COMMAND_MIX)
+    guilds = [None] + [100 + g for g in range(max(1, users // 50))]
+    events = []
+    ts = 0.0
+    while True:
+        ts += rng.expovariate(rate)
+        if ts >= duration:
+            return events
+        user = 10_000 + int(users * rng.random() ** 2)  # Skewed towards low ids
+        text = rng.choices(texts, weights)[0]
+        event = {"ts": round(ts, 4), "user": user, "guild": guilds[user % len(guilds)]}
+        event["reaction" if text == "❤️" else "text"] = text
+        events.append(event)
+
+
+class LoadGenerator:
+    """Dispatches trace events at their recorded times (divided by ``speed``)."""
+
+    def __init__(self, events, speed=1.0):
+        self.events = events
+        self.speed = speed
+        self.bot_user = FakeUser(BOT_USER_ID, bot=True)
+        self.channels = {}  # user -> FakeChannel
+        self.results = {}  # command -> list of (outcome, seconds)
+        self.late = []  # How late events were dispatched (seconds)
+        self.lag = []
+
+    def _channel(self, user):
+        channel = self.channels.get(user)
+        if channel is None:
+            channel = self.channels[user] = FakeChannel(user, bot_user=self.bot_user)
+        return channel
+
+    async def _command(self, event):
+        channel = self._channel(event["user"])
+        guild = FakeGuild(event["guild"]) if event.get("guild") else None
+        message = FakeMessage(
+            event["text"], channel, author=FakeUser(event["user"]), guild=guild
+        )
+        started = time.perf_counter()
+        ctx = await app.bot.get_context(message, cls=LoadContext)
+        await app.bot.invoke(ctx)
+        elapsed = time.perf_counter() - started
+        if ctx.command is None:
+            name, outcome = event["text"].split()[0], "unknown"
+        else:
+            name = ctx.command.qualified_name
+            outcome = "ok"
+            if ctx.command_failed:
+                # Admission checks attach a ticket to every admitted command
+                rejected = ctx.command.checks and not hasattr(ctx, "admission_ticket")
+                outcome = "busy" if rejected else "error"
+        self.results.setdefault(name, []).append((outcome, elapsed))
+
+    async def _reaction(self, event):
+        message = self._channel(event["user"]).last_message
+        if message is None:
+            self.results.setdefault("reaction", []).append(("skipped", 0.0))
+            return
+        started = time.perf_counter()
+        await app.on_reaction_add(
+            FakeReaction(message, event["reaction"]), FakeUser(event["user"])
+        )
+        self.results.setdefault("reaction", []).append(
+            ("ok", time.perf_counter() - started)
+        )
+
+    async def _sample_lag(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lag.append(max(0.0, time.perf_counter() - started - LAG_INTERVAL))
+
+    async def run(self):
+        app.bot._connection.user = self.bot_user
+        sampler = asyncio.get_running_loop().create_task(self._sample_lag())
+        tasks = []
+        start = time.perf_counter()
+        first_ts = self.events[0]["ts"] if self.events else 0
+        try:
+            for event in self.events:
+                due = start + (event["ts"] - first_ts) / self.speed if self.speed else 0
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.late.append(max(0.0, time.perf_counter() - due) if due else 0.0)
+                handler = self._reaction if "reaction" in event else self._command
+                tasks.append(asyncio.ensure_future(handler(event)))
+            await asyncio.gather(*tasks)
+            # Let error replies (dispatched as separate tasks) finish
+            await asyncio.sleep(0)
+        finally:
+            sampler.cancel()
+            app.bot._connection.user = None
+        return time.perf_counter() - start
+
+    def report(self, wall):
+        def distribution(values):
+            values = sorted(values)
+            return {
+                "p50_ms": percentile(values, 50) * 1000,
+                "p90_ms": percentile(values, 90) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": values[-1] * 1000 if values else 0.0,
+            }
+
+        per_command = {}
+        for name, results in sorted(self.results.items()):
+            outcomes = {}
+            for outcome, _ in results:
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            served = [seconds for outcome, seconds in results if outcome == "ok"]
+            per_command[name] = {
+                "count": len(results),
+                "outcomes": outcomes,
+                "throughput": len(served) / wall if wall else 0.0,
+                **distribution(served),
+            }
+        return {
+            "wall_s": wall,
+            "events": len(self.events),
+            "throughput": len(self.events) / wall if wall else 0.0,
+            "commands": per_command,
+            "event_loop_lag": distribution(self.lag),
+            "dispatch_delay": distribution(self.late),
+        }
+
+
+def print_report(report, file=sys.stderr):
+    print(
+        f"{report['events']} events in {report['wall_s']:.1f} s "
+        f"({report['throughput']:.1f}/s)",
+        file=file,
+    )
+    print(
+        f"{'command':<18}{'count':>7}{'ok/s':>9}{'p50 ms':>10}{'p99 ms':>10}  outcomes",
+        file=file,
+    )
+    for name, c in report["commands"].items():
+        outcomes = ", ".join(f"{k} {v}" for k, v in sorted(c["outcomes"].items()))
+        print(
+            f"{name:<18}{c['count']:>7}{c['throughput']:>9.1f}"
+            f"{c['p50_ms']:>10.1f}{c['p99_ms']:>10.1f}  {outcomes}",
+            file=file,
+        )
+    lag = report["event_loop_lag"]
+    print(
+        f"event loop lag: p50 {lag['p50_ms']:.1f} ms, p99 {lag['p99_ms']:.1f} ms, "
+        f"max {lag['max_ms']:.1f} ms",
+        file=file,
+    )
+
+
+async def run_trace(events, speed, upstream="replay", simulator_options=None):
+    """Replays ``events`` against the chosen upstream and returns the report."""
+    simulator = None
+    with isolated(), contextlib.ExitStack() as stack:
+        if upstream == "replay":
+            replay = ReplayUpstream()
+            stack.enter_context(patch.object(http_client, "get_json", replay.get_json))
+            stack.enter_context(
+                patch.object(
+                    http_client, "get_json_conditional", replay.get_json_conditional
+                )
+            )
+        else:
+            if upstream == "simulator":
+                simulator = await UpstreamSimulator(**(simulator_options or {})).start()
+                base_url = simulator.base_url
+            else:
+                base_url = upstream.rstrip("/")
+            stack.enter_context(
+                patch.object(http_client, "BINANCE_API", f"{base_url}/api/v3")
+            )
+            stack.enter_context(patch.object(http_client, "FRANKFURTER_API", base_url))
+        await app.bot._async_setup_hook()  # Event dispatch needs the running loop
+        try:
+            await symbols.index.refresh()
+        except Exception as e:
+            print(f"No symbol list ({e}), pairs are probed on Binance", file=sys.stderr)
+        await charts.renderer.warm_up()
+        try:
+            generator = LoadGenerator(events, speed)
+            wall = await generator.run()
+        finally:
+            charts.renderer.close()
+            await http_client.client.close()
+            if simulator is not None:
+                await simulator.stop()
+    return generator.report(wall)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("trace", nargs="?", help="JSONL trace to replay")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="replay speed-up (2 = twice the recorded rate, 0 = all at once)",
+    )
+    parser.add_argument(
+        "--upstream",
+        default="replay",
+        help='"replay" (recorded fixtures), "simulator" (started in this process; '
+        "its work then adds to the event loop lag) or the URL of a running simulator",
+    )
+    parser.add_argument("--sim-latency", default="fixed:0")
+    parser.add_argument("--sim-error-rate", type=float, default=0.0)
+    parser.add_argument("--sim-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="write the JSON report here (default stdout)")
+    parser.add_argument(
+        "--synthesize", metavar="PATH", help="write a synthetic trace instead"
+    )
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=10.0, help="commands per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.synthesize:
+        events = synthesize_trace(args.users, args.rate, args.duration, args.seed)
+        with open(args.synthesize, "w", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        print(f"{len(events)} events written to {args.synthesize}", file=sys.stderr)
+        return 0
+    if not args.trace:
+        parser.error("a trace (or --synthesize) is required")
+
+    simulator_options = {
+        "latency": args.sim_latency,
+        "error_rate": args.sim_error_rate,
+        "rate_limit_rate": args.sim_rate_limit_rate,
+        "seed": args.seed,
+    }
+    report = asyncio.run(
+        run_trace(load_trace(args.trace), args.speed, args.upstream, simulator_options)
+    )
+    report["meta"] = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "trace": os.path.basename(args.trace),
+        "speed": args.speed,
+        "upstream": args.upstream,
+    }
+    print_report(report)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
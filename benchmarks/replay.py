@@ -0,0 +1,157 @@
+import asyncio
+import json
+import os
+from datetime import date, timedelta
+from urllib.parse import parse_qs, urlsplit
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from src.services import http_client, intervals
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _load(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _error(url, status, message):
+    url = URL(url)
+    info = aiohttp.RequestInfo(url, "GET", CIMultiDictProxy(CIMultiDict()), url)
+    return aiohttp.ClientResponseError(info, (), status=status, message=message)
+
+
+class ReplayUpstream:
+    """
+    Answers the bot's Binance and Frankfurter requests from the recorded
+    responses in ``fixtures/``, without touching the network.
+
+    Klines and rate series are replayed onto whatever window is requested:
+    the recorded candles (and days) are reused cyclically, keyed by their
+    open time, so overlapping pages always agree with each other.
+    ``latency`` (seconds) is added to every request to mimic a remote API.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self.tickers = {
+            t["symbol"]: t["price"] for t in _load("binance_ticker_price.json")
+        }
+        self.klines = _load("binance_klines.json")["klines"]
+        self.usd_rates = dict(_load("frankfurter_latest_usd.json")["rates"], USD=1.0)
+        series = _load("frankfurter_series_usd.json")["rates"]
+        self.series = [series[day] for day in sorted(series)]
+        self.currencies = _load("frankfurter_currencies.json")
+        self.exchange_info = _load("binance_exchange_info.json")
+
+    async def get_json(self, url, params=None):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        parts = urlsplit(url)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        query.update(params or {})
+        if url.startswith(http_client.BINANCE_API):
+            path = parts.path.rsplit("/api/v3", 1)[-1]
+            if path == "/ticker/price":
+                return self._ticker(url, query)
+            if path == "/klines":
+                return self._klines(url, query)
+            if path == "/exchangeInfo":
+                return self.exchange_info
+        elif url.startswith(http_client.FRANKFURTER_API):
+            path = parts.path
+            if path == "/latest":
+                return self._latest(url, query)
+            if path == "/currencies":
+                return self.currencies
+            if ".." in path:
+                return self._series(url, path.strip("/"), query)
+        raise _error(url, 404, "Not Found")
+
+    async def get_json_conditional(self, url, etag=None, last_modified=None):
+        return await self.get_json(url), None, None
+
+    def _ticker(self, url, query):
+        if "symbol" in query:
+            if query["symbol"] not in self.tickers:
+                raise _error(url, 400, "Invalid symbol.")
+            return {"symbol": query["symbol"], "price": self.tickers[query["symbol"]]}
+        symbols = json.loads(query["symbols"]) if "symbols" in query else self.tickers
+        if any(s not in self.tickers for s in symbols):
+            raise _error(url, 400, "Invalid symbol.")
+        return [{"symbol": s, "price": self.tickers[s]} for s in symbols]
+
+    def _recorded_klines(self, symbol):
+        rows = self.klines.get(symbol)
+        if rows is None and symbol in self.tickers:
+            # Listed pairs without recorded candles follow BTCUSDT, scaled to their price
+            reference = self.klines["BTCUSDT"]
+            scale = float(self.tickers[symbol]) / float(reference[-1][4])
+            rows = self.klines[symbol] = [
+                [row[0], *(f"{float(v) * scale:.8f}" for v in row[1:5]), *row[5:]]
+                for row in reference
+            ]
+        return rows
+
+    def _klines(self, url, query):
+        rows = self._recorded_klines(query["symbol"])
+        if rows is None:
+            raise _error(url, 400, "Invalid symbol.")
+        step = intervals.interval_ms(query["interval"])
+        limit = int(query.get("limit", 500))
+        start = int(query.get("startTime", 0))
+        end = int(query.get("endTime", start + limit * step))
+        open_time = -(-start // step) * step  # First candle opening at or after start
+        klines = []
+        while open_time <= end and len(klines) < limit:
+            row = rows[(open_time // step) % len(rows)]
+            klines.append([open_time, *row[1:6], open_time + step - 1, *row[7:]])
+            open_time += step
+        return klines
+
+    def _rate(self, url, rates, base, target):
+        if base not in rates or target not in rates:
+            raise _error(url, 404, "not found")
+        return round(rates[target] / rates[base], 5)
+
+    def _latest(self, url, query):
+        base = query.get("from", "EUR")
+        targets = query.get("to", ",".join(self.usd_rates)).split(",")
+        return {
+            "amount": 1.0,
+            "base": base,
+            "date": "2023-11-14",
+            "rates": {
+                t: self._rate(url, self.usd_rates, base, t)
+                for t in targets
+                if t != base
+            },
+        }
+
+    def _series(self, url, path, query):
+        first, last = (date.fromisoformat(day) for day in path.split(".."))
+        base = query.get("from", "EUR")
+        targets = query.get("to", ",".join(self.usd_rates)).split(",")
+        rates = {}
+        day = first
+        while day <= last:
+            if day.weekday() < 5:  # Frankfurter publishes rates on working days
+                recorded = dict(
+                    self.series[day.toordinal() % len(self.series)], USD=1.0
+                )
+                rates[day.isoformat()] = {
+                    t: self._rate(url, recorded, base, t) for t in targets
+                }
+            day += timedelta(days=1)
+        return {
+            "amount": 1.0,
+            "base": base,
+            "start_date": first.isoformat(),
+            "end_date": last.isoformat(),
+            "rates": rates,
+        }
@@ -0,0 +1,510 @@
+"""
+Offline benchmarks of the command hot paths.
+
+Upstream APIs are replayed from the recorded responses in ``fixtures/`` and the
+commands are driven through fake Discord contexts, so no network (and no bot
+token) is needed. Every benchmark reports its latency distribution and
+throughput; command benchmarks are repeated at several concurrency levels.
+
+    python -m benchmarks.run                       # results as JSON on stdout
+    python -m benchmarks.run --output out.json --baseline benchmarks/baseline.json
+    python -m benchmarks.run --quick --save-baseline benchmarks/baseline.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from benchmarks.fakes import FakeChannel, FakeContext, FakeReaction, FakeUser
+from benchmarks.replay import ReplayUpstream
+from src import app
+from src.services import (
+    candles,
+    charts,
+    favorites,
+    http_client,
+    prefetch,
+    quotes,
+    series,
+    state,
+    symbols,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# A benchmark regressed when its median latency grew by more than this share
+DEFAULT_THRESHOLD = 0.25
+# ... and by more than this (microsecond medians of cache hits are mostly noise)
+DEFAULT_MIN_DELTA_MS = 0.1
+CONCURRENCY_LEVELS = (1, 8, 32)
+# Replies that mean a command failed instead of answering
+ERROR_PREFIXES = ("⚠️", "⏳")
+WARMUP_OPS = 5
+# Benchmarks that need the chart render pool
+RENDERING = ("wykres", "create_chart")
+# Packages listed in the import time breakdown
+IMPORT_TOP_PACKAGES = 10
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, round(p / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def summarize(latencies, wall, concurrency, errors=0):
+    """Latency distribution (milliseconds) and throughput (operations per second)."""
+    values = sorted(latencies)
+    ms = 1000
+    return {
+        "ops": len(values),
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput": len(values) / wall if wall else 0.0,
+        "mean_ms": statistics.fmean(values) * ms if values else 0.0,
+        "p50_ms": percentile(values, 50) * ms,
+        "p90_ms": percentile(values, 90) * ms,
+        "p99_ms": percentile(values, 99) * ms,
+        "max_ms": values[-1] * ms if values else 0.0,
+    }
+
+
+async def measure(op, ops, concurrency, setup=None):
+    """
+    Runs ``op(i)`` ``ops`` times on ``concurrency`` workers. ``setup()`` runs
+    before every operation, outside the measured time. ``op`` may return the
+    bot's reply, which counts as an error when it reports a failure.
+    """
+    counter = iter(range(ops))
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            reply = await op(i)
+            latencies.append(time.perf_counter() - started)
+            if isinstance(reply, str) and reply.startswith(ERROR_PREFIXES):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, concurrency, errors)
+
+
+# -- Command benchmarks ------------------------------------------------------
+
+CRYPTO_SYMBOLS = ("btc", "eth", "sol", "bnb", "xrp")
+FIAT_SYMBOLS = ("usd", "eur", "gbp", "chf")
+CHART_ARGS = (("btc", "usdt", "7d", "1h"), ("eth", "usdt", "14d", "1h"))
+# Users 1000+ are benchmark users; each favorites benchmark user has this list
+FAVORITES = [
+    state.PriceFavorite("BTC", "USD"),
+    state.PriceFavorite("ETH", "PLN"),
+    state.PriceFavorite("SOL", "EUR"),
+    state.PriceFavorite("USD", "PLN", fiat_conversion=True),
+    state.StaticFavorite("💰 Price of BTC: 36,986.96 USD"),
+    state.PriceFavorite("XRP", "USDT"),
+    state.PriceFavorite("BNB", "GBP"),
+    state.PriceFavorite("EUR", "CHF", fiat_conversion=True),
+]
+
+
+def reply_of(ctx):
+    message = ctx.channel.last_message
+    return message.content if message is not None else None
+
+
+async def price_crypto(i):
+    ctx = FakeContext(1000 + i % 50)
+    await app.price(ctx, CRYPTO_SYMBOLS[i % len(CRYPTO_SYMBOLS)])
+    return reply_of(ctx)
+
+
+async def price_fiat(i):
+    ctx = FakeContext(1000 + i % 50)
+    await app.price(ctx, FIAT_SYMBOLS[i % len(FIAT_SYMBOLS)])
+    return reply_of(ctx)
+
+
+async def chart(i):
+    ctx = FakeContext(1000 + i % 50)
+    await app.wykres(ctx, *CHART_ARGS[i % len(CHART_ARGS)])
+    return reply_of(ctx)
+
+
+async def favorites_list(i):
+    user_id = 2000 + i % 50
+    app.user_favorites[user_id] = list(FAVORITES)
+    ctx = FakeContext(user_id)
+    await app.show_favorites(ctx)
+    return reply_of(ctx)
+
+
+async def heart_reaction(i):
+    channel = FakeChannel()
+    message = await channel.send(f"💰 Benchmark message {i}")
+    app.message_fav_data[message.id] = state.PriceFavorite("BTC", "USD")
+    await app.on_reaction_add(FakeReaction(message), FakeUser(3000 + i))
+    return reply_of(FakeContext(0, channel))
+
+
+def clear_quotes():
+    quotes.quote_cache.clear()
+
+
+def clear_charts():
+    charts.chart_cache.clear()
+
+
+# name -> (operation, setup before every operation, concurrency levels)
+COMMAND_BENCHMARKS = {
+    "price.crypto": (price_crypto, None, CONCURRENCY_LEVELS),
+    "price.crypto.cold": (price_crypto, clear_quotes, (1,)),
+    "price.fiat": (price_fiat, None, CONCURRENCY_LEVELS),
+    "wykres.cached": (chart, None, CONCURRENCY_LEVELS),
+    # Rendering is bounded by the worker pool and RENDER_QUEUE_LIMIT
+    "wykres.render": (chart, clear_charts, (1, 4)),
+    "show_favorites": (favorites_list, None, CONCURRENCY_LEVELS),
+    "on_reaction_add": (heart_reaction, None, CONCURRENCY_LEVELS),
+}
+
+
+# -- Microbenchmarks ---------------------------------------------------------
+
+
+def recorded_klines(count):
+    rows = ReplayUpstream().klines["BTCUSDT"]
+    step = 3600 * 1000
+    return [
+        [i * step, *rows[i % len(rows)][1:6], i * step + step - 1] for i in range(count)
+    ]
+
+
+async def micro_parse_klines(i, klines=recorded_klines(1000)):
+    series.parse_klines(klines)
+
+
+async def micro_get_crypto_data(i):
+    await app.get_crypto_data("BTC", "PLN", 14, "1h")
+
+
+def chart_input():
+    open_times, ohlcv = series.parse_klines(recorded_klines(336))
+    return open_times.astype("datetime64[ms]"), ohlcv[:, series.CLOSE]
+
+
+async def micro_render_png(i, data=chart_input()):
+    charts.render_png(*data, "BTC/USDT", "Price (USDT)", "royalblue")
+
+
+async def micro_create_chart(i, data=chart_input()):
+    await app.create_chart(*data, "BTC/USDT", "Price (USDT)", "royalblue")
+
+
+def favorites_snapshot(users):
+    for user_id in range(users):
+        app.favorites_store.favorites[user_id] = list(FAVORITES)
+
+
+async def micro_favorites_flush(i):
+    for n in range(100):
+        app.favorites_store.record_add(i, state.PriceFavorite("BTC", f"C{n}"))
+    await app.favorites_store.flush()
+
+
+async def micro_favorites_compact(i):
+    await app.favorites_store.compact()
+
+
+# name -> (operation, operations per run in full mode)
+MICRO_BENCHMARKS = {
+    "get_crypto_data.parse_klines": (micro_parse_klines, 500),
+    "get_crypto_data": (micro_get_crypto_data, 100),
+    "create_chart.render_png": (micro_render_png, 20),
+    "create_chart": (micro_create_chart, 20),
+    "save_favorites.flush": (micro_favorites_flush, 50),
+    "save_favorites.compact": (micro_favorites_compact, 20),
+}
+
+
+# -- Startup benchmarks ------------------------------------------------------
+
+
+def import_times(module="src.app"):
+    """
+    Imports ``module`` in a fresh interpreter (``-X importtime``). Returns its
+    cumulative import time and the self time of every top-level package (ms).
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    total = 0.0
+    packages = {}
+    for line in stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # Header and log lines
+        name = fields[2].strip()
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(fields[0]) / 1000
+        if name == module:
+            total = int(fields[1]) / 1000
+    return total, packages
+
+
+def measure_import(runs):
+    """Import time of the bot; the package breakdown is the one of the median run."""
+    timings = sorted((import_times() for _ in range(runs)), key=lambda t: t[0])
+    result = summarize([total / 1000 for total, _ in timings], 0.0, 1)
+    packages = timings[len(timings) // 2][1]
+    ranked = sorted(packages.items(), key=lambda item: -item[1])
+    result["packages_ms"] = {
+        package: round(ms, 2) for package, ms in ranked[:IMPORT_TOP_PACKAGES]
+    }
+    return result
+
+
+def cold_start():
+    # A closed render pool and empty caches, as in a freshly started process
+    charts.renderer.close()
+    quotes.quote_cache.clear()
+    for user_id in range(4000, 4100):
+        app.user_favorites[user_id] = list(FAVORITES)
+
+
+async def warm_up_bot(i):
+    await app.warm_up()
+
+
+async def measure_warm_up(runs):
+    with patch.object(prefetch, "scheduler", prefetch.PrefetchScheduler()):
+        try:
+            return await measure(warm_up_bot, runs, 1, cold_start)
+        finally:
+            await http_client.client.close()
+
+
+# -- Running -----------------------------------------------------------------
+
+
+@contextlib.contextmanager
+def isolated():
+    """
+    Points every store the commands write to at memory or a temporary
+    directory, and puts the original stores back afterwards.
+    """
+    saved = (
+        candles.store,
+        symbols.index,
+        app.favorites_store,
+        app.favorites_loaded,
+        dict(app.user_favorites),
+    )
+    preferences_path = app.preferences.path
+    with tempfile.TemporaryDirectory() as tmp:
+        app.preferences.close()
+        app.preferences.path = ":memory:"
+        candles.store = candles.CandleStore(":memory:")
+        symbols.index = symbols.SymbolIndex(os.path.join(tmp, "symbols.json"))
+        app.favorites_store = favorites.FavoritesStore(
+            os.path.join(tmp, "favorites.json")
+        )
+        app.favorites_loaded = True
+        app.user_favorites.clear()
+        favorites_snapshot(1000)
+        try:
+            yield
+        finally:
+            candles.store.close()
+            app.preferences.close()
+            app.preferences.path = preferences_path
+            (
+                candles.store,
+                symbols.index,
+                app.favorites_store,
+                app.favorites_loaded,
+                users,
+            ) = saved
+            app.user_favorites.clear()
+            app.user_favorites.update(users)
+
+
+async def warm_up(op):
+    # First-use costs (connections, interned strings, cache fills) are not part of the result
+    for i in range(WARMUP_OPS):
+        await op(i)
+
+
+async def run_benchmarks(ops, latency, only=None):
+    """Runs the benchmarks (those whose name starts with ``only``) and returns the results."""
+    commands = {
+        name: case
+        for name, case in COMMAND_BENCHMARKS.items()
+        if not only or name.startswith(only)
+    }
+    micro = {
+        name: case
+        for name, case in MICRO_BENCHMARKS.items()
+        if not only or name.startswith(only)
+    }
+    results = {}
+    upstream = ReplayUpstream(latency=latency)
+    with isolated(), patch.object(
+        http_client, "get_json", upstream.get_json
+    ), patch.object(http_client, "get_json_conditional", upstream.get_json_conditional):
+        try:
+            # Pairs are resolved locally, as in a bot that has its symbol snapshot
+            await symbols.index.refresh()
+            if "startup.import".startswith(only or ""):
+                results["startup.import"] = measure_import(max(3, ops // 40))
+                print(
+                    f"startup.import: {format_result(results['startup.import'])}",
+                    file=sys.stderr,
+                )
+            if "startup.warm_up".startswith(only or ""):
+                results["startup.warm_up"] = await measure_warm_up(max(2, ops // 100))
+                print(
+                    f"startup.warm_up: {format_result(results['startup.warm_up'])}",
+                    file=sys.stderr,
+                )
+            if any(name.startswith(RENDERING) for name in [*commands, *micro]):
+                await charts.renderer.warm_up()
+            for name, (op, setup, levels) in commands.items():
+                await warm_up(op)
+                for concurrency in levels:
+                    count = ops if setup is None else max(concurrency, ops // 5)
+                    key = f"{name}@c{concurrency}"
+                    results[key] = await measure(op, count, concurrency, setup)
+                    print(f"{key}: {format_result(results[key])}", file=sys.stderr)
+            for name, (op, count) in micro.items():
+                await warm_up(op)
+                results[name] = await measure(op, max(5, count * ops // 200), 1)
+                print(f"{name}: {format_result(results[name])}", file=sys.stderr)
+        finally:
+            charts.renderer.close()
+    return results, upstream.requests
+
+
+def format_result(result):
+    return (
+        f"p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms, "
+        f"{result['throughput']:.0f} ops/s"
+        + (f", {result['errors']} errors" if result["errors"] else "")
+    )
+
+
+def compare(results, baseline, threshold, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    """Median latency and throughput of every benchmark relative to the baseline."""
+    comparison = {}
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not isinstance(result, dict) or not isinstance(before, dict):
+            continue
+        change = result["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0
+        comparison[name] = {
+            "baseline_p50_ms": before["p50_ms"],
+            "p50_ms": result["p50_ms"],
+            "p50_change": change,
+            "baseline_throughput": before["throughput"],
+            "throughput": result["throughput"],
+        }
+        if change > threshold and result["p50_ms"] - before["p50_ms"] > min_delta_ms:
+            regressions.append(name)
+    return comparison, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--quick", action="store_true", help="fewer operations")
+    parser.add_argument("--ops", type=int, help="operations per command benchmark")
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="simulated upstream latency in milliseconds",
+    )
+    parser.add_argument("--only", help="run benchmarks whose name starts with this")
+    parser.add_argument("--output", help="write the JSON report here (default stdout)")
+    parser.add_argument(
+        "--baseline", help=f"compare with this report (e.g. {DEFAULT_BASELINE})"
+    )
+    parser.add_argument("--save-baseline", help="also store the results as a baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="relative growth of the median latency counted as a regression",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=DEFAULT_MIN_DELTA_MS,
+        help="smallest growth of the median latency (ms) counted as a regression",
+    )
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="exit with status 1 when a benchmark regressed",
+    )
+    args = parser.parse_args(argv)
+
+    ops = args.ops or (40 if args.quick else 200)
+    results, requests = asyncio.run(run_benchmarks(ops, args.latency / 1000, args.only))
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "ops": ops,
+            "upstream_latency_ms": args.latency,
+            "upstream_requests": requests,
+        },
+        "results": results,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        report["comparison"], regressions = compare(
+            results, baseline, args.threshold, args.min_delta
+        )
+        report["regressions"] = regressions
+        for name in regressions:
+            change = report["comparison"][name]["p50_change"]
+            print(f"REGRESSION {name}: p50 {change:+.0%}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": report["meta"], "results": results}, f, indent=2)
+            f.write("\n")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,521 @@
+"""
+Local stand-in for the Binance REST API and the Frankfurter API, with
+injectable latency and faults, for load tests that must not hit the real APIs.
+
+    python -m benchmarks.simulator --port 8099 --latency lognormal:0.05,0.6 \\
+        --error-rate 0.01 --rate-limit-rate 0.005 --slow-drip-rate 0.01
+
+Then start the bot with
+    BINANCE_API=http://127.0.0.1:8099/api/v3 FRANKFURTER_API=http://127.0.0.1:8099
+
+All prices and rates are synthetic but deterministic: a candle or a daily rate
+is a pure function of the symbol and its time, so every run (and every page of
+a paginated download) sees the same data.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from aiohttp import web
+
+from src.services import binance_limits, intervals
+
+# Synthetic USD prices of the crypto assets around which prices move
+ASSET_USD = {
+    "BTC": 60000.0,
+    "ETH": 3000.0,
+    "BNB": 550.0,
+    "SOL": 150.0,
+    "XRP": 0.55,
+    "ADA": 0.45,
+    "DOGE": 0.12,
+    "LTC": 80.0,
+    "DOT": 7.0,
+    "LINK": 15.0,
+}
+# Quote assets of the listed pairs, with their synthetic USD value
+QUOTE_USD = {"USDT": 1.0, "EUR": 1.08, "PLN": 0.25, "GBP": 1.27, "BTC": 60000.0}
+PAIRS = (
+    [asset + "USDT" for asset in ASSET_USD]
+    + ["BTCEUR", "ETHEUR", "SOLEUR", "XRPEUR", "BTCPLN", "ETHPLN", "BTCGBP"]
+    + ["ETHBTC", "BNBBTC", "SOLBTC"]
+)
+# Frankfurter reference rates (base EUR) around which the daily rates move
+EUR_RATES = {
+    "USD": 1.08,
+    "PLN": 4.32,
+    "GBP": 0.85,
+    "CHF": 0.95,
+    "JPY": 162.0,
+    "CZK": 25.2,
+    "SEK": 11.5,
+    "NOK": 11.7,
+    "DKK": 7.46,
+    "HUF": 395.0,
+    "CAD": 1.47,
+    "AUD": 1.63,
+}
+CURRENCY_NAMES = {
+    "AUD": "Australian Dollar",
+    "CAD": "Canadian Dollar",
+    "CHF": "Swiss Franc",
+    "CZK": "Czech Koruna",
+    "DKK": "Danish Krone",
+    "EUR": "Euro",
+    "GBP": "British Pound",
+    "HUF": "Hungarian Forint",
+    "JPY": "Japanese Yen",
+    "NOK": "Norwegian Krone",
+    "PLN": "Polish Złoty",
+    "SEK": "Swedish Krona",
+    "USD": "United States Dollar",
+}
+ERROR_STATUSES = (500, 502, 503)
+
+
+def _noise(*parts):
+    """Deterministic pseudo-random number in [-1, 1) for the given key."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**63 - 1
+
+
+def _phase(name):
+    return (_noise(name, "phase") + 1) * math.pi
+
+
+def asset_price(asset, time_ms):
+    """USD price of an asset at a time: slow cycles plus per-minute noise."""
+    days = time_ms / intervals.DAY_MS
+    phase = _phase(asset)
+    log_move = (
+        0.25 * math.sin(2 * math.pi * days / 97 + phase)
+        + 0.06 * math.sin(2 * math.pi * days / 7.3 + 2 * phase)
+        + 0.01 * math.sin(2 * math.pi * days * 4 + 3 * phase)
+        + 0.002 * _noise(asset, time_ms // intervals.MINUTE_MS)
+    )
+    return ASSET_USD[asset] * math.exp(log_move)
+
+
+def pair_price(pair, time_ms):
+    for quote, usd in QUOTE_USD.items():
+        if pair.endswith(quote) and pair[: -len(quote)] in ASSET_USD:
+            if quote in ASSET_USD:
+                usd = asset_price(quote, time_ms)
+            return asset_price(pair[: -len(quote)], time_ms) / usd
+    raise KeyError(pair)
+
+
+def eur_rate(currency, day):
+    """Frankfurter rate EUR -> currency published on ``day``."""
+    if currency == "EUR":
+        return 1.0
+    n = day.toordinal()
+    phase = _phase(currency)
+    log_move = 0.03 * math.sin(2 * math.pi * n / 180 + phase) + 0.003 * _noise(
+        currency, n
+    )
+    return EUR_RATES[currency] * math.exp(log_move)
+
+
+def _fmt(value):
+    return f"{value:.8f}"
+
+
+class LatencyModel:
+    """
+    Response delay distribution, written as ``kind:params`` (seconds):
+    ``fixed:0.05``, ``uniform:0.01,0.2``, ``exponential:0.05`` (mean) or
+    ``lognormal:0.05,0.6`` (median and sigma, a realistic long tail).
+    """
+
+    def __init__(self, spec="fixed:0", seed=0):
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",") if p]
+        self._random = random.Random(seed)
+        if kind not in ("fixed", "uniform", "exponential", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self):
+        p = self.params
+        if self.kind == "fixed":
+            return p[0] if p else 0.0
+        if self.kind == "uniform":
+            return self._random.uniform(p[0], p[1])
+        if self.kind == "exponential":
+            return self._random.expovariate(1 / p[0]) if p[0] else 0.0
+        return p[0] * math.exp(self._random.gauss(0, p[1]))
+
+
+class UpstreamSimulator:
+    """
+    aiohttp.web server implementing the Binance (``/api/v3/...``) and Frankfurter
+    (``/latest``, ``/currencies``, ``/<start>..<end>``) endpoints the bot uses.
+
+    Faults are drawn per request from a seeded generator: server errors
+    (``error_rate``), 429 with Retry-After (``rate_limit_rate``), 418 bans
+    (``ban_rate``, Binance only; the ban then lasts ``retry_after`` seconds) and
+    bodies dripped out in small chunks (``slow_drip_rate``). Binance request
+    weight is counted per minute like the real API: responses carry
+    X-MBX-USED-WEIGHT-1M and requests above ``weight_limit`` get a 429.
+    """
+
+    def __init__(
+        self,
+        latency="fixed:0",
+        error_rate=0.0,
+        rate_limit_rate=0.0,
+        ban_rate=0.0,
+        slow_drip_rate=0.0,
+        drip_chunk=64,
+        drip_interval=0.05,
+        retry_after=5,
+        weight_limit=6000,
+        seed=0,
+        clock=time.time,
+    ):
+        self.latency = LatencyModel(latency, seed)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.ban_rate = ban_rate
+        self.slow_drip_rate = slow_drip_rate
+        self.drip_chunk = drip_chunk
+        self.drip_interval = drip_interval
+        self.retry_after = retry_after
+        self.weight_limit = weight_limit
+        self._random = random.Random(seed)
+        self._clock = clock
+        self._window = None
+        self.used_weight = 0
+        self.banned_until = 0.0
+        self.stats = {}  # "endpoint status" -> responses
+        self._runner = None
+        self.port = None
+
+    # -- Server ----------------------------------------------------------------
+
+    def make_app(self):
+        app = web.Application(middlewares=[self._faults])
+        app.router.add_get("/api/v3/ticker/price", self._ticker_price)
+        app.router.add_get("/api/v3/klines", self._klines)
+        app.router.add_get("/api/v3/exchangeInfo", self._exchange_info)
+        app.router.add_get("/latest", self._latest)
+        app.router.add_get("/currencies", self._currencies)
+        app.router.add_get("/_simulator/stats", self._stats)
+        app.router.add_get(r"/{dates:\d{4}-\d{2}-\d{2}\.\.[\d-]*}", self._series)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{self.port}"
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def env(self):
+        """Environment variables pointing the bot at this simulator."""
+        return {
+            "BINANCE_API": f"{self.base_url}/api/v3",
+            "FRANKFURTER_API": self.base_url,
+        }
+
+    # -- Faults ----------------------------------------------------------------
+
+    def _count(self, request, status):
+        endpoint = "/<start>..<end>" if ".." in request.path else request.path
+        key = f"{endpoint} {status}"
+        self.stats[key] = self.stats.get(key, 0) + 1
+
+    def _binance_weight(self, request):
+        now = self._clock()
+        window = int(now // 60)
+        if window != self._window:
+            self._window = window
+            self.used_weight = 0
+        self.used_weight += binance_limits.request_weight(
+            str(request.url), dict(request.query)
+        )
+        return self.used_weight
+
+    @web.middleware
+    async def _faults(self, request, handler):
+        if request.path.startswith("/_simulator"):
+            return await handler(request)
+        binance = request.path.startswith("/api/v3")
+        headers = {}
+        status = None
+        if binance:
+            headers["X-MBX-USED-WEIGHT-1M"] = str(self._binance_weight(request))
+            wait = self.banned_until - self._clock()
+            if wait > 0:
+                status, headers["Retry-After"] = 418, str(math.ceil(wait))
+            elif self.used_weight > self.weight_limit:
+                status, headers["Retry-After"] = 429, str(60 - int(self._clock()) % 60)
+        roll = self._random.random()
+        if status is None:
+            if binance and roll < self.ban_rate:
+                self.banned_until = self._clock() + self.retry_after
+                status, headers["Retry-After"] = 418, str(self.retry_after)
+            elif roll < self.ban_rate + self.rate_limit_rate:
+                status, headers["Retry-After"] = 429, str(self.retry_after)
+            elif roll < self.ban_rate + self.rate_limit_rate + self.error_rate:
+                status = self._random.choice(ERROR_STATUSES)
+
+        delay = self.latency.sample()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if status is not None:
+            self._count(request, status)
+            return web.json_response(
+                {"code": -1003 if status in (418, 429) else -1000, "msg": "Simulated"},
+                status=status,
+                headers=headers,
+            )
+
+        try:
+            response = await handler(request)
+        except web.HTTPException as e:
+            self._count(request, e.status)
+            raise
+        self._count(request, response.status)
+        response.headers.update(headers)
+        if self._random.random() < self.slow_drip_rate:
+            return await self._drip(request, response)
+        return response
+
+    async def _drip(self, request, response):
+        """Sends the body of ``response`` in small chunks with pauses in between."""
+        body = response.body
+        dripped = web.StreamResponse(status=response.status, headers=response.headers)
+        dripped.content_type = response.content_type
+        dripped.content_length = len(body)
+        await dripped.prepare(request)
+        for start in range(0, len(body), self.drip_chunk):
+            await dripped.write(body[start : start + self.drip_chunk])
+            await asyncio.sleep(self.drip_interval)
+        await dripped.write_eof()
+        return dripped
+
+    # -- Binance ---------------------------------------------------------------
+
+    @staticmethod
+    def _invalid_symbol():
+        return web.json_response({"code": -1121, "msg": "Invalid symbol."}, status=400)
+
+    async def _ticker_price(self, request):
+        now = int(self._clock() * 1000)
+        if "symbol" in request.query:
+            symbol = request.query["symbol"]
+            if symbol not in PAIRS:
+                return self._invalid_symbol()
+            return web.json_response(
+                {"symbol": symbol, "price": _fmt(pair_price(symbol, now))}
+            )
+        symbols = json.loads(request.query.get("symbols", "null")) or PAIRS
+        if any(symbol not in PAIRS for symbol in symbols):
+            return self._invalid_symbol()
+        return web.json_response(
+            [{"symbol": s, "price": _fmt(pair_price(s, now))} for s in symbols]
+        )
+
+    async def _exchange_info(self, request):
+        symbols = []
+        for pair in PAIRS:
+            quote = next(q for q in QUOTE_USD if pair.endswith(q))
+            symbols.append(
+                {
+                    "symbol": pair,
+                    "status": "TRADING",
+                    "baseAsset": pair[: -len(quote)],
+                    "quoteAsset": quote,
+                }
+            )
+        return web.json_response(
+            {
+                "timezone": "UTC",
+                "serverTime": int(self._clock() * 1000),
+                "symbols": symbols,
+            }
+        )
+
+    async def _klines(self, request):
+        query = request.query
+        symbol = query.get("symbol")
+        if symbol not in PAIRS:
+            return self._invalid_symbol()
+        interval = query.get("interval")
+        if interval not in intervals.INTERVAL_MS:
+            return web.json_response(
+                {"code": -1120, "msg": "Invalid interval."}, status=400
+            )
+        now = int(self._clock() * 1000)
+        limit = min(int(query.get("limit", 500)), 1000)
+        end = min(int(query.get("endTime", now)), now)
+        if "startTime" in query:
+            open_ms, next_open = intervals.candle_bounds(
+                interval, int(query["startTime"])
+            )
+            if open_ms < int(query["startTime"]):
+                open_ms = next_open
+        else:
+            # Without startTime Binance returns the newest ``limit`` candles
+            open_ms = intervals.candle_bounds(interval, end)[0]
+            for _ in range(limit - 1):
+                open_ms = intervals.candle_bounds(interval, open_ms - 1)[0]
+        klines = []
+        while open_ms <= end and len(klines) < limit:
+            next_open = intervals.candle_bounds(interval, open_ms)[1]
+            close_ms = min(next_open - 1, now)
+            first = pair_price(symbol, open_ms)
+            last = pair_price(symbol, close_ms)
+            middle = pair_price(symbol, (open_ms + close_ms) // 2)
+            volume = 1000 * (1.5 + _noise(symbol, interval, open_ms))
+            klines.append(
+                [
+                    open_ms,
+                    _fmt(first),
+                    _fmt(max(first, last, middle)),
+                    _fmt(min(first, last, middle)),
+                    _fmt(last),
+                    _fmt(volume),
+                    next_open - 1,
+                    _fmt(volume * middle),
+                    int(volume * 7),
+                    _fmt(volume / 2),
+                    _fmt(volume * middle / 2),
+                    "0",
+                ]
+            )
+            open_ms = next_open
+        return web.json_response(klines)
+
+    # -- Frankfurter -----------------------------------------------------------
+
+    def _today(self):
+        return datetime.fromtimestamp(self._clock(), tz=timezone.utc).date()
+
+    @staticmethod
+    def _working_day(day):
+        while day.weekday() >= 5:
+            day -= timedelta(days=1)
+        return day
+
+    def _rates(self, request, day):
+        base = request.query.get("from", "EUR")
+        targets = request.query.get("to")
+        targets = targets.split(",") if targets else [*EUR_RATES, "EUR"]
+        if base not in CURRENCY_NAMES or any(t not in CURRENCY_NAMES for t in targets):
+            raise web.HTTPNotFound(
+                text=json.dumps({"message": "not found"}),
+                content_type="application/json",
+            )
+        rate_base = eur_rate(base, day)
+        return base, {
+            t: round(eur_rate(t, day) / rate_base, 5) for t in targets if t != base
+        }
+
+    async def _latest(self, request):
+        day = self._working_day(self._today())
+        base, rates = self._rates(request, day)
+        return web.json_response(
+            {"amount": 1.0, "base": base, "date": day.isoformat(), "rates": rates}
+        )
+
+    async def _series(self, request):
+        start, _, end = request.match_info["dates"].partition("..")
+        try:
+            first = date.fromisoformat(start)
+            last = min(date.fromisoformat(end) if end else self._today(), self._today())
+        except ValueError:
+            raise web.HTTPUnprocessableEntity()
+        series = {}
+        day = first
+        while day <= last:
+            if day.weekday() < 5:  # Rates are published on working days only
+                series[day.isoformat()] = self._rates(request, day)[1]
+            day += timedelta(days=1)
+        return web.json_response(
+            {
+                "amount": 1.0,
+                "base": request.query.get("from", "EUR"),
+                "start_date": first.isoformat(),
+                "end_date": last.isoformat(),
+                "rates": series,
+            }
+        )
+
+    async def _currencies(self, request):
+        return web.json_response(CURRENCY_NAMES)
+
+    async def _stats(self, request):
+        return web.json_response(
+            {
+                "responses": self.stats,
+                "used_weight": self.used_weight,
+                "banned_for": max(0.0, self.banned_until - self._clock()),
+            }
+        )
+
+
+async def serve(simulator, host, port):
+    await simulator.start(host, port)
+    for name, value in simulator.env.items():
+        print(f"export {name}={value}")
+    await asyncio.Event().wait()  # Until interrupted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument(
+        "--latency",
+        default="fixed:0",
+        help="delay distribution, e.g. fixed:0.05, uniform:0.01,0.2, "
+        "exponential:0.05 or lognormal:0.05,0.6 (seconds)",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--ban-rate", type=float, default=0.0)
+    parser.add_argument("--slow-drip-rate", type=float, default=0.0)
+    parser.add_argument("--drip-chunk", type=int, default=64, help="bytes")
+    parser.add_argument("--drip-interval", type=float, default=0.05, help="seconds")
+    parser.add_argument("--retry-after", type=int, default=5, help="seconds")
+    parser.add_argument("--weight-limit", type=int, default=6000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    simulator = UpstreamSimulator(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        ban_rate=args.ban_rate,
+        slow_drip_rate=args.slow_drip_rate,
+        drip_chunk=args.drip_chunk,
+        drip_interval=args.drip_interval,
+        retry_after=args.retry_after,
+        weight_limit=args.weight_limit,
+        seed=args.seed,
+    )
+    try:
+        asyncio.run(serve(simulator, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
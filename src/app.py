@@ -1,14 +1,63 @@
 import discord
 from discord.ext import commands
-import requests
 import os
 import logging
-from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
+from datetime import datetime, timedelta, timezone
+import numpy as np
 from io import BytesIO
-import json
+import asyncio
+import atexit
+import math
+import re
+import time
+from collections import Counter
 from dotenv import load_dotenv
 
+try:
+    from .services import (
+        admission,
+        alerts,
+        binance_limits,
+        cache,
+        cache_backend,
+        candles,
+        charts,
+        conversion,
+        currency_registry,
+        favorites,
+        http_client,
+        intervals,
+        metrics,
+        prefetch,
+        quotes,
+        series,
+        state,
+        stream,
+        symbols,
+    )
+except ImportError:  # Started as a script from inside src/ (see Dockerfile)
+    from services import (
+        admission,
+        alerts,
+        binance_limits,
+        cache,
+        cache_backend,
+        candles,
+        charts,
+        conversion,
+        currency_registry,
+        favorites,
+        http_client,
+        intervals,
+        metrics,
+        prefetch,
+        quotes,
+        series,
+        state,
+        stream,
+        symbols,
+    )
+
 # We retrieve the bot token from the environment variables
 load_dotenv()  # Loads environment variables from the .env file.
 TOKEN = os.getenv("D_TOKEN")
@@ -18,14 +67,84 @@ logging.basicConfig(
     level=logging.INFO, format="[%(asctime)s] %(levelname)s: %(message)s"
 )
 
-# Dictionaries storing user preferences
-user_lang = {}  # Key: user.id, value: "en" lub "pl"
-user_currency = {}  # Key: user.id, value: f.ex. "USD", "PLN", etc.
-user_favorites = {}
-FAVORITES_FILE = "favorites.json"
-message_fav_data = (
-    {}
-)  # Mapping: message.id -> dynamic favorite info (np. {"type": "price", "symbol": "BTC"})
+
+def shard_config(count=None, ids=None):
+    """
+    Returns (shard count, shard ids) of this process from SHARD_COUNT and SHARD_IDS
+    (e.g. "4" and "0,1"), or (None, None) to let discord.py choose.
+    """
+    if not ids:
+        return (int(count) if count else None), None
+    if not count:
+        raise ValueError("SHARD_IDS needs SHARD_COUNT (the number of all shards)")
+    count = int(count)
+    ids = [int(shard) for shard in ids.split(",")]
+    if not all(0 <= shard < count for shard in ids):
+        raise ValueError(f"SHARD_IDS must be between 0 and {count - 1}: {ids}")
+    return count, ids
+
+
+def shard_path(path, ids):
+    """
+    The path of a local store for the shards ``ids`` ("favorites.json" ->
+    "favorites-shards-0-1.json"), so processes started in one directory do not
+    share (and overwrite) each other's favorites, alerts and preferences.
+    """
+    if ids is None or path == ":memory:":
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-shards-{'-'.join(map(str, ids))}{ext}"
+
+
+def check_unsharded_stores(paths, ids):
+    """
+    Refuses to run shards next to the stores of a bot started without SHARD_IDS:
+    the shards use their own files, so those users' data would silently disappear.
+    """
+    if ids is None:
+        return
+    found = [path for path in paths if path != ":memory:" and os.path.exists(path)]
+    if found:
+        raise ValueError(
+            f"Unsharded stores found: {', '.join(found)}. With SHARD_IDS every process "
+            f"keeps its own files (e.g. {shard_path(found[0], ids)}); rename these for "
+            "one of the processes or move them away before starting the shards"
+        )
+
+
+# Sharding: SHARD_COUNT shards in total, of which this process runs SHARD_IDS
+# (e.g. "0,1"); several processes with different SHARD_IDS share the load.
+# Without them discord.py runs the recommended number of shards in this process.
+SHARD_COUNT, SHARD_IDS = shard_config(os.getenv("SHARD_COUNT"), os.getenv("SHARD_IDS"))
+check_unsharded_stores(
+    [
+        state.PREFERENCES_DB,
+        "favorites.json",
+        "favorites.json.journal",
+        alerts.ALERTS_DB,
+    ],
+    SHARD_IDS,
+)
+
+# User preferences, persisted and loaded lazily per user on first access
+preferences = state.UserPreferences(shard_path(state.PREFERENCES_DB, SHARD_IDS))
+user_lang = preferences.view("lang")  # Key: user.id, value: "en" lub "pl"
+user_currency = preferences.view(
+    "currency"
+)  # Key: user.id, value: f.ex. "USD", "PLN", etc.
+user_favorites = {}  # Key: user.id, value: list of PriceFavorite/StaticFavorite records
+FAVORITES_FILE = shard_path("favorites.json", SHARD_IDS)
+favorites_store = favorites.FavoritesStore(FAVORITES_FILE)
+favorites_loaded = False
+DISCORD_MESSAGE_LIMIT = 2000
+MAX_CHART_CANDLES = int(os.getenv("MAX_CHART_CANDLES", "20000"))
+# Longest time the bot waits for the startup warm-up before connecting (seconds)
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "15"))
+# Mapping: message.id -> dynamic favorite info (np. PriceFavorite("BTC", "USD")),
+# kept only for recent messages so memory use stays bounded
+message_fav_data = state.BoundedMap(state.MESSAGE_FAV_LIMIT, state.MESSAGE_FAV_TTL)
+# Known currencies (Frankfurter fiat list plus USDT), loaded from a local snapshot
+currency_info = currency_registry.registry
 
 
 # Translation function – the default language is English ('en')
@@ -38,17 +157,190 @@ def t(user_id, text):
 intents = discord.Intents.default()
 intents.message_content = True
 intents.reactions = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+
+
+class CryptoBot(commands.AutoShardedBot):
+    """The bot; on shutdown it also closes the connections shared by all commands."""
+
+    async def close(self):
+        await super().close()
+        # The price stream holds a WebSocket of the shared HTTP session, so it goes first
+        await stream.feed.close()
+        await http_client.client.close()
+
+
+bot = CryptoBot(
+    command_prefix="!", intents=intents, shard_count=SHARD_COUNT, shard_ids=SHARD_IDS
+)
 
 # Remove the default help command to avoid alias conflicts
 bot.remove_command("help")
 
 
+class CommandBusy(commands.CheckFailure):
+    """Raised by admission checks when a command is rejected because of overload."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Busy, retry after {retry_after:.0f} s")
+        self.retry_after = retry_after
+
+
+def admission_check(cost):
+    """
+    Command check declaring the cost class of a command (see services/admission.py).
+    An admitted command holds its slots until it finishes.
+    """
+
+    async def predicate(ctx):
+        try:
+            ctx.admission_ticket = admission.controller.admit(
+                cost,
+                ctx.command.qualified_name,
+                ctx.author.id,
+                ctx.guild.id if ctx.guild else None,
+            )
+        except admission.Busy as e:
+            raise CommandBusy(e.retry_after)
+        return True
+
+    return commands.check(predicate)
+
+
+async def release_admission(ctx):
+    ticket = getattr(ctx, "admission_ticket", None)
+    if ticket is not None:
+        ticket.release()
+
+
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.started_at = time.perf_counter()
+
+
+@bot.after_invoke
+async def finish_command(ctx):
+    await release_admission(ctx)
+    command = ctx.command.qualified_name
+    metrics.command_invocations.inc(command, "error" if ctx.command_failed else "ok")
+    metrics.command_latency.observe(time.perf_counter() - ctx.started_at, command)
+
+
+def cache_hit_ratios():
+    return {
+        "quotes": quotes.quote_cache.stats()["hit_ratio"],
+        "charts": charts.chart_cache.stats()["hit_ratio"],
+    }
+
+
+# Values read only when /metrics is scraped
+metrics.registry.gauge(
+    "bot_cache_hit_ratio",
+    "Share of cache lookups served from memory since start.",
+    cache_hit_ratios,
+    ("cache",),
+)
+metrics.registry.gauge(
+    "bot_render_queue_depth",
+    "Charts waiting for or in rendering.",
+    lambda: charts.renderer.queue_depth,
+)
+metrics.registry.gauge(
+    "bot_binance_weight_used",
+    "Binance request weight used in the current minute.",
+    lambda: binance_limits.limiter.used,
+)
+
+
+def hot_conversions(top_k):
+    """The (symbol, currency) prices kept most often in favorites, most common first."""
+    counts = Counter()
+    for favs in user_favorites.values():
+        for fav in favs:
+            if isinstance(fav, state.PriceFavorite) and fav.symbol:
+                counts[fav.symbol, (fav.currency or "USD").upper()] += 1
+    return [key for key, _ in counts.most_common(top_k)]
+
+
+async def warm_hot_caches(top_k=prefetch.PREFETCH_TOP_K):
+    """
+    Converts the hottest favorite prices with one batch request per source, so the
+    first !ulubione and !price after a restart are served from memory. The rates
+    count as demand, so the prefetch scheduler keeps them warm afterwards.
+    """
+    conversions = hot_conversions(top_k)
+    results = await conversion.engine.convert_many(conversions)
+    for key, result in results.items():
+        if isinstance(result, Exception):
+            logging.warning(f"Warm-up of the {key[0]}/{key[1]} price failed: {result}")
+    return len(conversions)
+
+
+async def warm_up(timeout=WARMUP_TIMEOUT):
+    """
+    Prepares everything the first commands need: favorites, the currency list,
+    the HTTP session, the chart render pool and the hot prices. Steps still
+    running after ``timeout`` seconds finish in the background.
+    """
+    global user_favorites
+    started = time.perf_counter()
+    if not favorites_loaded:
+        user_favorites = load_favorites()
+    # The currency and Binance symbol lists come from disk and are refreshed in the background
+    currency_info.load()
+    symbols.index.load()
+    # Best conversion paths to every currency a user can choose
+    conversion.engine.precompute(currency_info.codes())
+    # A single HTTP session with pooled keep-alive connections shared by all commands
+    await http_client.client.start()
+    loop = asyncio.get_running_loop()
+    steps = [
+        # Chart rendering runs in a process pool, started before the first !chart
+        loop.create_task(charts.renderer.warm_up()),
+        loop.create_task(warm_hot_caches()),
+    ]
+    if not symbols.index.ready:
+        # First start: without a snapshot every pair would be probed on Binance
+        steps.append(loop.create_task(symbols.index.refresh()))
+    done, pending = await asyncio.wait(steps, timeout=timeout)
+    for step in done:
+        if step.exception() is not None:
+            logging.warning(f"Warm-up step failed: {step.exception()}")
+    elapsed = time.perf_counter() - started
+    if pending:
+        logging.warning(f"Warm-up not finished after {elapsed:.1f} s, continuing")
+    else:
+        logging.info(f"Warm-up finished in {elapsed:.1f} s")
+    return elapsed
+
+
+@bot.event
+async def setup_hook():
+    # Runs after login and before connecting to the gateway,
+    # so no command arrives before the warm-up is done
+    await warm_up()
+
+
 @bot.event
 async def on_ready():
-    global user_favorites
-    user_favorites = load_favorites()
-    print(f"Logged in as {bot.user}")
+    # Background tasks (idempotent: on_ready runs again after reconnects)
+    currency_info.start()
+    symbols.index.start()
+    # Changes are written to the favorites journal in batches by a background task
+    favorites_store.start()
+    # Optional Binance WebSocket feed serving !price from memory
+    if stream.STREAMING_ENABLED:
+        stream.feed.start()
+    # Price alerts are checked on every price update, notifications go out rate-limited
+    alerts.engine.load()
+    alert_notifier.start()
+    alerts.engine.start(get_alert_prices, alert_notifier.notify, cached_alert_price)
+    # Hot prices, rates and charts are refreshed in the background before they expire
+    prefetch.scheduler.start()
+    # Optional Prometheus endpoint (METRICS_PORT) and event loop lag sampling
+    metrics.lag_monitor.start()
+    if metrics.METRICS_PORT:
+        await metrics.server.start()
+    print(f"Logged in as {bot.user} (shards {bot.shard_ids} of {bot.shard_count})")
 
 
 @bot.command(name="hello", aliases=["hej"])
@@ -79,13 +371,13 @@ async def lang(ctx, kod: str = None):
 
 
 @bot.command(name="price", aliases=["cena"])
+@admission_check("quote")
 async def price(ctx, symbol: str):
     user_id = ctx.author.id
-    fiat_codes = {"USD", "EUR", "PLN", "GBP", "JPY", "CHF", "AUD", "CAD"}
     symbol_input = symbol.upper()
 
     # Handle fiat currency symbols with special logic
-    if symbol_input in fiat_codes:
+    if currency_info.is_fiat(symbol_input):
         # Get the target currency:
         # If the user set a currency (e.g., using !currency/!waluta) and it's different from the symbol,
         # use it; otherwise, default to PLN.
@@ -95,37 +387,38 @@ async def price(ctx, symbol: str):
         else:
             target_fiat = target_fiat.upper()
         try:
-            # Use the Frankfurter API to fetch the exchange rate from symbol_input (e.g., USD) to target_fiat (e.g., PLN).
-            frankfurter_url = f"https://api.frankfurter.app/latest?from={symbol_input}&to={target_fiat}"
-            res = requests.get(frankfurter_url).json()
-            if "rates" not in res or target_fiat not in res["rates"]:
+            # Fetch the (cached) Frankfurter rate from symbol_input (e.g., USD) to target_fiat (e.g., PLN).
+            try:
+                rate = (await conversion.engine.convert(symbol_input, target_fiat)).rate
+            except conversion.NoConversion:
+                rate = None
+            if rate is None:
                 await ctx.send(
                     t(
                         ctx.author.id,
                         {
-                            "en": f"⚠️ An error occurred: {e}",
-                            "pl": f"⚠️ Wystąpił błąd: {e}",
+                            "en": f"⚠️ An error occurred: missing rate for {target_fiat}",
+                            "pl": f"⚠️ Wystąpił błąd: brak kursu dla {target_fiat}",
                         },
                     )
                 )
                 return
-            rate = float(res["rates"][target_fiat])
             message_content = f"💱 1 {symbol_input} = {rate:.2f} {target_fiat}"
             msg = await ctx.send(message_content)
             await msg.add_reaction("❤️")
             # Save dynamic data — taking into account that this is a fiat currency conversion.
-            message_fav_data[msg.id] = {
-                "type": "price",
-                "symbol": symbol_input,
-                "currency": target_fiat,
-                "fiat_conversion": True,
-            }
+            message_fav_data[msg.id] = state.PriceFavorite(
+                symbol_input, target_fiat, fiat_conversion=True
+            )
             return
         except Exception as e:
             await ctx.send(
                 t(
                     ctx.author.id,
-                    {"en": f"⚠️ An error occurred: {e}", "pl": f"⚠️ Wystąpił błąd: {e}"},
+                    {
+                        "en": f"⚠️ An error occurred: {e}",
+                        "pl": f"⚠️ Wystąpił błąd: {e}",
+                    },
                 )
             )
             return
@@ -133,96 +426,65 @@ async def price(ctx, symbol: str):
     # If the symbol is not a fiat currency, treat it as a cryptocurrency.
     currency = user_currency.get(user_id, "USD").upper()
     symbol_base = symbol_input
-    symbol_with_usdt = symbol_base + "USDT"
     try:
-        binance_url = (
-            f"https://api.binance.com/api/v3/ticker/price?symbol={symbol_with_usdt}"
-        )
-        res = requests.get(binance_url).json()
-        cena_usdt = float(res["price"])
-        if currency in ["USD", "USDT"]:
-            message_content = f"💰 Price of {symbol_base}: {cena_usdt:,.2f} {currency}"
-        else:
-            frankfurter_url = (
-                f"https://api.frankfurter.app/latest?from=USD&to={currency}"
-            )
-            res2 = requests.get(frankfurter_url).json()
-            if "rates" not in res2:
-                kurs = 1.0
-            else:
-                kurs = float(res2["rates"].get(currency, 1.0))
-            final_price = cena_usdt * kurs
-            message_content = f"💰 Price of {symbol_base}: {final_price:,.2f} {currency} (conversion rate: {kurs:.4f})"
+        # Along the best path (e.g. BTCPLN directly, or ETHUSDT and then USD -> PLN),
+        # with all missing rates fetched at once; unlisted symbols are rejected without a request
+        quote = await conversion.engine.convert(symbol_base, currency)
+        message_content = f"💰 Price of {symbol_base}: {quote.rate:,.2f} {currency}"
+        if quote.conversion_rate is not None:
+            message_content += f" (conversion rate: {quote.conversion_rate:.4f})"
         msg = await ctx.send(message_content)
         await msg.add_reaction("❤️")
-        message_fav_data[msg.id] = {
-            "type": "price",
-            "symbol": symbol_base,
-            "currency": currency,
-            "fiat_conversion": False,
-        }
+        message_fav_data[msg.id] = state.PriceFavorite(
+            symbol_base, currency, fiat_conversion=False
+        )
     except Exception as e:
         await ctx.send(
-            t(user_id, {"en": f"⚠️ Error occurred: {e}", "pl": f"⚠️ Wystąpił błąd: {e}"})
+            t(
+                user_id,
+                {"en": f"⚠️ Error occurred: {e}", "pl": f"⚠️ Wystąpił błąd: {e}"},
+            )
         )
 
 
 @bot.command(name="currencies", aliases=["waluta"])
+@admission_check("quote")
 async def currencies(ctx, kod: str = None):
     user_id = ctx.author.id
 
     # If a currency code is provided to set
     if kod:
         kod = kod.upper()
-        try:
-            response = requests.get("https://api.frankfurter.app/currencies")
-            response.raise_for_status()
-            currencies = response.json()
-
-            # Add USDT manually because it is not available in the API.
-            if "USDT" not in currencies:
-                currencies["USDT"] = "Tether (US Dollar Pegged)"
-
-            if kod in currencies:
-                user_currency[user_id] = kod
-                await ctx.send(
-                    f"✅ {t(user_id, {'en': 'Currency set to', 'pl': 'Ustawiono walutę na'})} **{kod} – {currencies[kod]}**"
-                )
-            else:
-                await ctx.send(
-                    f"❌ {t(user_id, {'en': 'Unknown currency code.', 'pl': 'Nieznany kod waluty.'})}"
-                )
-        except Exception as e:
+        if kod in currency_info:
+            user_currency[user_id] = kod
+            await ctx.send(
+                f"✅ {t(user_id, {'en': 'Currency set to', 'pl': 'Ustawiono walutę na'})} **{kod} – {currency_info.name(kod)}**"
+            )
+        else:
             await ctx.send(
-                f"⚠️ {t(user_id, {'en': 'Error setting currency.', 'pl': 'Błąd podczas ustawiania waluty.'})}\n{str(e)}"
+                f"❌ {t(user_id, {'en': 'Unknown currency code.', 'pl': 'Nieznany kod waluty.'})}"
             )
     else:
         # Get the currently set currency (default is USD).
         current = user_currency.get(user_id, "USD")
         display_current = current  # This will be displayed to the user
-        # If the user has set USDT, we will use "USD" as the API baseI
+        # If the user has set USDT, we will use "USD" as the API base
         base_for_api = "USD" if current == "USDT" else current
         try:
-            response = requests.get(
-                f"https://api.frankfurter.app/latest?from={base_for_api}&to=EUR,GBP,PLN,USD"
+            rates = await quotes.get_fx_rates(
+                base_for_api,
+                [code for code in ("EUR", "GBP", "PLN", "USD") if code != base_for_api],
             )
-            response.raise_for_status()
-            data = response.json()
-            rates = data.get("rates", {})
             currency_list = "\n".join(
-                [f"• `{code}`: {rate}" for code, rate in rates.items()]
+                [
+                    f"• `{code}`: {rate}"
+                    for code, rate in rates.items()
+                    if rate is not None
+                ]
             )
 
-            # Fetch the full list of currencies from the API.
-            response_currencies = requests.get("https://api.frankfurter.app/currencies")
-            response_currencies.raise_for_status()
-            currencies = response_currencies.json()
-            # Add USDT manually as it is not available in the API.
-            if "USDT" not in currencies:
-                currencies["USDT"] = "Tether (US Dollar Pegged)"
-
             await ctx.send(
-                f"🌍 {t(user_id, {'en': 'Your current currency:', 'pl': 'Twoja aktualna waluta:'})} **{display_current} – {currencies.get(display_current, '')}**\n\n"
+                f"🌍 {t(user_id, {'en': 'Your current currency:', 'pl': 'Twoja aktualna waluta:'})} **{display_current} – {currency_info.name(display_current)}**\n\n"
                 f"{t(user_id, {'en': 'Available currencies:', 'pl': 'Dostępne waluty:'})}\n"
                 f"{currency_list}"
             )
@@ -278,7 +540,7 @@ def parse_chart_args(args):
     return params
 
 
-def get_fiat_data(symbol, target, days):
+async def get_fiat_data(symbol, target, days):
     """
     Fetches historical exchange rate data for fiat pairs using the Frankfurter API.
 
@@ -290,11 +552,9 @@ def get_fiat_data(symbol, target, days):
     """
     end_date = datetime.today().date()
     start_date = end_date - timedelta(days=days)
-    url = f"https://api.frankfurter.app/{start_date}..{end_date}?from={symbol}&to={target}"
+    url = f"{http_client.FRANKFURTER_API}/{start_date}..{end_date}?from={symbol}&to={target}"
 
-    res = requests.get(url)
-    res.raise_for_status()
-    data = res.json()
+    data = await http_client.get_json(url)
 
     if "rates" not in data or not data["rates"]:
         raise Exception("No data available for that period.")
@@ -308,87 +568,165 @@ def get_fiat_data(symbol, target, days):
     return dates_dt, prices, title, ylabel
 
 
-def get_crypto_data(symbol, target, days, interval):
+async def pair_closes(edge, interval, limit):
+    """Candle open times and closing prices of the Binance pair of a conversion step."""
+    # Klines come from the local candle store, which only downloads the newest candles
+    klines = await candles.store.get_klines(edge.pair, interval, limit)
+    # Decode the klines into compact arrays: int64 open times (ms) and float64 OHLCV
+    open_times, ohlcv = series.parse_klines(klines)
+    closes = ohlcv[:, series.CLOSE]
+    return open_times, 1 / closes if edge.inverse else closes
+
+
+async def get_crypto_data(symbol, target, days, interval):
     """
     Fetches candlestick (klines) data for cryptocurrency pairs from Binance and performs any necessary currency conversion.
 
     Determines the expected data limit based on the interval and the number of days.
     Returns:
-      - a list of dates (as datetime objects)
-      - a list of converted closing prices
+      - an array of candle open times (numpy datetime64, UTC)
+      - an array of converted closing prices
       - the chart title
       - the Y-axis label
     """
-    # Determining the candlestick data limit
-    if "h" in interval:
-        try:
-            hours_per_day = 24 // int(interval.replace("h", ""))
-        except Exception:
-            hours_per_day = 24
-        max_limit = min(days * hours_per_day, 1000)
-    else:
-        max_limit = min(days, 1000)
+    # Determining the number of candles covering the requested days
+    # (longer ranges are downloaded in concurrent pages of 1000 klines)
+    max_limit = max(1, days * intervals.DAY_MS // intervals.interval_ms(interval))
+    if max_limit > MAX_CHART_CANDLES:
+        raise Exception(
+            f"Too many candles requested ({max_limit}), use a longer interval or fewer days."
+        )
 
-    conversion_rate = 1.0
-    # Attempt to fetch data for a direct pair, e.g., BTCPLN
-    pair = f"{symbol}{target}"
-    url = f"https://api.binance.com/api/v3/klines?symbol={pair}&interval={interval}&limit={max_limit}"
-    try:
-        res = requests.get(url)
-        res.raise_for_status()
-        klines = res.json()
-        if not klines:
-            raise Exception("Brak danych dla pary")
-        use_fallback = False
-    except Exception:
-        use_fallback = True
-
-    if use_fallback:
-        # If the direct pair doesn't work, use a pair with USDT and convert the rate to the target (e.g., PLN)
-        pair = f"{symbol}USDT"
-        url = f"https://api.binance.com/api/v3/klines?symbol={pair}&interval={interval}&limit={max_limit}"
-        res = requests.get(url)
-        res.raise_for_status()
-        klines = res.json()
-        if target not in ["USD", "USDT"]:
-            rate_url = f"https://api.frankfurter.app/latest?from=USD&to={target}"
-            r = requests.get(rate_url).json()
-            if "rates" in r:
-                conversion_rate = float(r["rates"].get(target, 1.0))
-
-    timestamps = [datetime.fromtimestamp(k[0] / 1000) for k in klines]
-    prices_raw = [float(k[4]) for k in klines]
-    prices = [p * conversion_rate for p in prices_raw]
+    # The best conversion path (e.g. BTCPLN directly, or ETHUSDT and then USD -> PLN);
+    # an unknown symbol is rejected without any request
+    path = [
+        edge for edge in conversion.engine.path(symbol, target) if edge.kind != "peg"
+    ]
+    main = next((edge for edge in path if edge.kind == "ticker"), None)
+    if main is None:
+        raise conversion.NoConversion(f"no Binance pair for {symbol}/{target}")
+    # The first Binance pair gives the candle times
+    open_times, prices = await pair_closes(main, interval, max_limit)
+
+    async def step_rates(edge):
+        # The rate of a further step valid at every candle: the closes of another pair,
+        # or one time-series request to Frankfurter (the extra week makes sure there
+        # is a rate before the first candle)
+        if edge.kind == "ticker":
+            times, rates = await pair_closes(edge, interval, max_limit)
+        else:
+            first_day = datetime.fromtimestamp(open_times[0] / 1000, tz=timezone.utc)
+            last_day = datetime.fromtimestamp(open_times[-1] / 1000, tz=timezone.utc)
+            times, rates = await quotes.get_fx_series(
+                edge.source,
+                edge.target,
+                first_day.date() - timedelta(days=7),
+                last_day.date(),
+            )
+        # Joined on the candle timestamps (forward-filled, e.g. over weekends)
+        return series.asof_join(open_times, times, rates) if len(rates) else 1.0
+
+    if len(open_times):
+        steps = [edge for edge in path if edge is not main]
+        for rates in await asyncio.gather(*(step_rates(edge) for edge in steps)):
+            prices = prices * rates
+
+    timestamps = open_times.astype("datetime64[ms]")
     title = f"{symbol}/{target} – {days} periods ({interval})"
     ylabel = f"Price ({target})"
     return timestamps, prices, title, ylabel
 
 
-def create_chart(dates_dt, prices, title, ylabel, kolor):
+async def create_chart(dates_dt, prices, title, ylabel, kolor):
     """
-    Creates a chart using the matplotlib library and saves it to a BytesIO object.
+    Renders the chart in the worker process pool (off the event loop).
 
-    Returns a buffer object, ready to be sent via Discord.
+    Returns the PNG image as bytes, ready to be sent via Discord.
+    Raises charts.RenderQueueFull when too many charts are already being rendered.
     """
-    plt.figure(figsize=(14, 7))
-    plt.rcParams.update({"font.size": 12})
-    plt.plot(dates_dt, prices, color=kolor, linewidth=2)
-    plt.xticks(rotation=45)
-    plt.gca().xaxis.set_major_locator(plt.MaxNLocator(10))
-    plt.grid(True, linestyle="--", alpha=0.7)
-    plt.title(title, fontsize=16)
-    plt.xlabel("Date", fontsize=14)
-    plt.ylabel(ylabel, fontsize=14)
-    plt.tight_layout()
+    # Reduce long series to about one point per horizontal pixel, keeping peaks and troughs
+    times = np.asarray(dates_dt, dtype="datetime64[ms]")
+    times_ms, prices = series.lttb(
+        times.astype(np.int64),
+        np.asarray(prices, dtype=np.float64),
+        charts.CHART_WIDTH_PX,
+    )
+    return await charts.renderer.render(
+        times_ms.astype("datetime64[ms]"), prices, title, ylabel, kolor
+    )
+
+
+async def build_chart(symbol, target, days, interval, kolor):
+    """
+    Returns the PNG chart for the given parameters, rendering it if it is not cached.
+
+    The same chart requested again before the current candle closes is served
+    from the cache (Frankfurter publishes one rate per day, so fiat charts use daily buckets).
+    """
+    cache_key, candle_close = chart_cache_key(symbol, target, days, interval, kolor)
+    png = charts.chart_cache.get(cache_key)
+    if png is not None:
+        return png
+
+    async def render():
+        if currency_info.is_fiat(symbol) and currency_info.is_fiat(target):
+            dates_dt, prices, title, ylabel = await get_fiat_data(symbol, target, days)
+        else:
+            dates_dt, prices, title, ylabel = await get_crypto_data(
+                symbol, target, days, interval
+            )
+
+        # Generating the chart
+        return await create_chart(dates_dt, prices, title, ylabel, kolor)
+
+    async def render_and_store():
+        if cache_backend.shared is None:
+            png = await render()
+        else:
+            # Charts rendered by another bot process are reused, and only one renders them
+            png, _ = await cache_backend.shared.get_or_fetch(
+                cache_backend.cache_key("chart", *cache_key),
+                candle_close / 1000 - time.time(),
+                render,
+            )
+        charts.chart_cache.set(cache_key, png, expires_at=candle_close / 1000)
+        return png
+
+    # Identical charts requested while one is being generated wait for that one
+    return await chart_flights.run(cache_key, render_and_store)
 
-    buf = BytesIO()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    plt.close()
-    return buf
+
+chart_flights = cache.SingleFlight()
+
+
+def chart_cache_key(symbol, target, days, interval, kolor):
+    """Returns the chart cache key for the current candle and the time it closes (ms)."""
+    is_fiat = currency_info.is_fiat(symbol) and currency_info.is_fiat(target)
+    candle_open, candle_close = intervals.candle_bounds(
+        "1d" if is_fiat else interval, int(time.time() * 1000)
+    )
+    return (symbol, target, days, interval, kolor, candle_open), candle_close
+
+
+def chart_expires_in(key):
+    # A cached chart is valid until its candle closes; after that the chart
+    # of the new candle is missing and gets rendered in the background
+    cache_key, _ = chart_cache_key(*key[1:])
+    return math.inf if cache_key in charts.chart_cache else None
+
+
+async def prefetch_charts(keys):
+    for key in keys:
+        await build_chart(*key[1:])
+    return len(keys)
+
+
+# Popular charts are rendered again in the background when a new candle starts
+prefetch.scheduler.register("chart", chart_expires_in, prefetch_charts)
 
 
 @bot.command(name="chart", aliases=["wykres"])
+@admission_check("chart")
 async def wykres(ctx, *args):
     user_id = ctx.author.id
     try:
@@ -407,19 +745,19 @@ async def wykres(ctx, *args):
         interval = params["interval"]
         kolor = params["kolor"]
 
-        # List of fiat currencies – can be extended as needed
-        fiat_codes = {"USD", "EUR", "PLN", "GBP", "JPY", "CHF", "AUD", "CAD"}
-
-        if symbol in fiat_codes and target in fiat_codes:
-            dates_dt, prices, title, ylabel = get_fiat_data(symbol, target, days)
-        else:
-            dates_dt, prices, title, ylabel = get_crypto_data(
-                symbol, target, days, interval
+        png = await build_chart(symbol, target, days, interval, kolor)
+        prefetch.scheduler.record("chart", symbol, target, days, interval, kolor)
+        await ctx.send(file=discord.File(BytesIO(png), filename="wykres.png"))
+    except charts.RenderQueueFull:
+        await ctx.send(
+            t(
+                user_id,
+                {
+                    "en": "⏳ Too many charts are being generated right now, please try again in a moment.",
+                    "pl": "⏳ Generuję teraz zbyt wiele wykresów, spróbuj ponownie za chwilę.",
+                },
             )
-
-        # Generating the chart
-        buf = create_chart(dates_dt, prices, title, ylabel, kolor)
-        await ctx.send(file=discord.File(buf, filename="wykres.png"))
+        )
     except Exception as e:
         await ctx.send(
             t(
@@ -445,36 +783,34 @@ async def on_reaction_add(reaction, user):
 
             # If the message has dynamic content, gather that data;
             # otherwise, fetch the static content.
-            if message.id in message_fav_data:
-                fav_item = message_fav_data[message.id]
-            else:
-                fav_item = {
-                    "type": "static",
-                    "content": (
-                        message.content
-                        if message.content
-                        else (
-                            message.embeds[0].description
-                            if message.embeds
-                            else "Attachment"
-                        )
-                    ),
-                }
+            fav_item = message_fav_data.get(message.id)
+            if fav_item is None:
+                fav_item = state.StaticFavorite(
+                    message.content
+                    if message.content
+                    else (
+                        message.embeds[0].description
+                        if message.embeds
+                        else "Attachment"
+                    )
+                )
 
             favs = user_favorites.get(user_id, [])
             if fav_item not in favs:
                 favs.append(fav_item)
                 user_favorites[user_id] = favs
-                save_favorites()
+                favorites_store.record_add(user_id, fav_item)
                 await message.channel.send(
                     f"💾 {user.mention}, added to your favorites!"
                 )
 
 
 @bot.command(name="favorite", aliases=["ulubione", "fav"])
+@admission_check("quote")
 async def show_favorites(ctx):
     user_id = ctx.author.id
-    favs = user_favorites.get(user_id, [])
+    # A copy: a ❤️ reaction may add a favorite while the prices are being fetched
+    favs = list(user_favorites.get(user_id, []))
     if not favs:
         await ctx.send(
             t(
@@ -486,93 +822,104 @@ async def show_favorites(ctx):
             )
         )
     else:
+        # Refresh all dynamic entries at once (one request per upstream source)
+        price_favs = [fav for fav in favs if isinstance(fav, state.PriceFavorite)]
+        updated = iter(await get_dynamic_prices(price_favs, user_id))
         display_lines = []
-        # Displaying the last 5 favorites
-        for fav in favs[-5:]:
-            if isinstance(fav, dict) and fav.get("type") == "price":
-                # Dla dynamicznych wpisów liczymy aktualną cenę
-                updated_msg = get_dynamic_price(fav, user_id)
-                display_lines.append(f"🔸 {updated_msg}")
-            elif isinstance(fav, dict) and fav.get("type") == "static":
-                display_lines.append(f"🔸 {fav.get('content')}")
+        for number, fav in enumerate(favs, start=1):
+            if isinstance(fav, state.PriceFavorite):
+                display_lines.append(f"🔸 {number}. {next(updated)}")
             else:
-                display_lines.append(f"🔸 {fav}")
-        response = "\n\n".join(display_lines)
-        await ctx.send(
-            t(
-                user_id,
-                {
-                    "en": f"📌 Your recent favorites:\n{response}",
-                    "pl": f"📌 Twoje ostatnie ulubione:\n{response}",
-                },
-            )
+                display_lines.append(f"🔸 {number}. {fav.content}")
+
+        header = t(
+            user_id,
+            {"en": "📌 Your favorites:", "pl": "📌 Twoje ulubione:"},
         )
+        for message in split_message(header, display_lines, separator="\n\n"):
+            await ctx.send(message)
 
 
-def save_favorites():
-    with open(FAVORITES_FILE, "w", encoding="utf-8") as f:
-        json.dump(user_favorites, f, ensure_ascii=False, indent=2)
+def split_message(header, lines, separator="\n"):
+    """
+    Joins the lines into as few messages as possible.
+    Discord limits a single message to 2000 characters, so long lists are split.
+    """
+    messages = []
+    message = header + "\n" if header else ""
+    for line in lines:
+        if message and len(message) + len(line) > DISCORD_MESSAGE_LIMIT:
+            messages.append(message.rstrip())
+            message = ""
+        message += f"{line}{separator}"
+    messages.append(message.rstrip())
+    return messages
 
 
 def load_favorites():
-    if os.path.exists(FAVORITES_FILE):
-        with open(FAVORITES_FILE, "r", encoding="utf-8") as f:
-            try:
-                data = json.load(f)
-                return {int(k): v for k, v in data.items()}
-            except json.JSONDecodeError:
-                print("Error decoding favorites.json")
-    return {}
+    """
+    Loads favorites from the snapshot file and replays the journal of changes made since.
+    Reloading would discard changes that are not written yet, so this runs only once.
+    """
+    global favorites_loaded
+    favorites_loaded = True
+    return favorites_store.load()
 
 
-def get_dynamic_price(fav, user_id):
+async def get_dynamic_price(fav, user_id):
     """
      Updates the dynamic entry of favorites.
-    For 'price' entries with the key "fiat_conversion": True, treat it as a fiat currency exchange rate,
+    For price entries with fiat_conversion set, treat it as a fiat currency exchange rate,
     calling the Frankfurter API to fetch the current rate (e.g., 1 USD = X PLN).
     Otherwise, assume it's a cryptocurrency and fetch the price from Binance.
     """
-    base_symbol = fav.get("symbol")
-    # Use the saved currency or the one set by the user
-    stored_currency = fav.get("currency")
-    currency = (
-        stored_currency if stored_currency else user_currency.get(user_id, "USD")
-    ).upper()
+    return (await get_dynamic_prices([fav], user_id))[0]
 
-    if fav.get("fiat_conversion"):
-        # Special path for fiat currency conversion (e.g., !price usd/!cena usd)
-        try:
-            frankfurter_url = (
-                f"https://api.frankfurter.app/latest?from={base_symbol}&to={currency}"
-            )
-            res = requests.get(frankfurter_url).json()
-            if "rates" not in res or currency not in res["rates"]:
-                return f"⚠️ Error updating conversion for {base_symbol}: missing rate"
-            rate = float(res["rates"][currency])
-            return f"💱 1 {base_symbol} = {rate:.2f} {currency}"
-        except Exception as e:
-            return f"⚠️ Error updating conversion for {base_symbol}: {e}"
-    else:
-        # Assume the entry is for cryptocurrency – fetch the price from Binance
-        symbol_with_usdt = base_symbol + "USDT"
-        try:
-            binance_url = (
-                f"https://api.binance.com/api/v3/ticker/price?symbol={symbol_with_usdt}"
-            )
-            res = requests.get(binance_url).json()
-            price_usdt = float(res["price"])
-            if currency in ["USD", "USDT"]:
-                return f"💰 Price of {base_symbol}: {price_usdt:,.2f} {currency}"
-            else:
-                frankfurter_url = (
-                    f"https://api.frankfurter.app/latest?from=USD&to={currency}"
+
+async def get_dynamic_prices(favs, user_id):
+    """
+    Batch version of get_dynamic_price for a list of 'price' favorites.
+
+    All entries are converted together by the conversion engine: rates missing from
+    memory are fetched with one Binance request and one Frankfurter request per base
+    currency (all running concurrently).
+    Returns the formatted lines in the order of the given entries.
+    """
+    entries = []
+    for fav in favs:
+        # Use the saved currency or the one set by the user
+        stored_currency = fav.currency
+        currency = (
+            stored_currency if stored_currency else user_currency.get(user_id, "USD")
+        ).upper()
+        entries.append((fav, fav.symbol, currency))
+
+    results = await conversion.engine.convert_many(
+        [(base_symbol, currency) for _, base_symbol, currency in entries]
+    )
+
+    lines = []
+    for fav, base_symbol, currency in entries:
+        result = results[base_symbol, currency]
+        if fav.fiat_conversion:
+            # Special path for fiat currency conversion (e.g., !price usd/!cena usd)
+            if isinstance(result, Exception):
+                lines.append(
+                    f"⚠️ Error updating conversion for {base_symbol}: {result}"
                 )
-                res2 = requests.get(frankfurter_url).json()
-                rate = float(res2["rates"].get(currency, 1.0))
-                final_price = price_usdt * rate
-                return f"💰 Price of {base_symbol}: {final_price:,.2f} {currency} (conversion rate: {rate:.4f})"
-        except Exception as e:
-            return f"⚠️ Error updating price for {base_symbol}: {e}"
+            else:
+                lines.append(f"💱 1 {base_symbol} = {result.rate:.2f} {currency}")
+            continue
+
+        # A cryptocurrency – the price comes from Binance, converted when needed
+        if isinstance(result, Exception):
+            lines.append(f"⚠️ Error updating price for {base_symbol}: {result}")
+            continue
+        line = f"💰 Price of {base_symbol}: {result.rate:,.2f} {currency}"
+        if result.conversion_rate is not None:
+            line += f" (conversion rate: {result.conversion_rate:.4f})"
+        lines.append(line)
+    return lines
 
 
 @bot.command(name="remove-favorite", aliases=["usun_ulubione", "rmfav", "usunfav"])
@@ -605,7 +952,7 @@ async def remove_favorite(ctx, index: int):
         return
 
     removed_fav = favs.pop(index - 1)
-    save_favorites()  # Save the update to the file
+    favorites_store.record_remove(user_id, index - 1)  # Written to the journal shortly
     await ctx.send(
         t(
             user_id,
@@ -617,6 +964,210 @@ async def remove_favorite(ctx, index: int):
     )
 
 
+# "!alert BTC > 70000" / "!alert BTC < 60000" and "!alert BTC 5%" (a move in either direction)
+ALERT_THRESHOLD = re.compile(r"^([A-Z0-9]+)\s*([<>])\s*([0-9][0-9,]*(?:\.[0-9]+)?)$")
+ALERT_PERCENT = re.compile(r"^([A-Z0-9]+)\s*([0-9]+(?:\.[0-9]+)?)\s*%$")
+
+
+@bot.command(name="alert", aliases=["alarm"])
+@admission_check("quote")
+async def alert(ctx, *args):
+    user_id = ctx.author.id
+    alerts.engine.load()
+    command = " ".join(args).upper().strip()
+
+    if command in ("", "LIST", "LISTA"):
+        user_alerts = alerts.engine.for_user(user_id)
+        if not user_alerts:
+            await ctx.send(
+                t(
+                    user_id,
+                    {
+                        "en": "You have no active alerts. Example: `!alert BTC > 70000`",
+                        "pl": "Nie masz aktywnych alertów. Przykład: `!alarm BTC > 70000`",
+                    },
+                )
+            )
+            return
+        header = t(user_id, {"en": "🔔 Your alerts:", "pl": "🔔 Twoje alerty:"})
+        for message in split_message(header, [f"#{a.id}: {a}" for a in user_alerts]):
+            await ctx.send(message)
+        return
+
+    if args and args[0].lower() in ("remove", "usun"):
+        try:
+            removed = alerts.engine.remove(user_id, int(args[1].lstrip("#")))
+        except (IndexError, ValueError):
+            removed = None
+        if removed is None:
+            await ctx.send(
+                t(
+                    user_id,
+                    {
+                        "en": "❌ No such alert. Use `!alert list` to see your alerts.",
+                        "pl": "❌ Nie ma takiego alertu. Użyj `!alarm lista`, aby zobaczyć swoje alerty.",
+                    },
+                )
+            )
+        else:
+            await ctx.send(
+                t(
+                    user_id,
+                    {
+                        "en": f"✅ Alert removed: {removed}",
+                        "pl": f"✅ Usunięto alert: {removed}",
+                    },
+                )
+            )
+        return
+
+    threshold = ALERT_THRESHOLD.match(command)
+    percent = ALERT_PERCENT.match(command)
+    if not threshold and not percent:
+        await ctx.send(
+            t(
+                user_id,
+                {
+                    "en": "⚠️ Usage: `!alert BTC > 70000`, `!alert BTC < 60000` or `!alert BTC 5%`.",
+                    "pl": "⚠️ Użycie: `!alarm BTC > 70000`, `!alarm BTC < 60000` lub `!alarm BTC 5%`.",
+                },
+            )
+        )
+        return
+
+    symbol = (threshold or percent).group(1)
+    # Same currency rules as !price
+    if currency_info.is_fiat(symbol):
+        currency = user_currency.get(user_id, "PLN").upper()
+        if currency == symbol:
+            currency = "PLN"
+    else:
+        currency = user_currency.get(user_id, "USD").upper()
+
+    try:
+        conversion.engine.path(symbol, currency)  # Suggestions for a typo
+        current = (await get_alert_prices([(symbol, currency)])).get((symbol, currency))
+        if current is None:
+            raise Exception(f"no price for {symbol}/{currency}")
+        if threshold:
+            value = float(threshold.group(3).replace(",", ""))
+            above = value if threshold.group(2) == ">" else None
+            below = value if threshold.group(2) == "<" else None
+            new_alert = alerts.engine.add(
+                user_id, ctx.channel.id, symbol, currency, above=above, below=below
+            )
+        else:
+            move = float(percent.group(2))
+            if not 0 < move < 100:
+                raise Exception("the percentage must be between 0 and 100")
+            new_alert = alerts.engine.add(
+                user_id,
+                ctx.channel.id,
+                symbol,
+                currency,
+                above=current * (1 + move / 100),
+                below=current * (1 - move / 100),
+                percent=move,
+                reference=current,
+            )
+    except alerts.TooManyAlerts as e:
+        await ctx.send(
+            t(
+                user_id,
+                {
+                    "en": f"❌ You can have at most {e} active alerts.",
+                    "pl": f"❌ Możesz mieć najwyżej {e} aktywnych alertów.",
+                },
+            )
+        )
+        return
+    except Exception as e:
+        await ctx.send(
+            t(
+                user_id,
+                {"en": f"⚠️ Error occurred: {e}", "pl": f"⚠️ Wystąpił błąd: {e}"},
+            )
+        )
+        return
+
+    await ctx.send(
+        t(
+            user_id,
+            {
+                "en": f"🔔 Alert #{new_alert.id} set: {new_alert} (now {current:,.2f} {currency})",
+                "pl": f"🔔 Ustawiono alert #{new_alert.id}: {new_alert} (teraz {current:,.2f} {currency})",
+            },
+        )
+    )
+
+
+async def get_alert_prices(keys):
+    """
+    Returns the current prices for alert keys (symbol, currency) as a dict.
+
+    Prices are converted together like the favorites (one Binance request and one
+    Frankfurter request per base currency at most). Keys without a price are left out.
+    Periodic checks are not user demand, so they do not steer the prefetching.
+    """
+    results = await conversion.engine.convert_many(keys, record=False)
+    prices = {}
+    errors = set()
+    for key, result in results.items():
+        if isinstance(result, Exception):
+            errors.add(str(result))
+        else:
+            prices[key] = result.rate
+    if errors:
+        logging.warning(
+            f"Failed to fetch prices for alerts: {'; '.join(sorted(errors))}"
+        )
+    return prices
+
+
+def cached_alert_price(symbol, currency):
+    """
+    The price of an alert key from memory (None while a rate is not cached) and
+    the keys of the rates it is converted from, whose updates check the alert.
+    """
+    path = conversion.engine.path(symbol, currency)
+    result = conversion.engine.convert_cached(symbol, currency)
+    rate_keys = [edge.cache_key for edge in path if edge.cache_key is not None]
+    return (result.rate if result is not None else None), rate_keys
+
+
+async def send_alert_notification(user_id, channel_id, fired):
+    """
+    Delivers fired alerts (a list of (alert, price) pairs) of one user
+    to the channel where they were set, or as a direct message.
+    """
+    lines = [
+        t(
+            user_id,
+            {
+                "en": f"🔔 Alert #{a.id} triggered: {a} – now {price:,.2f} {a.currency}",
+                "pl": f"🔔 Alert #{a.id} zadziałał: {a} – teraz {price:,.2f} {a.currency}",
+            },
+        )
+        for a, price in fired
+    ]
+    destination = bot.get_channel(channel_id)
+    header = f"<@{user_id}>"
+    if destination is None:
+        destination = bot.get_user(user_id) or await bot.fetch_user(user_id)
+        header = ""
+    for message in split_message(header, lines):
+        await destination.send(message)
+
+
+# Alerts of the users of this process's shards
+alerts.engine.path = shard_path(alerts.ALERTS_DB, SHARD_IDS)
+# Fired alerts are grouped per user and channel and sent at a limited rate
+alert_notifier = alerts.Notifier(send_alert_notification)
+# Alerts are checked whenever a rate changes: fetched, shared by another process or streamed
+quotes.quote_cache.listeners.append(alerts.engine.rate_updated)
+stream.feed.listeners.append(alerts.engine.rate_updated)
+
+
 @bot.command(name="help", aliases=["pomoc"])
 async def help_command(ctx):
     user_id = ctx.author.id
@@ -638,11 +1189,14 @@ async def help_command(ctx):
         "      - `!wykres BTC 30d` → wykres BTC/USDT z 30 dniowym okresem (domyślne ustawienia target, interwału i koloru)\n"
         "      - `!wykres ETH USDT 7d 4h` → wykres ETH/USDT z 7 dniowym okresem i interwałem 4-godzinnym\n"
         "      - `!wykres USD PLN 90d` → wykres USD/PLN z 90 dniowym okresem\n\n"
+        "**🔔 !alarm / !alert [symbol] [> lub <] [cena] / [symbol] [procent]%**\n"
+        "  - Powiadamia, gdy cena przekroczy próg lub zmieni się o podany procent. Przykłady: `!alarm BTC > 70000`, `!alarm ETH 5%`.\n"
+        "  - `!alarm lista` wyświetla Twoje alerty, `!alarm usun [numer]` usuwa alert.\n\n"
         "**⭐ Ulubione i zarządzanie:**\n"
         "• **❤️ (reakcja)**\n"
         "  - Aby dodać wiadomość (np. wynik ceny lub wykres) do ulubionych, wystarczy zareagować emoji ❤️.\n\n"
         "• **!ulubione / !fav**\n"
-        "  - Wyświetla listę Twoich ostatnich ulubionych wpisów.\n\n"
+        "  - Wyświetla ponumerowaną listę wszystkich Twoich ulubionych wpisów.\n\n"
         "• **!usun_ulubione [numer] / !remove-favorite [numer] / !rmfav [numer]**\n"
         "  - Usuwa wybrany wpis ulubionych. Numeracja zaczyna się od 1. Przykład: `!usunfav 2` usunie drugi wpis.\n\n"
         "**Dodatkowe informacje:**\n"
@@ -676,11 +1230,14 @@ async def help_command(ctx):
         "      - `!chart BTC 30d` → chart for BTC/USDT over 30 days (default target, interval, and color applied)\n"
         "      - `!chart ETH USDT 7d 4h` → chart for ETH/USDT over 7 days with a 4-hour interval\n"
         "      - `!chart USD PLN 90d` → chart for USD/PLN over 90 days\n\n"
+        "**🔔 !alert / !alarm [symbol] [> or <] [price] / [symbol] [percent]%**\n"
+        "  - Notifies you when the price crosses a threshold or moves by the given percentage. Examples: `!alert BTC > 70000`, `!alert ETH 5%`.\n"
+        "  - `!alert list` shows your alerts, `!alert remove [number]` removes one.\n\n"
         "**⭐ Favorites and management:**\n"
         "• **❤️ (reaction)**\n"
         "  - To add a bot's message (e.g., a price result or chart) to your favorites, simply react with ❤️.\n\n"
         "• **!fav / !ulubione**\n"
-        "  - Displays a list of your recent favorite entries.\n\n"
+        "  - Displays a numbered list of all your favorite entries.\n\n"
         "• **!remove-favorite [number] / !usun_ulubione [number] / !rmfav [number]**\n"
         "  - Removes the selected favorite entry. Indexing starts at 1. Example: `!rmfav 2` removes the second entry.\n\n"
         "**Additional information:**\n"
@@ -704,7 +1261,20 @@ async def help_command(ctx):
 @bot.event
 async def on_command_error(ctx, error):
     user_id = ctx.author.id
-    if isinstance(error, commands.CommandNotFound):
+    # A command that failed after being admitted gives its slots back
+    await release_admission(ctx)
+    if isinstance(error, CommandBusy):
+        metrics.command_invocations.inc(ctx.command.qualified_name, "rejected")
+        await ctx.send(
+            t(
+                user_id,
+                {
+                    "en": f"⏳ I'm busy right now, please try again in {math.ceil(error.retry_after)} s.",
+                    "pl": f"⏳ Jestem teraz zajęty, spróbuj ponownie za {math.ceil(error.retry_after)} s.",
+                },
+            )
+        )
+    elif isinstance(error, commands.CommandNotFound):
         # Handling an unknown command
         await ctx.send(
             t(
@@ -750,7 +1320,14 @@ async def on_command_error(ctx, error):
         )
 
 
-if __name__ == "__main__":
+def main():
+    """Runs the bot (started by main.py)."""
+    # Changes still waiting for the next batch are written when the process exits
+    atexit.register(favorites_store.flush_sync)
+    atexit.register(alerts.engine.flush_sync)
     logging.info("Bot starting...")
-    logging.info(TOKEN)
     bot.run(TOKEN)
+
+
+if __name__ == "__main__":
+    main()
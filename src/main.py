@@ -0,0 +1,14 @@
+"""
+Starts the bot: ``python main.py`` (from inside src/).
+
+Chart render workers are spawned processes that import the main module again,
+so this module only imports the bot when it is run, not when a worker imports it.
+"""
+
+if __name__ == "__main__":
+    try:
+        from .app import main
+    except ImportError:  # Started as a script from inside src/ (see Dockerfile)
+        from app import main
+
+    main()
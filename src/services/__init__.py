@@ -0,0 +1 @@
+"""Shared building blocks used by the Discord commands in ``app.py``."""
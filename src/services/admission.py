@@ -0,0 +1,163 @@
+import os
+import time
+
+from .state import BoundedMap
+
+
+class Limit:
+    """Concurrency cap and token bucket (``rate`` per minute, ``burst`` at once) of one scope."""
+
+    __slots__ = ("concurrency", "rate", "burst")
+
+    def __init__(self, concurrency, rate, burst):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+
+    @classmethod
+    def from_env(cls, name, default):
+        """Reads a limit written as "concurrency,rate_per_minute,burst" (e.g. "1,6,3")."""
+        concurrency, rate, burst = os.getenv(name, default).split(",")
+        return cls(int(concurrency), float(rate), float(burst))
+
+
+class CostClass:
+    """Limits of one class of commands per user, per guild and per command."""
+
+    __slots__ = ("user", "guild", "command")
+
+    def __init__(self, user, guild, command):
+        self.user = user
+        self.guild = guild
+        self.command = command
+
+
+# Commands declare one of these classes (see admission checks in app.py)
+COST_CLASSES = {
+    # Price lookups: cheap, mostly served from caches
+    "quote": CostClass(
+        user=Limit.from_env("ADMISSION_QUOTE_USER", "2,30,10"),
+        guild=Limit.from_env("ADMISSION_QUOTE_GUILD", "10,300,60"),
+        command=Limit.from_env("ADMISSION_QUOTE_COMMAND", "50,3000,200"),
+    ),
+    # Charts: kline downloads and rendering in the process pool
+    "chart": CostClass(
+        user=Limit.from_env("ADMISSION_CHART_USER", "1,6,3"),
+        guild=Limit.from_env("ADMISSION_CHART_GUILD", "3,40,10"),
+        command=Limit.from_env("ADMISSION_CHART_COMMAND", "8,240,40"),
+    ),
+}
+# Buckets of users and guilds that were not seen for this long are forgotten (seconds)
+BUCKET_TTL = 3600
+MAX_BUCKETS = int(os.getenv("ADMISSION_MAX_BUCKETS", "100000"))
+
+
+class Busy(Exception):
+    """Raised when a command is not admitted; ``retry_after`` is in seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"busy, retry after {retry_after:.0f} s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate / 60  # Tokens per second
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def wait_time(self, now):
+        """Seconds until a token is available (0 if one is available now)."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate else float("inf")
+
+    def take(self):
+        self.tokens -= 1
+
+
+class Ticket:
+    """An admitted command; ``release`` frees its concurrency slots (idempotent)."""
+
+    __slots__ = ("_controller", "_keys")
+
+    def __init__(self, controller, keys):
+        self._controller = controller
+        self._keys = keys
+
+    def release(self):
+        keys, self._keys = self._keys, ()
+        self._controller._release(keys)
+
+
+class AdmissionController:
+    """
+    Admission control for expensive commands.
+
+    Every command of a cost class is checked against a concurrency cap and a
+    token bucket per user, per guild and per command. A command that does not
+    fit is rejected right away with Busy instead of being queued, so overload
+    never piles up work in memory.
+    """
+
+    def __init__(
+        self, classes=COST_CLASSES, max_buckets=MAX_BUCKETS, clock=time.monotonic
+    ):
+        self.classes = classes
+        self._clock = clock
+        self._running = {}  # scope key -> commands in progress
+        self._buckets = BoundedMap(max_buckets, BUCKET_TTL, clock=clock)
+        self.rejected = 0
+
+    def admit(self, cost, command, user_id, guild_id=None):
+        """Returns a Ticket for the command or raises Busy."""
+        limits = self.classes[cost]
+        scopes = [(("user", cost, user_id), limits.user)]
+        if guild_id is not None:  # Direct messages have no guild
+            scopes.append((("guild", cost, guild_id), limits.guild))
+        scopes.append((("command", command), limits.command))
+
+        for key, limit in scopes:
+            if self._running.get(key, 0) >= limit.concurrency:
+                self.rejected += 1
+                raise Busy(1.0)
+
+        now = self._clock()
+        buckets = []
+        for key, limit in scopes:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(limit.rate, limit.burst, now)
+            self._buckets[key] = bucket  # Also renews its time-to-live
+            buckets.append(bucket)
+        wait = max(bucket.wait_time(now) for bucket in buckets)
+        if wait > 0:
+            self.rejected += 1
+            raise Busy(wait)
+
+        for bucket in buckets:
+            bucket.take()
+        keys = tuple(key for key, _ in scopes)
+        for key in keys:
+            self._running[key] = self._running.get(key, 0) + 1
+        return Ticket(self, keys)
+
+    def _release(self, keys):
+        for key in keys:
+            running = self._running.get(key, 0) - 1
+            if running > 0:
+                self._running[key] = running
+            else:
+                self._running.pop(key, None)
+
+    def running(self, *key):
+        return self._running.get(key, 0)
+
+
+# Controller shared by all commands
+controller = AdmissionController()
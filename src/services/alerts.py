@@ -0,0 +1,535 @@
+import asyncio
+import heapq
+import logging
+import os
+import sqlite3
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from . import binance_limits
+
+# Location of the alerts database
+ALERTS_DB = os.getenv("ALERTS_DB", "alerts.db")
+# Alerts are checked on every update of a price they depend on (a stream tick, a
+# command, the prefetching). Prices nothing else refreshes are fetched this often (seconds).
+ALERT_CHECK_INTERVAL = float(os.getenv("ALERT_CHECK_INTERVAL", "5"))
+# Maximum number of active alerts per user
+ALERTS_PER_USER = int(os.getenv("ALERTS_PER_USER", "25"))
+# Maximum number of alert notifications sent to Discord per second
+ALERT_NOTIFY_RATE = float(os.getenv("ALERT_NOTIFY_RATE", "5"))
+
+
+class TooManyAlerts(Exception):
+    """Raised when a user already has the maximum number of active alerts."""
+
+
+class Alert:
+    """
+    A price alert of one user.
+
+    ``above``/``below`` are the prices at which it fires. Percent-move alerts
+    have both, derived from the ``reference`` price at creation.
+    """
+
+    __slots__ = (
+        "id",
+        "user_id",
+        "channel_id",
+        "symbol",
+        "currency",
+        "above",
+        "below",
+        "percent",
+        "reference",
+    )
+
+    def __init__(
+        self,
+        id,
+        user_id,
+        channel_id,
+        symbol,
+        currency,
+        above=None,
+        below=None,
+        percent=None,
+        reference=None,
+    ):
+        self.id = id
+        self.user_id = user_id
+        self.channel_id = channel_id
+        self.symbol = sys.intern(symbol)
+        self.currency = sys.intern(currency)
+        self.above = above
+        self.below = below
+        self.percent = percent
+        self.reference = reference
+
+    def __repr__(self):
+        return f"Alert({self.id}, {self.symbol}/{self.currency}: {self})"
+
+    def __str__(self):
+        if self.percent is not None:
+            return (
+                f"{self.symbol} ±{self.percent:g}% "
+                f"(from {self.reference:,.2f} {self.currency})"
+            )
+        if self.above is not None:
+            return f"{self.symbol} > {self.above:,.2f} {self.currency}"
+        return f"{self.symbol} < {self.below:,.2f} {self.currency}"
+
+
+class ThresholdIndex:
+    """
+    Alerts of one symbol/currency ordered by their trigger prices.
+
+    A min-heap holds the "above" thresholds and a max-heap the "below" ones,
+    so a price update only looks at the alerts that actually fire:
+    O(log n) per fired alert instead of a scan over all of them. Removed alerts
+    are skipped lazily and the heaps are rebuilt once they are mostly garbage.
+    An entry only fires its alert while the alert still has that threshold, so a
+    left-over entry never fires a newer alert stored under the same id.
+    """
+
+    def __init__(self):
+        self.alerts = {}  # alert id -> Alert
+        self._above = []  # (threshold, alert id)
+        self._below = []  # (-threshold, alert id)
+        self._live_entries = 0
+
+    def __len__(self):
+        return len(self.alerts)
+
+    def add(self, alert):
+        self.alerts[alert.id] = alert
+        if alert.above is not None:
+            heapq.heappush(self._above, (alert.above, alert.id))
+            self._live_entries += 1
+        if alert.below is not None:
+            heapq.heappush(self._below, (-alert.below, alert.id))
+            self._live_entries += 1
+
+    def remove(self, alert_id):
+        alert = self.alerts.pop(alert_id, None)
+        if alert is None:
+            return
+        self._live_entries -= (alert.above is not None) + (alert.below is not None)
+        if len(self._above) + len(self._below) > 2 * self._live_entries + 64:
+            self._rebuild()
+
+    def _rebuild(self):
+        self._above = [
+            (a.above, i) for i, a in self.alerts.items() if a.above is not None
+        ]
+        self._below = [
+            (-a.below, i) for i, a in self.alerts.items() if a.below is not None
+        ]
+        heapq.heapify(self._above)
+        heapq.heapify(self._below)
+
+    def pop_triggered(self, price):
+        """Removes and returns the alerts that fire at ``price``."""
+        fired = []
+        while self._above and self._above[0][0] <= price:
+            threshold, alert_id = heapq.heappop(self._above)
+            fired.append((alert_id, "above", threshold))
+        while self._below and -self._below[0][0] >= price:
+            threshold, alert_id = heapq.heappop(self._below)
+            fired.append((alert_id, "below", -threshold))
+        triggered = []
+        for alert_id, side, threshold in fired:
+            alert = self.alerts.get(alert_id)
+            # Skip removed alerts, the other side of ± alerts and left-over entries
+            if alert is not None and getattr(alert, side) == threshold:
+                self.remove(alert_id)
+                triggered.append(alert)
+        return triggered
+
+
+class AlertEngine:
+    """
+    Active price alerts, indexed per symbol/currency and persisted in SQLite.
+
+    Alerts are checked whenever a rate their price is converted from changes
+    (``rate_updated``, wired to the quote cache and the price stream), from
+    memory and without a request. ``check`` additionally fetches the prices of
+    every indexed symbol at once, for the ones nothing else keeps fresh. Fired
+    alerts are deleted.
+
+    Database writes are queued and written in batches on a dedicated thread,
+    so adding, removing and firing alerts never blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        path=ALERTS_DB,
+        check_interval=ALERT_CHECK_INTERVAL,
+        max_per_user=ALERTS_PER_USER,
+    ):
+        self.path = path
+        self.check_interval = check_interval
+        self.max_per_user = max_per_user
+        self.loaded = False
+        self._conn = None
+        self._executor = None
+        self._next_id = 1
+        self._writes = []  # (sql, params) not written yet
+        self._flush_task = None
+        self._indexes = {}  # (symbol, currency) -> ThresholdIndex
+        self._by_user = {}  # user id -> {alert id: Alert}
+        self._task = None
+        self._quote = None  # quote(symbol, currency) -> (price or None, rate keys)
+        self._notify = None
+        self._watched = {}  # rate key -> alert keys (symbol, currency) priced with it
+        self._dirty = set()  # Alert keys waiting to be checked
+
+    def __len__(self):
+        return sum(len(index) for index in self._indexes.values())
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS alerts ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, channel_id INTEGER, "
+                "symbol TEXT, currency TEXT, above REAL, below REAL, "
+                "percent REAL, reference REAL)"
+            )
+        return self._conn
+
+    def load(self):
+        """Loads the alerts stored by previous runs (once)."""
+        if self.loaded:
+            return
+        self.loaded = True
+        if self.path != ":memory:" and not os.path.exists(self.path):
+            return  # Nothing stored yet, the database is created with the first alert
+        conn = self._connection()
+        rows = conn.execute(
+            "SELECT id, user_id, channel_id, symbol, currency, above, below, "
+            "percent, reference FROM alerts"
+        )
+        last_id = 0
+        for row in rows:
+            self._index(Alert(*row))
+            last_id = max(last_id, row[0])
+        # Ids are assigned here; the sequence keeps the ids of deleted alerts from
+        # being reused (databases created before AUTOINCREMENT have none)
+        try:
+            seq = conn.execute(
+                "SELECT MAX(seq) FROM sqlite_sequence WHERE name = 'alerts'"
+            ).fetchone()[0]
+        except sqlite3.OperationalError:
+            seq = None
+        self._next_id = max(last_id, seq or 0) + 1
+
+    def _index(self, alert):
+        key = (alert.symbol, alert.currency)
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = ThresholdIndex()
+            self._watch(key)
+        index.add(alert)
+        self._by_user.setdefault(alert.user_id, {})[alert.id] = alert
+
+    def _unindex(self, alert):
+        key = (alert.symbol, alert.currency)
+        index = self._indexes.get(key)
+        if index is not None:
+            index.remove(alert.id)
+            if not index:
+                del self._indexes[key]
+        user_alerts = self._by_user.get(alert.user_id)
+        if user_alerts is not None:
+            user_alerts.pop(alert.id, None)
+            if not user_alerts:
+                del self._by_user[alert.user_id]
+
+    # -- Writing -------------------------------------------------------------
+
+    def _write_later(self, sql, params):
+        self._writes.append((sql, params))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No event loop (a script or a test): written by flush_sync/close
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self.flush())
+
+    def _write(self, writes):
+        conn = self._connection()
+        with conn:
+            for sql, params in writes:
+                conn.execute(sql, params)
+
+    async def flush(self):
+        """Writes the queued changes on the database thread."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="alerts"
+            )
+        loop = asyncio.get_running_loop()
+        while self._writes:
+            writes, self._writes = self._writes, []
+            try:
+                await loop.run_in_executor(self._executor, self._write, writes)
+            except asyncio.CancelledError:
+                # Written again by flush_sync (the statements are idempotent),
+                # unless close() already wrote them
+                if self._flush_task is asyncio.current_task():
+                    self._writes[:0] = writes
+                raise
+            except Exception:
+                logging.exception(f"Failed to store {len(writes)} alert changes")
+
+    def flush_sync(self):
+        """Writes the queued changes right away (at exit, without an event loop)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        writes, self._writes = self._writes, []
+        if writes:
+            self._write(writes)
+
+    # -- Managing alerts -----------------------------------------------------
+
+    def add(
+        self,
+        user_id,
+        channel_id,
+        symbol,
+        currency,
+        above=None,
+        below=None,
+        percent=None,
+        reference=None,
+    ):
+        """Stores a new alert and returns it. Raises TooManyAlerts over the per-user limit."""
+        self.load()
+        if len(self._by_user.get(user_id, ())) >= self.max_per_user:
+            raise TooManyAlerts(self.max_per_user)
+        alert = Alert(
+            self._next_id,
+            user_id,
+            channel_id,
+            symbol,
+            currency,
+            above,
+            below,
+            percent,
+            reference,
+        )
+        self._next_id += 1
+        self._write_later(
+            "INSERT OR REPLACE INTO alerts (id, user_id, channel_id, symbol, currency, above, "
+            "below, percent, reference) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                alert.id,
+                user_id,
+                channel_id,
+                symbol,
+                currency,
+                above,
+                below,
+                percent,
+                reference,
+            ),
+        )
+        self._index(alert)
+        return alert
+
+    def remove(self, user_id, alert_id):
+        """Deletes one of the user's alerts. Returns the alert, or None if there is none."""
+        alert = self._by_user.get(user_id, {}).get(alert_id)
+        if alert is None:
+            return None
+        self._unindex(alert)
+        self._write_later("DELETE FROM alerts WHERE id = ?", (alert_id,))
+        return alert
+
+    def for_user(self, user_id):
+        """Returns the user's active alerts, oldest first."""
+        return sorted(self._by_user.get(user_id, {}).values(), key=lambda a: a.id)
+
+    def keys(self):
+        """The (symbol, currency) pairs with at least one active alert."""
+        return list(self._indexes)
+
+    # -- Evaluation ----------------------------------------------------------
+
+    def update(self, symbol, currency, price):
+        """
+        Applies a price update. Returns the fired alerts, which are removed
+        from the engine and the database.
+        """
+        index = self._indexes.get((symbol, currency))
+        if index is None:
+            return []
+        fired = index.pop_triggered(price)
+        for alert in fired:
+            self._unindex(alert)
+            self._write_later("DELETE FROM alerts WHERE id = ?", (alert.id,))
+        return fired
+
+    def _watch(self, key):
+        """Remembers which rates the price of an alert key is converted from."""
+        if self._quote is None:
+            return
+        try:
+            _, rate_keys = self._quote(*key)
+        except Exception:
+            return  # Checked by the periodic fetch only
+        for rate_key in rate_keys:
+            self._watched.setdefault(rate_key, set()).add(key)
+
+    def rate_updated(self, rate_key):
+        """
+        Called with the key of every updated rate (e.g. ("ticker", "BTCUSDT")):
+        the alerts priced with it are checked on the next loop iteration, once
+        for all the rates updated meanwhile.
+        """
+        keys = self._watched.get(rate_key)
+        if not keys:
+            return
+        if not self._dirty:
+            asyncio.get_running_loop().call_soon(self._check_dirty)
+        self._dirty |= keys
+
+    def _check_dirty(self):
+        dirty, self._dirty = self._dirty, set()
+        if self._quote is None:
+            return
+        fired = []
+        for key in dirty:
+            if key not in self._indexes:
+                continue
+            try:
+                price, _ = self._quote(*key)
+            except Exception:
+                continue
+            if price is not None:
+                fired.extend((alert, price) for alert in self.update(*key, price))
+        if fired:
+            self._notify(fired)
+
+    async def check(self, fetch_prices, notify):
+        """
+        Fetches the prices of all symbols with alerts (``fetch_prices`` takes a list
+        of (symbol, currency) keys and returns a dict key -> price) and passes the
+        fired alerts, as (alert, price) pairs, to ``notify``.
+        """
+        keys = self.keys()
+        if not keys:
+            return []
+        prices = await fetch_prices(keys)
+        fired = []
+        for (symbol, currency), price in prices.items():
+            fired.extend(
+                (alert, price) for alert in self.update(symbol, currency, price)
+            )
+        if fired:
+            notify(fired)
+        return fired
+
+    def start(self, fetch_prices, notify, quote):
+        """
+        Starts checking the alerts (idempotent): on every ``rate_updated``, pricing
+        them from memory with ``quote(symbol, currency)`` -> (price or None, rate
+        keys), and periodically with ``fetch_prices``.
+        """
+        self._quote = quote
+        self._notify = notify
+        self._rewatch()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(
+                self._run(fetch_prices, notify)
+            )
+
+    def _rewatch(self):
+        # Conversion paths change with the Binance symbol and currency lists
+        self._watched = {}
+        for key in self._indexes:
+            self._watch(key)
+
+    async def _run(self, fetch_prices, notify):
+        binance_limits.priority.set(binance_limits.BACKGROUND)
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                self._rewatch()
+                await self.check(fetch_prices, notify)
+            except Exception:
+                logging.exception("Failed to check price alerts")
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._flush_task = None
+        self.flush_sync()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._indexes.clear()
+        self._by_user.clear()
+        self._watched.clear()
+        self._dirty.clear()
+        self._quote = self._notify = None
+        self._next_id = 1
+        self.loaded = False
+
+
+class Notifier:
+    """
+    Rate-limited delivery of fired alerts.
+
+    Alerts are grouped per (user, channel), so a user whose alerts fire together
+    gets one message, and messages are sent at most ``rate`` times per second
+    to stay within Discord's limits.
+    """
+
+    def __init__(self, send, rate=ALERT_NOTIFY_RATE):
+        self._send = send  # async send(user_id, channel_id, [(alert, price), ...])
+        self.interval = 1 / rate
+        self._pending = OrderedDict()  # (user id, channel id) -> [(alert, price)]
+        self._wakeup = None  # asyncio.Event, created in start() on the bot's loop
+        self._task = None
+        self.sent = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def notify(self, fired):
+        for alert, price in fired:
+            key = (alert.user_id, alert.channel_id)
+            self._pending.setdefault(key, []).append((alert, price))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self):
+        """Starts the delivery task (idempotent)."""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            if self._pending:
+                self._wakeup.set()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                (user_id, channel_id), batch = self._pending.popitem(last=False)
+                try:
+                    await self._send(user_id, channel_id, batch)
+                    self.sent += 1
+                except Exception:
+                    logging.exception(f"Failed to deliver alerts to user {user_id}")
+                await asyncio.sleep(self.interval)
+
+
+# Alerts of all users (loaded in on_ready)
+engine = AlertEngine()
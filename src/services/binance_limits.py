@@ -0,0 +1,200 @@
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import json
+import logging
+import os
+import time
+from urllib.parse import parse_qs, urlsplit
+
+# Request weight Binance allows per minute and IP (the real limit is 6000, keep a margin)
+BINANCE_WEIGHT_LIMIT = int(os.getenv("BINANCE_WEIGHT_LIMIT", "5000"))
+# Longest time (seconds) a user command waits for weight before it is rejected
+BINANCE_MAX_QUEUE_WAIT = float(os.getenv("BINANCE_MAX_QUEUE_WAIT", "5"))
+
+# Priorities, lower goes first. Lower priorities may only use part of the budget,
+# so there is always weight left for user commands.
+INTERACTIVE = 0  # User commands (!price, !chart)
+BULK = 1  # Multi-page history downloads
+BACKGROUND = 2  # Prefetching and alert checks
+BUDGET_SHARE = {INTERACTIVE: 1.0, BULK: 0.8, BACKGROUND: 0.5}
+MAX_WAIT = {
+    INTERACTIVE: BINANCE_MAX_QUEUE_WAIT,
+    BULK: BINANCE_MAX_QUEUE_WAIT,
+    BACKGROUND: 0,  # Background work is shed instead of queued
+}
+
+# Priority of the Binance requests made by the current task
+priority = contextvars.ContextVar("binance_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def use_priority(value):
+    """Runs the enclosed Binance requests (and tasks started there) with ``value``."""
+    token = priority.set(value)
+    try:
+        yield
+    finally:
+        priority.reset(token)
+
+
+class RateLimited(Exception):
+    """Raised instead of sending a request that would exceed the Binance weight budget."""
+
+    def __init__(self, retry_after):
+        super().__init__(
+            f"Binance request limit reached, try again in {max(1, round(retry_after))} s"
+        )
+        self.retry_after = retry_after
+
+
+def request_weight(url, params=None):
+    """Weight of a Binance REST request, following the Binance API documentation."""
+    parts = urlsplit(url)
+    query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+    query.update(params or {})
+    path = parts.path
+    if path.endswith("/klines"):
+        limit = int(query.get("limit", 500))
+        if limit < 100:
+            return 1
+        if limit < 500:
+            return 2
+        if limit <= 1000:
+            return 5
+        return 10
+    if path.endswith("/ticker/price"):
+        if "symbol" in query:
+            return 2
+        # Batches are charged by their size; leaving out ``symbols`` asks for all pairs
+        batch = json.loads(query["symbols"]) if "symbols" in query else None
+        if batch is not None and len(batch) <= 20:
+            return 4
+        if batch is not None and len(batch) <= 100:
+            return 40
+        return 80
+    if path.endswith("/exchangeInfo"):
+        return 20
+    return 2
+
+
+class WeightLimiter:
+    """
+    Client-side view of the Binance per-minute request weight.
+
+    Weight is reserved before a request is sent and corrected with the
+    ``X-MBX-USED-WEIGHT-1M`` header of every response. Requests that do not fit
+    wait for the next minute in priority order (user commands first) or are
+    rejected with RateLimited; after a 429/418 nothing is sent until Retry-After.
+    """
+
+    def __init__(self, limit=BINANCE_WEIGHT_LIMIT, clock=time.time):
+        self.limit = limit
+        self._clock = clock
+        self.used = 0
+        self._window = self._current_window()
+        self._banned_until = 0.0
+        self._waiters = []  # (priority, seq, weight, deadline, future)
+        self._seq = itertools.count()
+        self._drain_handle = None
+        self.shed = 0
+
+    def _current_window(self):
+        return int(self._clock() // 60)
+
+    def _roll(self):
+        window = self._current_window()
+        if window != self._window:
+            self._window = window
+            self.used = 0
+
+    def _fits(self, weight, prio):
+        return self.used + weight <= self.limit * BUDGET_SHARE[prio]
+
+    def _next_window_in(self):
+        return (self._window + 1) * 60 - self._clock()
+
+    async def acquire(self, weight, prio=None):
+        """Reserves ``weight``, waiting for the next minute if needed and allowed."""
+        prio = priority.get() if prio is None else prio
+        self._roll()
+        now = self._clock()
+        if self._banned_until > now:
+            self.shed += 1
+            raise RateLimited(self._banned_until - now)
+        if not any(w[0] <= prio for w in self._waiters) and self._fits(weight, prio):
+            self.used += weight
+            return
+        wait = self._next_window_in()
+        if wait > MAX_WAIT[prio]:
+            self.shed += 1
+            raise RateLimited(wait)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._waiters,
+            (prio, next(self._seq), weight, now + MAX_WAIT[prio], future),
+        )
+        self._schedule_drain()
+        await future
+
+    def _schedule_drain(self):
+        if self._drain_handle is None:
+            delay = max(0.0, self._next_window_in(), self._banned_until - self._clock())
+            self._drain_handle = asyncio.get_running_loop().call_later(
+                delay, self._drain
+            )
+
+    def _drain(self):
+        """Admits queued requests in priority order once a new minute started."""
+        self._drain_handle = None
+        self._roll()
+        if self._banned_until > self._clock():
+            self._schedule_drain()
+            return
+        while self._waiters:
+            prio, _, weight, _, future = self._waiters[0]
+            if not self._fits(weight, prio):
+                break
+            heapq.heappop(self._waiters)
+            if not future.done():
+                self.used += weight
+                future.set_result(None)
+        remaining = []
+        for waiter in self._waiters:
+            if waiter[3] <= self._clock() and not waiter[4].done():
+                self.shed += 1
+                waiter[4].set_exception(RateLimited(self._next_window_in()))
+            elif not waiter[4].done():
+                remaining.append(waiter)
+        heapq.heapify(remaining)
+        self._waiters = remaining
+        if self._waiters:
+            self._schedule_drain()
+
+    def update(self, status, headers):
+        """Applies the weight and ban information of a Binance response."""
+        self._roll()
+        used = headers.get("X-MBX-USED-WEIGHT-1M")
+        if used is not None:
+            try:
+                self.used = int(used)
+            except ValueError:
+                pass
+        if status in (418, 429):
+            retry_after = float(headers.get("Retry-After", 60))
+            self._banned_until = max(self._banned_until, self._clock() + retry_after)
+            logging.warning(f"Binance answered {status}, pausing for {retry_after} s")
+
+    def stats(self):
+        return {
+            "used": self.used,
+            "limit": self.limit,
+            "queued": len(self._waiters),
+            "shed": self.shed,
+        }
+
+
+# Limiter shared by all Binance requests of the bot
+limiter = WeightLimiter()
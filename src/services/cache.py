@@ -0,0 +1,256 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from .cache_backend import cache_key
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time: callers arriving while a call for
+    the same key is running wait for its result (or error) instead.
+
+    The call runs in its own task, so a caller that is cancelled (a timeout, a
+    closed connection) only stops waiting; the others still get the result. The
+    call itself is cancelled when no caller waits for it anymore.
+    """
+
+    def __init__(self):
+        # key -> [task of the running call, number of waiting callers]
+        self._inflight = {}
+
+    def __contains__(self, key):
+        return key in self._inflight
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def run(self, key, call):
+        flight = self._inflight.get(key)
+        if flight is None:
+            task = asyncio.get_running_loop().create_task(call())
+            flight = self._inflight[key] = [task, 0]
+            task.add_done_callback(lambda _: self._forget(key, flight))
+        task = flight[0]
+        flight[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            flight[1] -= 1
+            if flight[1] == 0 and not task.done():
+                task.cancel()
+                # The cancelled task only finishes later; callers arriving in the
+                # meantime start a new call instead of joining it
+                self._forget(key, flight)
+
+    def _forget(self, key, flight):
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+
+class QuoteCache:
+    """
+    In-process TTL cache with LRU eviction and single-flight request coalescing.
+
+    Each entry carries its own expiry, so different sources (Binance ticks,
+    Frankfurter rates) can be cached with different TTLs in one structure.
+    Concurrent misses for the same key wait on a single upstream fetch.
+
+    With a shared ``backend`` (see cache_backend.py) this cache is the first
+    level: misses are looked up in the shared tier, only one process fetches
+    a missing key, and values set here are written through to the tier.
+    """
+
+    def __init__(self, max_entries=4096, clock=time.monotonic, backend=None):
+        self.max_entries = max_entries
+        self._clock = clock
+        self.backend = backend
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._flights = SingleFlight()
+        self._writes = set()  # Write-through tasks still running
+        self.listeners = []  # Called with the key of every stored value
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.shared_hits = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > self._clock()
+
+    def get(self, key, default=None):
+        """Returns a fresh cached value (counting a hit) or ``default``."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl):
+        self._store(key, value, ttl)
+        if self.backend is not None:
+            task = asyncio.get_running_loop().create_task(
+                self.backend.set(cache_key(*key), value, ttl)
+            )
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+
+    def _store(self, key, value, ttl):
+        self._entries[key] = (self._clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        for listener in self.listeners:
+            listener(key)
+
+    async def get_shared(self, keys):
+        """
+        Looks keys missing here up in the shared tier.
+        Returns a dict key -> value of the keys found (empty without a shared tier).
+        """
+        if self.backend is None or not keys:
+            return {}
+        entries = await asyncio.gather(
+            *(self.backend.get_entry(cache_key(*key)) for key in keys)
+        )
+        found = {}
+        for key, entry in zip(keys, entries):
+            if entry is not None:
+                value, ttl = entry
+                self._store(key, value, ttl)
+                found[key] = value
+        self.shared_hits += len(found)
+        return found
+
+    def expires_in(self, key):
+        """Seconds until the entry for ``key`` expires (None if not cached)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return entry[0] - self._clock()
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = self.coalesced = 0
+
+    async def get_or_fetch(self, key, ttl, fetch):
+        """
+        Returns the cached value for ``key`` or awaits ``fetch()`` to produce it.
+
+        If a fetch for the same key is already running, the caller waits for its
+        result instead of starting another upstream request. Errors are not cached.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is not sentinel:
+            return value
+
+        if key in self._flights:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+
+        async def fetch_and_store():
+            if self.backend is None:
+                value = await fetch()
+                self._store(key, value, ttl)
+                return value
+            # Only one process fetches the key, the others get its result
+            value, ttl_left = await self.backend.get_or_fetch(
+                cache_key(*key), ttl, fetch
+            )
+            self._store(key, value, ttl_left)
+            return value
+
+        return await self._flights.run(key, fetch_and_store)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "shared_hits": self.shared_hits,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+class ByteLRUCache:
+    """
+    LRU cache of binary blobs (e.g. rendered PNG charts) limited by total size in bytes.
+
+    Every entry has an absolute expiry time (wall clock, seconds); expired entries
+    are dropped on access.
+    """
+
+    def __init__(self, max_bytes, clock=time.time):
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Whether a fresh entry exists (without counting a hit or miss)."""
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > self._clock()
+
+    @property
+    def memory_usage(self):
+        """Total size of the cached values in bytes."""
+        return self._size
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= self._clock():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value, expires_at):
+        if key in self._entries:
+            self._remove(key)
+        if len(value) > self.max_bytes:
+            return
+        self._entries[key] = (expires_at, value)
+        self._size += len(value)
+        while self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        _, value = self._entries.pop(key)
+        self._size -= len(value)
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
+        self.hits = self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,177 @@
+import abc
+import asyncio
+import contextlib
+import logging
+import os
+import pickle
+import time
+import uuid
+
+# Cache tier shared by all bot processes: "memory" (each process caches on its own)
+# or "redis" (quotes, kline pages and charts are shared through REDIS_URL)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "cryptobot:")
+# How long a process may hold the fetch lock of a key (seconds)
+LOCK_TIMEOUT = float(os.getenv("CACHE_LOCK_TIMEOUT", "15"))
+LOCK_POLL_INTERVAL = 0.05
+
+
+class CacheBackend(abc.ABC):
+    """
+    Interface of a cache tier shared between processes.
+
+    Values are stored with a time-to-live; ``get_or_fetch`` runs ``fetch`` in
+    only one process at a time per key (the others wait for its result).
+    """
+
+    @abc.abstractmethod
+    async def get_entry(self, key):
+        """Returns ``(value, seconds_left)`` or None when the key is not cached."""
+
+    @abc.abstractmethod
+    async def set(self, key, value, ttl):
+        """Stores ``value`` for ``ttl`` seconds."""
+
+    @abc.abstractmethod
+    def lock(self, key):
+        """Async context manager held while one process fetches ``key``."""
+
+    async def close(self):
+        pass
+
+    async def get_or_fetch(self, key, ttl, fetch):
+        """Returns ``(value, seconds_left)``, fetching the value in one process only."""
+        entry = await self.get_entry(key)
+        if entry is not None:
+            return entry
+        async with self.lock(key):
+            # Another process may have stored it while we were waiting for the lock
+            entry = await self.get_entry(key)
+            if entry is not None:
+                return entry
+            value = await fetch()
+            await self.set(key, value, ttl)
+            return value, ttl
+
+
+class MemoryBackend(CacheBackend):
+    """In-process implementation (useful to share one tier between objects, e.g. in tests)."""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._entries = {}  # key -> (expires_at, value)
+        self._locks = {}  # key -> [asyncio.Lock, number of users]
+
+    async def get_entry(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        left = entry[0] - self._clock()
+        if left <= 0:
+            del self._entries[key]
+            return None
+        return entry[1], left
+
+    async def set(self, key, value, ttl):
+        if ttl > 0:
+            self._entries[key] = (self._clock() + ttl, value)
+
+    @contextlib.asynccontextmanager
+    async def lock(self, key):
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+
+class RedisBackend(CacheBackend):
+    """
+    Redis implementation. Values are pickled (the Redis instance must be private
+    to the bot) and locks are ``SET NX PX`` keys released only by their owner.
+    """
+
+    # Deletes the lock only if it still holds our token (it may have expired meanwhile)
+    RELEASE_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) else return 0 end"
+    )
+
+    def __init__(
+        self, url=REDIS_URL, prefix=CACHE_KEY_PREFIX, lock_timeout=LOCK_TIMEOUT
+    ):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "CACHE_BACKEND=redis needs the redis package (pip install redis)"
+            ) from e
+        self._redis = redis.from_url(url)
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+
+    async def get_entry(self, key):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.get(self.prefix + key)
+            pipe.pttl(self.prefix + key)
+            data, pttl = await pipe.execute()
+        if data is None:
+            return None
+        return pickle.loads(data), max(pttl, 0) / 1000
+
+    async def set(self, key, value, ttl):
+        if ttl > 0:
+            await self._redis.set(
+                self.prefix + key, pickle.dumps(value), px=max(1, int(ttl * 1000))
+            )
+
+    @contextlib.asynccontextmanager
+    async def lock(self, key):
+        lock_key = f"{self.prefix}lock:{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout
+        acquired = False
+        while not acquired:
+            acquired = await self._redis.set(
+                lock_key, token, nx=True, px=int(self.lock_timeout * 1000)
+            )
+            if acquired:
+                break
+            if time.monotonic() >= deadline:
+                # The holder is too slow or gone, fetch without the lock
+                logging.warning(f"Cache lock for {key} timed out")
+                break
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            if await self._redis.exists(self.prefix + key):
+                break  # The holder stored the value, get_or_fetch reads it again
+        try:
+            yield
+        finally:
+            if acquired:
+                await self._redis.eval(self.RELEASE_SCRIPT, 1, lock_key, token)
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+def create_backend(name=CACHE_BACKEND):
+    """Returns the configured shared cache tier, or None for in-process caching only."""
+    if name == "memory":
+        return None
+    if name == "redis":
+        return RedisBackend()
+    raise ValueError(f"Unknown CACHE_BACKEND: {name}")
+
+
+def cache_key(*parts):
+    """Turns a tuple key into a string key of the shared tier."""
+    return ":".join(str(part) for part in parts)
+
+
+# Shared tier of this process (None unless CACHE_BACKEND selects one)
+shared = create_backend()
@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import binance_limits, cache_backend, http_client
+from .intervals import candle_bounds, interval_ms
+
+# Location of the local candle database
+CANDLE_DB = os.getenv("CANDLE_DB", "candles.db")
+# Maximum number of klines Binance returns for a single request
+KLINES_PAGE_LIMIT = 1000
+# Maximum number of kline pages downloaded at the same time for one series
+KLINES_FETCH_CONCURRENCY = int(os.getenv("KLINES_FETCH_CONCURRENCY", "4"))
+# Lifetime of kline pages in the shared cache tier (seconds)
+CLOSED_PAGE_TTL = 24 * 60 * 60
+OPEN_PAGE_TTL = 5
+# Number of candles kept per pair and interval; older ones are deleted, so fine
+# intervals do not grow the database without bound. Charts never ask for more than
+# MAX_CHART_CANDLES (20000), so by default every chart window is served from disk.
+# CANDLE_RETENTION overrides it per interval, e.g. "1s=3600,1m=10080".
+DEFAULT_RETENTION = 20000
+
+
+def parse_retention(spec):
+    """Parses "interval=candles,..." into a dict."""
+    retention = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        interval, _, candles = item.partition("=")
+        interval_ms(interval.strip())  # Rejects unknown intervals
+        retention[interval.strip()] = int(candles)
+    return retention
+
+
+CANDLE_RETENTION = parse_retention(os.getenv("CANDLE_RETENTION", ""))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS klines (
+    pair TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    open_time INTEGER NOT NULL,
+    open REAL NOT NULL,
+    high REAL NOT NULL,
+    low REAL NOT NULL,
+    close REAL NOT NULL,
+    volume REAL NOT NULL,
+    close_time INTEGER NOT NULL,
+    PRIMARY KEY (pair, interval, open_time)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS history (
+    pair TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    PRIMARY KEY (pair, interval)
+) WITHOUT ROWID;
+"""
+
+
+async def fetch_klines(pair, interval, start_ms, end_ms, limit=KLINES_PAGE_LIMIT):
+    """Downloads one page of klines (at most KLINES_PAGE_LIMIT) from Binance."""
+    params = {
+        "symbol": pair,
+        "interval": interval,
+        "startTime": start_ms,
+        "endTime": end_ms,
+        "limit": limit,
+    }
+
+    async def download():
+        return await http_client.get_json(
+            f"{http_client.BINANCE_API}/klines", params=params
+        )
+
+    if cache_backend.shared is None:
+        return await download()
+    # With a shared cache tier the bot processes download every page only once:
+    # pages of closed candles never change, a page with the open candle changes constantly
+    current_open, _ = candle_bounds(interval, int(time.time() * 1000))
+    ttl = CLOSED_PAGE_TTL if end_ms < current_open else OPEN_PAGE_TTL
+    klines, _ = await cache_backend.shared.get_or_fetch(
+        cache_backend.cache_key("klines", pair, interval, start_ms, end_ms, limit),
+        ttl,
+        download,
+    )
+    return klines
+
+
+async def fetch_klines_range(
+    pair, interval, start_ms, end_ms, concurrency=KLINES_FETCH_CONCURRENCY
+):
+    """
+    Downloads all klines opened between start_ms and end_ms (inclusive).
+
+    The range is split into startTime/endTime pages of KLINES_PAGE_LIMIT candles,
+    which are fetched concurrently (at most ``concurrency`` at once) and stitched
+    into one series ordered by open time, without duplicates.
+    Downloads of more than one page run with the (lower) bulk priority.
+    """
+    step = interval_ms(interval)
+    page_span = KLINES_PAGE_LIMIT * step
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_page(page_start):
+        page_end = min(page_start + page_span - 1, end_ms)
+        # Binance charges more weight for larger limits, so ask only for what fits
+        # in the page (one extra, as month lengths are approximated)
+        limit = min(KLINES_PAGE_LIMIT, (page_end - page_start) // step + 2)
+        async with semaphore:
+            return await fetch_klines(pair, interval, page_start, page_end, limit)
+
+    page_starts = range(start_ms, end_ms + 1, page_span)
+    prio = (
+        binance_limits.BULK if len(page_starts) > 1 else binance_limits.priority.get()
+    )
+    with binance_limits.use_priority(prio):
+        pages = await asyncio.gather(
+            *(fetch_page(page_start) for page_start in page_starts)
+        )
+    by_open_time = {}
+    for page in pages:
+        for kline in page:
+            by_open_time[int(kline[0])] = kline
+    return [by_open_time[open_time] for open_time in sorted(by_open_time)]
+
+
+class CandleStore:
+    """
+    Persistent OHLCV candle store on SQLite, keyed by (pair, interval).
+
+    A request only downloads the candles newer than the last stored one
+    (the last candle is re-fetched as it may still have been open) and
+    the requested window is then served from disk. All database work runs
+    on one dedicated thread, so the event loop is never blocked.
+
+    Only the last ``retention`` candles of an interval are kept. The earliest
+    open time already downloaded is stored too, so older candles Binance does not
+    have (a pair listed later) are not asked for again, even after a restart.
+    """
+
+    def __init__(self, path=CANDLE_DB, retention=None):
+        self.path = path
+        self.retention = {**CANDLE_RETENTION, **(retention or {})}
+        self._conn = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="candles")
+        self._locks = {}  # (pair, interval) -> asyncio.Lock
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _bounds(self, pair, interval):
+        """(first, last) stored open time and the start of the downloaded history."""
+        conn = self._connection()
+        first, last = conn.execute(
+            "SELECT MIN(open_time), MAX(open_time) FROM klines WHERE pair = ? AND interval = ?",
+            (pair, interval),
+        ).fetchone()
+        row = conn.execute(
+            "SELECT start FROM history WHERE pair = ? AND interval = ?",
+            (pair, interval),
+        ).fetchone()
+        return first, last, row[0] if row is not None else None
+
+    def _save(self, pair, interval, pages, history_start, keep_from):
+        """Stores downloaded klines and drops the candles opened before ``keep_from``."""
+        conn = self._connection()
+        with conn:
+            for klines in pages:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO klines VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (pair, interval, int(k[0]), float(k[1]), float(k[2]))
+                        + (float(k[3]), float(k[4]), float(k[5]), int(k[6]))
+                        for k in klines
+                    ],
+                )
+            conn.execute(
+                "DELETE FROM klines WHERE pair = ? AND interval = ? AND open_time < ?",
+                (pair, interval, keep_from),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO history VALUES (?, ?, ?)",
+                (pair, interval, max(history_start, keep_from)),
+            )
+
+    def _window(self, pair, interval, start_ms):
+        rows = (
+            self._connection()
+            .execute(
+                "SELECT open_time, open, high, low, close, volume, close_time FROM klines "
+                "WHERE pair = ? AND interval = ? AND open_time >= ? ORDER BY open_time",
+                (pair, interval, start_ms),
+            )
+            .fetchall()
+        )
+        return [list(row) for row in rows]
+
+    async def get_klines(self, pair, interval, limit, now_ms=None):
+        """
+        Returns the last ``limit`` klines of a pair (Binance kline format:
+        [open_time, open, high, low, close, volume, close_time]).
+
+        If Binance cannot be reached, the candles already stored are served instead.
+        """
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
+        current_open, _ = candle_bounds(interval, now_ms)
+        step = interval_ms(interval)
+        window_start = current_open - (limit - 1) * step
+        retention = self.retention.get(interval, DEFAULT_RETENTION)
+        # The window being served is kept even when it is longer than the retention
+        keep_from = min(window_start, current_open - (retention - 1) * step)
+
+        lock = self._locks.setdefault((pair, interval), asyncio.Lock())
+        async with lock:
+            first, last, history_start = await self._run(self._bounds, pair, interval)
+            if last is None or last < window_start:
+                ranges = [(window_start, current_open)]
+                # Stored candles older than the window would leave a gap before it,
+                # so the downloaded history starts again at the window
+                history_start = None
+                keep_from = window_start
+            else:
+                # Only the candles since the last stored one (which may still have
+                # been open) and possibly some older than the first stored one are missing
+                ranges = [(last, current_open)]
+                if history_start is None:
+                    history_start = first
+                if window_start < history_start:
+                    ranges.append((window_start, first - 1))
+            try:
+                pages = await asyncio.gather(
+                    *(
+                        fetch_klines_range(pair, interval, start, end)
+                        for start, end in ranges
+                    )
+                )
+            except Exception as e:
+                if last is None or last < window_start:
+                    raise
+                logging.warning(f"Serving stored {pair} {interval} candles: {e}")
+            else:
+                # Everything Binance has from window_start on is now stored
+                # (a pair listed later simply has no older candles to ask for again)
+                known_from = window_start
+                if history_start is not None:
+                    known_from = min(history_start, window_start)
+                await self._run(
+                    self._save, pair, interval, pages, known_from, keep_from
+                )
+            return await self._run(self._window, pair, interval, window_start)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._executor.shutdown(wait=False)
+
+
+# Candle store shared by the whole bot
+store = CandleStore()
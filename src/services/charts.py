@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .cache import ByteLRUCache
+from .render_worker import CHART_WIDTH_PX, render_png, warm_up_worker
+
+# Number of worker processes and the maximum number of charts waiting for (or in) rendering
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+RENDER_QUEUE_LIMIT = int(os.getenv("RENDER_QUEUE_LIMIT", "16"))
+# Memory budget of the rendered chart cache (bytes)
+CHART_CACHE_BYTES = int(os.getenv("CHART_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+
+class RenderQueueFull(Exception):
+    """Raised when too many charts are already waiting to be rendered."""
+
+
+class ChartRenderer:
+    """
+    Renders charts in a bounded pool of worker processes, off the event loop.
+
+    At most ``max_queue`` renders can be pending at once; further requests are
+    rejected with RenderQueueFull instead of piling up in memory.
+    """
+
+    def __init__(self, workers=RENDER_WORKERS, max_queue=RENDER_QUEUE_LIMIT):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._pending = 0
+
+    @property
+    def queue_depth(self):
+        return self._pending
+
+    def start(self):
+        if self._executor is None:
+            # "spawn" avoids forking a process that runs an event loop and threads.
+            # Spawned workers import the main module again, so the bot is started
+            # from main.py, and they only need render_worker.py.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def warm_up(self):
+        """Starts every worker process and pre-renders a tiny chart in each."""
+        executor = self.start()
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(
+            *(
+                loop.run_in_executor(executor, warm_up_worker)
+                for _ in range(self.workers)
+            )
+        )
+        logging.info(f"Chart render pool ready ({len(set(pids))} workers)")
+
+    async def render(self, dates_dt, prices, title, ylabel, kolor):
+        if self._pending >= self.max_queue:
+            raise RenderQueueFull(f"{self._pending} charts are already queued")
+        self._pending += 1
+        try:
+            executor = self.start()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                executor, render_png, dates_dt, prices, title, ylabel, kolor
+            )
+        finally:
+            self._pending -= 1
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Renderer and rendered-image cache shared by the whole bot
+renderer = ChartRenderer()
+chart_cache = ByteLRUCache(CHART_CACHE_BYTES)
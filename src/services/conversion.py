@@ -0,0 +1,291 @@
+import asyncio
+import heapq
+import logging
+
+from . import currency_registry, prefetch, quotes, stream, symbols
+
+# Every hop adds a spread and a source that can be stale. Pairs quoted in
+# something else than USDT cost a little more, so of two equally short routes
+# the one through the deepest (USDT) books wins.
+HOP_WEIGHT = 1.0
+NON_USDT_WEIGHT = 1.01
+# Tether is converted 1:1 to the US dollar, as the bot always did
+USD_PEG = ("USDT", "USD")
+
+
+class NoConversion(Exception):
+    """Raised when no chain of Binance pairs and Frankfurter rates joins two currencies."""
+
+
+class Edge:
+    """
+    One conversion step: ``source`` -> ``target`` through a Binance pair
+    (``inverse`` when its quote asset is the source), a Frankfurter rate or the
+    USDT/USD peg.
+    """
+
+    __slots__ = ("source", "target", "kind", "pair", "inverse", "weight")
+
+    def __init__(self, source, target, kind, pair=None, inverse=False, weight=0.0):
+        self.source = source
+        self.target = target
+        self.kind = kind  # "ticker", "fx" or "peg"
+        self.pair = pair
+        self.inverse = inverse
+        self.weight = weight
+
+    @property
+    def cache_key(self):
+        """The quote cache (and prefetch) key of the rate, None for the peg."""
+        if self.kind == "ticker":
+            return ("ticker", self.pair)
+        if self.kind == "fx":
+            return ("fx", self.source, self.target)
+        return None
+
+    def rate(self, missing=None):
+        """The current rate from memory (price stream or quote cache), ``missing`` when not known."""
+        if self.kind == "peg":
+            return 1.0
+        if self.kind == "ticker":
+            price = stream.feed.last_price(self.pair)
+            if price is None:
+                price = quotes.quote_cache.get(self.cache_key)
+            if price is None:
+                return missing
+            return 1 / price if self.inverse else price
+        rate = quotes.quote_cache.get(self.cache_key, missing)
+        return missing if rate is None else rate
+
+    def __repr__(self):
+        return f"Edge({self.source}->{self.target} {self.kind} {self.pair or ''})"
+
+
+class Conversion:
+    """The rate of ``source`` in ``target`` and the path it was computed along."""
+
+    __slots__ = ("source", "target", "rate", "path", "rates")
+
+    def __init__(self, source, target, path, rates):
+        self.source = source
+        self.target = target
+        self.path = path
+        self.rates = rates
+        self.rate = 1.0
+        for rate in rates:
+            self.rate *= rate
+
+    @property
+    def conversion_rate(self):
+        """
+        The rate applied after the first priced step (e.g. USD -> PLN after BTCUSDT),
+        None when the first step already gives the target.
+        """
+        priced = [(e, r) for e, r in zip(self.path, self.rates) if e.kind != "peg"]
+        if len(priced) < 2:
+            return None
+        rate = 1.0
+        for _, r in priced[1:]:
+            rate *= r
+        return rate
+
+
+class ConversionEngine:
+    """
+    Converts any symbol to any currency over a graph of Binance pairs (both
+    directions), Frankfurter rates between fiat currencies and the USDT/USD peg.
+
+    The best (cheapest, see HOP_WEIGHT) path to a target is computed once for all
+    sources with Dijkstra on the reversed graph and kept until the Binance symbol
+    list or the currency list changes; a rate update changes no path. Rates are
+    read from memory (price stream, quote cache), and the ones missing are fetched
+    together: one Binance batch and one Frankfurter request per base currency.
+
+    Without a Binance symbol list every unknown symbol is assumed to trade against USDT.
+    """
+
+    def __init__(self):
+        self._version = None
+        self._incoming = {}  # node -> edges ending in it
+        self._nodes = set()
+        self._trees = {}  # target -> {node: next edge towards the target}
+
+    # -- Graph -----------------------------------------------------------------
+
+    def _graph_version(self):
+        index, registry = symbols.index, currency_registry.registry
+        return (id(index), index.version, id(registry), registry.version)
+
+    def _build(self):
+        incoming = {}
+        registry = currency_registry.registry
+
+        def add(edge):
+            incoming.setdefault(edge.target, []).append(edge)
+
+        for pair, base, quote in symbols.index.pairs():
+            weight = HOP_WEIGHT if quote == "USDT" else NON_USDT_WEIGHT
+            add(Edge(base, quote, "ticker", pair, weight=weight))
+            add(Edge(quote, base, "ticker", pair, inverse=True, weight=weight))
+        fiat = [code for code in registry.codes() if registry.is_fiat(code)]
+        for base in fiat:
+            for target in fiat:
+                if base != target:
+                    add(Edge(base, target, "fx", weight=HOP_WEIGHT))
+        add(Edge(*USD_PEG, "peg"))
+        add(Edge(*reversed(USD_PEG), "peg"))
+
+        self._incoming = incoming
+        self._nodes = {e.source for edges in incoming.values() for e in edges}
+        self._nodes.update(incoming)
+        self._trees = {}
+
+    def _tree(self, target):
+        version = self._graph_version()
+        if version != self._version:
+            self._build()
+            self._version = version
+        tree = self._trees.get(target)
+        if tree is None:
+            tree = self._trees[target] = self._shortest_paths(target)
+        return tree
+
+    def _shortest_paths(self, target):
+        """Dijkstra from ``target`` over reversed edges: node -> first edge of its best path."""
+        best = {target: 0.0}
+        tree = {}
+        heap = [(0.0, target)]
+        while heap:
+            cost, node = heapq.heappop(heap)
+            if cost > best[node]:
+                continue
+            for edge in self._incoming.get(node, ()):
+                candidate = cost + edge.weight
+                if candidate < best.get(edge.source, float("inf")):
+                    best[edge.source] = candidate
+                    tree[edge.source] = edge
+                    heapq.heappush(heap, (candidate, edge.source))
+        return tree
+
+    def precompute(self, targets):
+        """Computes the paths to ``targets`` ahead of the first conversion."""
+        for target in targets:
+            self._tree(target)
+
+    def path(self, source, target):
+        """
+        The edges of the best path from ``source`` to ``target``. Raises UnknownSymbol
+        for a symbol Binance does not list and NoConversion when no path exists.
+        """
+        if source == target:
+            return []
+        tree = self._tree(target)
+        if source not in tree and source not in self._nodes:
+            if symbols.index.ready:
+                raise symbols.index.unknown(source)
+            # No symbol list yet: assume the USDT pair exists, as Binance usually has one
+            first = Edge(source, "USDT", "ticker", source + "USDT", weight=HOP_WEIGHT)
+            return [first, *self.path("USDT", target)]
+        path = []
+        node = source
+        while node != target:
+            edge = tree.get(node)
+            if edge is None:
+                raise NoConversion(f"no conversion from {source} to {target}")
+            path.append(edge)
+            node = edge.target
+        return path
+
+    # -- Conversions -----------------------------------------------------------
+
+    def convert_cached(self, source, target):
+        """The Conversion from memory, or None when a rate on the path is not cached."""
+        path = self.path(source, target)
+        rates = [edge.rate() for edge in path]
+        if None in rates:
+            return None
+        return Conversion(source, target, path, rates)
+
+    async def convert(self, source, target, record=True):
+        """The Conversion of ``source`` to ``target``; raises when it is not possible."""
+        result = (await self.convert_many([(source, target)], record))[source, target]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def convert_many(self, conversions, record=True):
+        """
+        Converts a list of (source, target) pairs, fetching all missing rates at once.
+
+        Returns a dict (source, target) -> Conversion, or the exception explaining
+        why that pair could not be converted. With ``record`` the rates used count as
+        demand for the prefetch scheduler.
+        """
+        results = {}
+        paths = {}
+        for key in dict.fromkeys(conversions):
+            try:
+                paths[key] = self.path(*key)
+            except Exception as e:
+                results[key] = e
+
+        pairs = []
+        fx_targets = {}  # Base currency -> target currencies
+        for path in paths.values():
+            for edge in path:
+                if edge.rate() is not None:
+                    continue
+                if edge.kind == "ticker":
+                    pairs.append(edge.pair)
+                elif edge.kind == "fx":
+                    fx_targets.setdefault(edge.source, []).append(edge.target)
+        # A fully cached conversion answers without a trip through the event loop
+        errors = await self._fetch(pairs, fx_targets) if pairs or fx_targets else {}
+
+        for key, path in paths.items():
+            rates = []
+            for edge in path:
+                rate = edge.rate()
+                if rate is None:
+                    break
+                rates.append(rate)
+            if len(rates) < len(path):
+                edge = path[len(rates)]
+                results[key] = errors.get(edge.kind, {}).get(
+                    edge.pair if edge.kind == "ticker" else edge.source
+                ) or NoConversion(
+                    f"unknown symbol {edge.pair}"
+                    if edge.kind == "ticker"
+                    else f"missing rate for {edge.target}"
+                )
+                continue
+            results[key] = Conversion(*key, path, rates)
+            if record:
+                for edge in path:
+                    if edge.cache_key is not None:
+                        prefetch.scheduler.record(*edge.cache_key)
+        return results
+
+    async def _fetch(self, pairs, fx_targets):
+        """Fetches the missing rates concurrently; returns the errors by kind and pair/base."""
+        pairs = list(dict.fromkeys(pairs))
+        bases = list(fx_targets)
+        requests = [
+            quotes.get_fx_rates(base, sorted(set(fx_targets[base]))) for base in bases
+        ]
+        if pairs:
+            requests.append(quotes.get_ticker_prices(pairs))
+        results = await asyncio.gather(*requests, return_exceptions=True)
+        errors = {"ticker": {}, "fx": {}}
+        if pairs and isinstance(results[-1], Exception):
+            logging.warning(f"Failed to fetch Binance prices: {results[-1]}")
+            errors["ticker"] = dict.fromkeys(pairs, results[-1])
+        for base, result in zip(bases, results):
+            if isinstance(result, Exception):
+                logging.warning(f"Failed to fetch {base} exchange rates: {result}")
+                errors["fx"][base] = result
+        return errors
+
+
+# Engine shared by the whole bot
+engine = ConversionEngine()
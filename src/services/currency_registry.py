@@ -0,0 +1,147 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+from . import http_client
+
+# Local copy of the Frankfurter currency list, so the bot starts without a network call
+CURRENCIES_FILE = os.getenv("CURRENCIES_FILE", "currencies.json")
+# How often the list is revalidated against Frankfurter (seconds)
+CURRENCIES_REFRESH_INTERVAL = float(os.getenv("CURRENCIES_REFRESH_INTERVAL", "86400"))
+
+# Used until the first snapshot exists (e.g. first start without network access)
+DEFAULT_FIAT = {
+    "AUD": "Australian Dollar",
+    "CAD": "Canadian Dollar",
+    "CHF": "Swiss Franc",
+    "EUR": "Euro",
+    "GBP": "British Pound",
+    "JPY": "Japanese Yen",
+    "PLN": "Polish Złoty",
+    "USD": "United States Dollar",
+}
+# Not provided by Frankfurter, crypto prices in USDT come straight from Binance
+EXTRA_CURRENCIES = {"USDT": "Tether (US Dollar Pegged)"}
+
+
+class CurrencyRegistry:
+    """
+    Currency codes and display names, loaded from a disk snapshot.
+
+    Fiat currencies are the ones Frankfurter publishes rates for; USDT is added
+    on top. The list is revalidated in the background with conditional requests
+    (ETag / Last-Modified) and the snapshot is only rewritten when it changed.
+    """
+
+    def __init__(
+        self, path=CURRENCIES_FILE, refresh_interval=CURRENCIES_REFRESH_INTERVAL
+    ):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = None
+        self.loaded = False
+        self.version = 0  # Bumped whenever the list changes
+        self._task = None
+        self._set(DEFAULT_FIAT)
+
+    def _set(self, fiat):
+        self.version += 1
+        self._fiat = dict(fiat)
+        self._names = {**self._fiat, **EXTRA_CURRENCIES}
+
+    def __contains__(self, code):
+        return code in self._names
+
+    def __len__(self):
+        return len(self._names)
+
+    def is_fiat(self, code):
+        """Whether Frankfurter has exchange rates for ``code``."""
+        return code in self._fiat
+
+    def name(self, code, default=""):
+        return self._names.get(code, default)
+
+    def codes(self):
+        return sorted(self._names)
+
+    # -- Snapshot ------------------------------------------------------------
+
+    def load(self):
+        """Reads the snapshot (once). Without one the built-in list is used."""
+        if self.loaded:
+            return
+        self.loaded = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._set(data["currencies"])
+        except (ValueError, KeyError) as e:
+            logging.error(f"Error decoding {self.path}: {e}")
+            return
+        self.etag = data.get("etag")
+        self.last_modified = data.get("last_modified")
+        self.fetched_at = data.get("fetched_at")
+
+    def _write_snapshot(self, data):
+        # Bot processes started in one directory share the snapshot
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    # -- Revalidation --------------------------------------------------------
+
+    async def revalidate(self):
+        """
+        Asks Frankfurter whether the list changed since the snapshot.
+        Returns True when a new list was stored.
+        """
+        currencies, etag, last_modified = await http_client.get_json_conditional(
+            f"{http_client.FRANKFURTER_API}/currencies",
+            etag=self.etag,
+            last_modified=self.last_modified,
+        )
+        self.fetched_at = time.time()
+        if currencies is None:
+            return False  # 304 Not Modified
+        self._set(currencies)
+        self.etag, self.last_modified = etag, last_modified
+        await asyncio.to_thread(
+            self._write_snapshot,
+            {
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched_at": self.fetched_at,
+                "currencies": currencies,
+            },
+        )
+        return True
+
+    def start(self):
+        """Starts the periodic revalidation (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        if self.fetched_at is not None:
+            # A recent snapshot does not need to be checked right away
+            await asyncio.sleep(
+                max(0, self.fetched_at + self.refresh_interval - time.time())
+            )
+        while True:
+            try:
+                await self.revalidate()
+            except Exception as e:
+                logging.warning(f"Failed to revalidate the currency list: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+
+# Registry shared by the whole bot (loaded in on_ready)
+registry = CurrencyRegistry()
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+from . import metrics
+from .state import favorite_from_dict
+
+# How often pending changes are written to disk (seconds)
+FLUSH_INTERVAL = float(os.getenv("FAVORITES_FLUSH_INTERVAL", "1"))
+# Number of journal entries after which the journal is folded into a new snapshot
+COMPACT_THRESHOLD = int(os.getenv("FAVORITES_COMPACT_THRESHOLD", "5000"))
+
+
+class FavoritesStore:
+    """
+    Crash-safe, write-behind storage of user favorites.
+
+    State on disk is a snapshot (``path``, written to a temporary file and atomically
+    renamed into place) plus an append-only journal (``path + ".journal"``) of changes
+    made since. Changes are recorded in memory and appended to the journal in batches
+    by a background task; every journal entry has a sequence number, so entries already
+    contained in the snapshot are skipped on replay even if the process died mid-compaction.
+    """
+
+    def __init__(
+        self,
+        path,
+        flush_interval=FLUSH_INTERVAL,
+        compact_threshold=COMPACT_THRESHOLD,
+    ):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.flush_interval = flush_interval
+        self.compact_threshold = compact_threshold
+        self.favorites = {}
+        self.seq = 0  # Sequence number of the last recorded change
+        self.journal_entries = 0
+        self._pending = []
+        self._lock = None  # asyncio.Lock, created on first use on the bot's loop
+        self._task = None
+
+    # -- Loading -------------------------------------------------------------
+
+    def load(self):
+        """Reads the snapshot and replays the journal. Returns the favorites dict."""
+        favorites = {}
+        seq = 0
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                try:
+                    data = json.load(f)
+                except json.JSONDecodeError:
+                    logging.error(f"Error decoding {self.path}")
+                    data = {}
+            if "favorites" in data and "seq" in data:
+                favorites, seq = data["favorites"], data["seq"]
+            else:
+                favorites = (
+                    data  # Plain {user_id: [...]} file written by older versions
+                )
+        favorites = {
+            int(k): [favorite_from_dict(item) for item in v]
+            for k, v in favorites.items()
+        }
+
+        entries = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb+") as f:
+                good_offset = 0
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn write from a crash – drop it and everything after it
+                        logging.warning(
+                            f"Truncating damaged journal {self.journal_path}"
+                        )
+                        f.truncate(good_offset)
+                        break
+                    good_offset += len(line)
+                    entries += 1
+                    if entry["seq"] > seq:
+                        self._apply(favorites, entry)
+                        seq = entry["seq"]
+
+        self.favorites = favorites
+        self.seq = seq
+        self.journal_entries = entries
+        return favorites
+
+    @staticmethod
+    def _apply(favorites, entry):
+        favs = favorites.setdefault(entry["user"], [])
+        if entry["op"] == "add":
+            favs.append(favorite_from_dict(entry["item"]))
+        elif entry["op"] == "remove" and 0 <= entry["index"] < len(favs):
+            favs.pop(entry["index"])
+
+    # -- Recording changes ---------------------------------------------------
+
+    def record_add(self, user_id, item):
+        """Records that ``item`` (a favorite record) was appended to the user's favorites."""
+        self.seq += 1
+        self._pending.append(
+            {"seq": self.seq, "op": "add", "user": user_id, "item": item.to_dict()}
+        )
+
+    def record_remove(self, user_id, index):
+        """Records that the favorite at (0-based) ``index`` was removed."""
+        self.seq += 1
+        self._pending.append(
+            {"seq": self.seq, "op": "remove", "user": user_id, "index": index}
+        )
+
+    # -- Writing -------------------------------------------------------------
+
+    def _append_journal(self, batch):
+        data = "".join(
+            json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for entry in batch
+        )
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write_snapshot(self, favorites, seq):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"seq": seq, "favorites": favorites},
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        # The journal only holds entries up to seq now, all contained in the snapshot
+        open(self.journal_path, "w").close()
+
+    async def flush(self):
+        """Appends pending changes to the journal and compacts it when it grows too long."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._pending:
+                batch, self._pending = self._pending, []
+                started = time.perf_counter()
+                try:
+                    await asyncio.to_thread(self._append_journal, batch)
+                except Exception:
+                    self._pending[:0] = batch  # Retry with the next flush
+                    raise
+                metrics.favorites_flush_latency.observe(time.perf_counter() - started)
+                self.journal_entries += len(batch)
+            if self.journal_entries >= self.compact_threshold:
+                await self.compact()
+
+    async def compact(self):
+        # Copy on the event loop, so the state cannot change while it is being written
+        favorites = {
+            user: [fav.to_dict() for fav in favs]
+            for user, favs in self.favorites.items()
+        }
+        await asyncio.to_thread(self._write_snapshot, favorites, self.seq)
+        self.journal_entries = 0
+
+    def flush_sync(self):
+        """Writes pending changes synchronously (used at interpreter exit)."""
+        if self._pending:
+            batch, self._pending = self._pending, []
+            self._append_journal(batch)
+            self.journal_entries += len(batch)
+
+    # -- Background task -----------------------------------------------------
+
+    def start(self):
+        """Starts the periodic flush task (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logging.exception("Failed to write favorites")
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import os
+import time
+
+import aiohttp
+
+from . import binance_limits, metrics
+
+# Base URLs of the upstream APIs used by the bot (can point at a local
+# simulator for load tests, see benchmarks/simulator.py)
+BINANCE_API = os.getenv("BINANCE_API", "https://api.binance.com/api/v3")
+FRANKFURTER_API = os.getenv("FRANKFURTER_API", "https://api.frankfurter.app")
+
+# Timeouts (seconds) and connection pool size, configurable via environment variables
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+POOL_SIZE_PER_HOST = int(os.getenv("HTTP_POOL_SIZE_PER_HOST", "20"))
+KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+
+
+class HttpClient:
+    """
+    Asynchronous HTTP client shared by all commands.
+
+    Holds a single aiohttp session whose connector keeps a pool of keep-alive
+    connections per host, so concurrent commands reuse TCP/TLS connections
+    instead of blocking the event loop on a new one each time.
+    """
+
+    def __init__(
+        self,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT,
+        pool_size_per_host=POOL_SIZE_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    ):
+        self.timeout = aiohttp.ClientTimeout(
+            connect=connect_timeout, sock_read=read_timeout
+        )
+        self.pool_size_per_host = pool_size_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self._session = None
+        self._lock = None  # asyncio.Lock, created on first use on the bot's loop
+        self.in_flight = 0  # Requests currently waiting for a response
+
+    async def start(self):
+        """Creates the session (idempotent). Called once from ``on_ready``."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=0,
+                    limit_per_host=self.pool_size_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                )
+                self._session = aiohttp.ClientSession(
+                    connector=connector, timeout=self.timeout
+                )
+                logging.info("HTTP session started")
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def get_json(self, url, params=None):
+        """
+        Performs a GET request and returns the decoded JSON body.
+
+        Raises aiohttp.ClientResponseError for non-2xx responses and
+        asyncio.TimeoutError when the upstream does not answer in time.
+        Binance requests go through the weight limiter first and may raise
+        binance_limits.RateLimited instead of being sent.
+        """
+        session = self._session
+        if session is None or session.closed:
+            # Commands may run before on_ready (e.g. in tests or scripts)
+            session = await self.start()
+        is_binance = url.startswith(BINANCE_API)
+        if is_binance:
+            await binance_limits.limiter.acquire(
+                binance_limits.request_weight(url, params)
+            )
+        self.in_flight += 1
+        started = time.perf_counter()
+        status = "error"
+        try:
+            async with session.get(url, params=params) as response:
+                status = response.status
+                if is_binance:
+                    binance_limits.limiter.update(response.status, response.headers)
+                response.raise_for_status()
+                return await response.json(content_type=None)
+        except asyncio.TimeoutError:
+            status = "timeout"
+            raise
+        finally:
+            self.in_flight -= 1
+            metrics.observe_upstream(url, status, time.perf_counter() - started)
+
+    async def get_json_conditional(self, url, etag=None, last_modified=None):
+        """
+        Conditional GET revalidating a stored copy.
+
+        Returns ``(data, etag, last_modified)``; ``data`` is None when the server
+        answered 304 Not Modified, i.e. the stored copy is still current.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        session = self._session
+        if session is None or session.closed:
+            session = await self.start()
+        self.in_flight += 1
+        started = time.perf_counter()
+        status = "error"
+        try:
+            async with session.get(url, headers=headers) as response:
+                status = response.status
+                if response.status == 304:
+                    return None, etag, last_modified
+                response.raise_for_status()
+                return (
+                    await response.json(content_type=None),
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                )
+        except asyncio.TimeoutError:
+            status = "timeout"
+            raise
+        finally:
+            self.in_flight -= 1
+            metrics.observe_upstream(url, status, time.perf_counter() - started)
+
+
+# Client instance shared by the whole bot
+client = HttpClient()
+
+
+async def get_json(url, params=None):
+    return await client.get_json(url, params=params)
+
+
+async def get_json_conditional(url, etag=None, last_modified=None):
+    return await client.get_json_conditional(
+        url, etag=etag, last_modified=last_modified
+    )
@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+
+SECOND_MS = 1000
+MINUTE_MS = 60 * SECOND_MS
+HOUR_MS = 60 * MINUTE_MS
+DAY_MS = 24 * HOUR_MS
+
+# Kline intervals supported by Binance and their length in milliseconds
+# ("1M" is a calendar month, its length here is only an approximation)
+INTERVAL_MS = {
+    "1s": SECOND_MS,
+    "1m": MINUTE_MS,
+    "3m": 3 * MINUTE_MS,
+    "5m": 5 * MINUTE_MS,
+    "15m": 15 * MINUTE_MS,
+    "30m": 30 * MINUTE_MS,
+    "1h": HOUR_MS,
+    "2h": 2 * HOUR_MS,
+    "4h": 4 * HOUR_MS,
+    "6h": 6 * HOUR_MS,
+    "8h": 8 * HOUR_MS,
+    "12h": 12 * HOUR_MS,
+    "1d": DAY_MS,
+    "3d": 3 * DAY_MS,
+    "1w": 7 * DAY_MS,
+    "1M": 30 * DAY_MS,
+}
+
+# Weekly candles open on Monday 00:00 UTC, 4 days after the Unix epoch (a Thursday)
+WEEK_OFFSET_MS = 4 * DAY_MS
+
+
+def interval_ms(interval):
+    """Returns the length of a kline interval in milliseconds."""
+    try:
+        return INTERVAL_MS[interval]
+    except KeyError:
+        raise ValueError(f"Unsupported interval: {interval}") from None
+
+
+def candle_bounds(interval, now_ms):
+    """
+    Returns (open_ms, close_ms) of the candle of the given interval that contains now_ms,
+    aligned the same way as Binance klines (UTC).
+    """
+    if interval == "1M":
+        now = datetime.fromtimestamp(now_ms / 1000, tz=timezone.utc)
+        start = datetime(now.year, now.month, 1, tzinfo=timezone.utc)
+        if now.month == 12:
+            end = datetime(now.year + 1, 1, 1, tzinfo=timezone.utc)
+        else:
+            end = datetime(now.year, now.month + 1, 1, tzinfo=timezone.utc)
+        return int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+    length = interval_ms(interval)
+    offset = WEEK_OFFSET_MS if interval == "1w" else 0
+    open_ms = (now_ms - offset) // length * length + offset
+    return open_ms, open_ms + length
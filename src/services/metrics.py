@@ -0,0 +1,269 @@
+import asyncio
+import bisect
+import logging
+import os
+import re
+import time
+from urllib.parse import urlsplit
+
+# The metrics endpoint is only started when METRICS_PORT is set; it listens on
+# localhost by default, so it is not exposed outside the host or container
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# How often the event loop lag is sampled (seconds)
+LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", "0.5"))
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs.extend(f'{n}="{v}"' for n, v in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels; ``inc`` is a dict update, cheap enough for every request."""
+
+    type = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}  # label values -> count
+
+    def inc(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield self.name, _format_labels(self.labels, labels), value
+
+
+class Histogram:
+    """
+    Histogram with fixed buckets. Observations only increment one bucket
+    (cumulative counts are computed when the metrics are scraped).
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, *labels):
+        counts = self._values.get(labels)
+        if counts is None:
+            counts = self._values[labels] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def count(self, *labels):
+        counts = self._values.get(labels)
+        return sum(counts[:-1]) if counts else 0
+
+    def samples(self):
+        for labels, counts in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield (
+                    self.name + "_bucket",
+                    _format_labels(self.labels, labels, [("le", _format_value(bound))]),
+                    cumulative,
+                )
+            yield self.name + "_sum", _format_labels(self.labels, labels), counts[-1]
+            yield self.name + "_count", _format_labels(self.labels, labels), cumulative
+
+
+class Gauge:
+    """
+    Gauge read when the metrics are scraped: ``collect()`` returns a number or a
+    dict of label values -> number, so instrumented code does no work at all.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, collect, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._collect = collect
+
+    def samples(self):
+        values = self._collect()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in values.items():
+            if not isinstance(labels, tuple):
+                labels = (labels,)
+            yield self.name, _format_labels(self.labels, labels), value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name, documentation, collect, labels=()):
+        return self.register(Gauge(name, documentation, collect, labels))
+
+    def render(self):
+        """Returns all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            try:
+                for name, labels, value in metric.samples():
+                    lines.append(f"{name}{labels} {_format_value(value)}")
+            except Exception:
+                logging.exception(f"Failed to collect {metric.name}")
+        return "\n".join(lines) + "\n"
+
+
+# Registry of the whole bot, scraped at /metrics
+registry = Registry()
+
+command_invocations = registry.counter(
+    "bot_command_invocations_total",
+    "Commands invoked, by command and outcome (ok, error, rejected).",
+    ("command", "status"),
+)
+command_latency = registry.histogram(
+    "bot_command_duration_seconds",
+    "Time from the start of a command to its end.",
+    ("command",),
+)
+upstream_requests = registry.counter(
+    "bot_upstream_requests_total",
+    "Upstream HTTP requests, by host, endpoint and response status.",
+    ("host", "endpoint", "status"),
+)
+upstream_latency = registry.histogram(
+    "bot_upstream_request_duration_seconds",
+    "Upstream HTTP request latency.",
+    ("host", "endpoint"),
+)
+favorites_flush_latency = registry.histogram(
+    "bot_favorites_flush_duration_seconds",
+    "Time to write a batch of favorite changes to disk.",
+)
+loop_lag = registry.histogram(
+    "bot_event_loop_lag_seconds",
+    "How late the event loop ran a timer that was due.",
+    buckets=LAG_BUCKETS,
+)
+
+# Dates in Frankfurter paths (e.g. /2024-01-01..2024-02-01) would make one endpoint per day
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def endpoint_of(url):
+    """Returns ``(host, endpoint)`` labels of an upstream URL."""
+    parts = urlsplit(url)
+    return parts.hostname or "", _DATE.sub("{date}", parts.path) or "/"
+
+
+def observe_upstream(url, status, seconds):
+    host, endpoint = endpoint_of(url)
+    upstream_requests.inc(host, endpoint, str(status))
+    upstream_latency.observe(seconds, host, endpoint)
+
+
+class LoopLagMonitor:
+    """Measures event loop lag: how much later than requested a short sleep wakes up."""
+
+    def __init__(self, interval=LOOP_LAG_INTERVAL, histogram=loop_lag):
+        self.interval = interval
+        self.histogram = histogram
+        self.last_lag = 0.0
+        self._task = None
+
+    def start(self):
+        """Starts the background task (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.histogram.observe(self.last_lag)
+
+
+class MetricsServer:
+    """Serves ``registry`` at ``/metrics`` over HTTP (aiohttp.web)."""
+
+    def __init__(self, port=METRICS_PORT, host=METRICS_HOST, registry=registry):
+        self.port = port
+        self.host = host
+        self.registry = registry
+        self._runner = None
+
+    async def _handle(self, request):
+        from aiohttp import web
+
+        return web.Response(
+            text=self.registry.render(),
+            content_type="text/plain",
+            charset="utf-8",
+            headers={"X-Content-Type-Options": "nosniff"},
+        )
+
+    async def start(self):
+        """Starts listening (idempotent). Returns the bound port."""
+        if self._runner is None:
+            # Imported here: most deployments run without the endpoint
+            from aiohttp import web
+
+            app = web.Application()
+            app.router.add_get("/metrics", self._handle)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, self.host, self.port)
+            await site.start()
+            self.port = site._server.sockets[0].getsockname()[1]
+            logging.info(f"Metrics at http://{self.host}:{self.port}/metrics")
+        return self.port
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+lag_monitor = LoopLagMonitor()
+server = MetricsServer()
@@ -0,0 +1,175 @@
+import asyncio
+import heapq
+import logging
+import math
+import os
+import time
+from collections import deque
+
+from . import binance_limits, http_client, quotes, stream
+
+# Upstream requests the scheduler may make per minute
+PREFETCH_BUDGET_PER_MINUTE = int(os.getenv("PREFETCH_BUDGET_PER_MINUTE", "30"))
+# Number of most requested keys kept warm
+PREFETCH_TOP_K = int(os.getenv("PREFETCH_TOP_K", "20"))
+# Keys are refreshed when their cache entry expires within this time (seconds)
+PREFETCH_LEAD_TIME = float(os.getenv("PREFETCH_LEAD_TIME", "1"))
+# Request counts lose half their weight after this time (seconds)
+PREFETCH_HALF_LIFE = float(os.getenv("PREFETCH_HALF_LIFE", "600"))
+PREFETCH_MAX_KEYS = int(os.getenv("PREFETCH_MAX_KEYS", "10000"))
+# How often the hot keys are checked and how long to wait for interactive requests to finish
+PREFETCH_TICK = 0.5
+PREFETCH_YIELD_TIMEOUT = 1.0
+
+
+class PrefetchScheduler:
+    """
+    Keeps the cache entries of the most requested keys warm.
+
+    Commands ``record`` every lookup; counts decay exponentially, so the top-K
+    follows what users ask for now. Hot keys that are about to expire are
+    refreshed in the background, batched per kind, within a budget of upstream
+    requests per minute and only while no interactive request is in flight.
+
+    A key is a tuple whose first item is its kind (e.g. ``("ticker", "BTCUSDT")``);
+    every kind has a handler registered with ``register``.
+    """
+
+    def __init__(
+        self,
+        budget_per_minute=PREFETCH_BUDGET_PER_MINUTE,
+        top_k=PREFETCH_TOP_K,
+        lead_time=PREFETCH_LEAD_TIME,
+        half_life=PREFETCH_HALF_LIFE,
+        max_keys=PREFETCH_MAX_KEYS,
+        busy=lambda: http_client.client.in_flight > 0,
+        clock=time.monotonic,
+    ):
+        self.budget_per_minute = budget_per_minute
+        self.top_k = top_k
+        self.lead_time = lead_time
+        self.max_keys = max_keys
+        self._decay = math.log(2) / half_life
+        self._busy = busy
+        self._clock = clock
+        self._handlers = {}  # kind -> (expires_in, refresh)
+        self._demand = {}  # key -> (score, time of the last update)
+        self._spent = deque()  # Times of the background requests in the last minute
+        self._task = None
+        self.refreshed = 0
+
+    def register(self, kind, expires_in, refresh):
+        """
+        ``expires_in(key)`` returns the seconds until the cached value expires
+        (None when it is not cached); ``await refresh(keys)`` refreshes a list of keys
+        of that kind and returns the number of upstream requests it made.
+        """
+        self._handlers[kind] = (expires_in, refresh)
+
+    def record(self, *key):
+        """Counts one request for ``key``."""
+        now = self._clock()
+        score, updated = self._demand.get(key, (0.0, now))
+        self._demand[key] = (score * math.exp(-self._decay * (now - updated)) + 1, now)
+        if len(self._demand) > self.max_keys:
+            # Forget the coldest keys, leaving some room before the next cleanup
+            keep = dict(self._ranked(int(self.max_keys * 0.9)))
+            self._demand = {k: v for k, v in self._demand.items() if k in keep}
+
+    def _ranked(self, n):
+        now = self._clock()
+        return heapq.nlargest(
+            n,
+            (
+                (key, score * math.exp(-self._decay * (now - updated)))
+                for key, (score, updated) in self._demand.items()
+            ),
+            key=lambda item: item[1],
+        )
+
+    def hot_keys(self):
+        """The top-K keys by decayed request count, hottest first."""
+        return [key for key, _ in self._ranked(self.top_k)]
+
+    def _budget_left(self):
+        now = self._clock()
+        while self._spent and self._spent[0] <= now - 60:
+            self._spent.popleft()
+        return self.budget_per_minute - len(self._spent)
+
+    async def _wait_until_idle(self):
+        """Waits for interactive requests to finish. Returns False if they keep running."""
+        deadline = self._clock() + PREFETCH_YIELD_TIMEOUT
+        while self._busy():
+            if self._clock() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    async def run_once(self):
+        """Refreshes the hot keys that are about to expire. Returns the number of requests made."""
+        due = {}  # kind -> keys
+        for key in self.hot_keys():
+            handler = self._handlers.get(key[0])
+            if handler is None:
+                continue
+            expires_in = handler[0](key)
+            if expires_in is None or expires_in <= self.lead_time:
+                due.setdefault(key[0], []).append(key)
+
+        made = 0
+        for kind, keys in due.items():
+            if self._budget_left() <= 0 or not await self._wait_until_idle():
+                break
+            try:
+                requests = await self._handlers[kind][1](keys)
+            except Exception as e:
+                logging.warning(f"Prefetch of {kind} failed: {e}")
+                requests = 1
+            now = self._clock()
+            self._spent.extend([now] * requests)
+            made += requests
+            self.refreshed += len(keys)
+        return made
+
+    def start(self):
+        """Starts the background task (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        # Prefetching gives way to user commands when the Binance weight runs low
+        binance_limits.priority.set(binance_limits.BACKGROUND)
+        while True:
+            await asyncio.sleep(PREFETCH_TICK)
+            try:
+                await self.run_once()
+            except Exception:
+                logging.exception("Prefetch failed")
+
+
+def _quote_expires_in(key):
+    if key[0] == "ticker" and stream.feed.last_price(key[1]) is not None:
+        return math.inf  # Served from the price stream, nothing to refresh
+    return quotes.quote_cache.expires_in(key)
+
+
+async def _refresh_tickers(keys):
+    await quotes.refresh_ticker_prices([pair for _, pair in keys])
+    return 1
+
+
+async def _refresh_fx(keys):
+    targets = {}
+    for _, base, target in keys:
+        targets.setdefault(base, []).append(target)
+    await asyncio.gather(
+        *(quotes.refresh_fx_rates(base, t) for base, t in targets.items())
+    )
+    return len(targets)
+
+
+# Scheduler shared by the whole bot (started in on_ready)
+scheduler = PrefetchScheduler()
+scheduler.register("ticker", _quote_expires_in, _refresh_tickers)
+scheduler.register("fx", _quote_expires_in, _refresh_fx)
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+
+import aiohttp
+
+import numpy as np
+
+from . import cache_backend, http_client, stream, symbols
+from .cache import QuoteCache
+from .series import dates_to_ms
+
+# Cache lifetimes per source (seconds). Binance ticks move constantly, while
+# Frankfurter publishes new reference rates only once per working day.
+BINANCE_TTL = float(os.getenv("BINANCE_QUOTE_TTL", "5"))
+FRANKFURTER_TTL = float(os.getenv("FRANKFURTER_QUOTE_TTL", "3600"))
+QUOTE_CACHE_SIZE = int(os.getenv("QUOTE_CACHE_SIZE", "4096"))
+
+quote_cache = QuoteCache(max_entries=QUOTE_CACHE_SIZE, backend=cache_backend.shared)
+
+
+async def get_ticker_price(pair):
+    """
+    Returns the last price of a Binance trading pair (e.g. BTCUSDT):
+    from the streaming price book when it is running and fresh, otherwise via REST.
+    """
+    streamed = stream.feed.last_price(pair)
+    if streamed is not None:
+        return streamed
+
+    async def fetch():
+        res = await http_client.get_json(
+            f"{http_client.BINANCE_API}/ticker/price?symbol={pair}"
+        )
+        return float(res["price"])
+
+    price = await quote_cache.get_or_fetch(("ticker", pair), BINANCE_TTL, fetch)
+    stream.feed.track(pair)  # The pair exists and is in demand, stream it from now on
+    return price
+
+
+async def get_ticker_prices(pairs):
+    """
+    Batch version of get_ticker_price.
+
+    Pairs that are not cached are fetched with a single ``symbols=[...]`` request.
+    Returns a dict pair -> price; pairs unknown to Binance are left out.
+    """
+    prices = {}
+    missing = []
+    # Pairs Binance does not list would make it reject the whole batch
+    for pair in filter(symbols.index.tradable, dict.fromkeys(pairs)):
+        cached = stream.feed.last_price(pair)
+        if cached is None:
+            cached = quote_cache.get(("ticker", pair))
+        if cached is not None:
+            prices[pair] = cached
+        else:
+            missing.append(pair)
+    # Prices fetched by another bot process (with a shared cache tier)
+    shared = await quote_cache.get_shared([("ticker", pair) for pair in missing])
+    for (_, pair), value in shared.items():
+        prices[pair] = value
+    missing = [pair for pair in missing if pair not in prices]
+    if not missing:
+        return prices
+
+    prices.update(await _fetch_ticker_prices(missing))
+    return prices
+
+
+async def refresh_ticker_prices(pairs):
+    """Fetches the pairs with one batch request even if they are cached (used by prefetch)."""
+    return await _fetch_ticker_prices(list(dict.fromkeys(pairs)))
+
+
+async def _fetch_ticker_prices(pairs):
+    prices = {}
+    pair_list = json.dumps(pairs, separators=(",", ":"))
+    try:
+        res = await http_client.get_json(
+            f"{http_client.BINANCE_API}/ticker/price", params={"symbols": pair_list}
+        )
+    except aiohttp.ClientResponseError as e:
+        if e.status != 400:
+            raise
+        # Binance rejects the whole batch if any symbol is invalid,
+        # so look the pairs up one by one (concurrently) and skip the bad ones.
+        results = await asyncio.gather(
+            *(get_ticker_price(pair) for pair in pairs), return_exceptions=True
+        )
+        for pair, result in zip(pairs, results):
+            if not isinstance(result, Exception):
+                prices[pair] = result
+        return prices
+
+    quote_cache.misses += len(pairs)
+    for item in res:
+        value = float(item["price"])
+        quote_cache.set(("ticker", item["symbol"]), value, BINANCE_TTL)
+        stream.feed.track(item["symbol"])
+        prices[item["symbol"]] = value
+    return prices
+
+
+async def get_fx_rates(base, targets):
+    """
+    Returns the Frankfurter exchange rates from ``base`` as a dict target -> rate
+    (None when the API has no rate for it). All uncached targets are fetched
+    with a single request.
+    """
+    rates = {}
+    missing = []
+    sentinel = object()
+    for target in dict.fromkeys(targets):
+        cached = quote_cache.get(("fx", base, target), sentinel)
+        if cached is not sentinel:
+            rates[target] = cached
+        else:
+            missing.append(target)
+    shared = await quote_cache.get_shared([("fx", base, target) for target in missing])
+    for (_, _, target), value in shared.items():
+        rates[target] = value
+    missing = [target for target in missing if target not in rates]
+    if not missing:
+        return rates
+
+    rates.update(await _fetch_fx_rates(base, missing))
+    return rates
+
+
+async def refresh_fx_rates(base, targets):
+    """Fetches the rates with one request even if they are cached (used by prefetch)."""
+    return await _fetch_fx_rates(base, list(dict.fromkeys(targets)))
+
+
+async def _fetch_fx_rates(base, targets):
+    rates = {}
+    quote_cache.misses += len(targets)
+    res = await http_client.get_json(
+        f"{http_client.FRANKFURTER_API}/latest?from={base}&to={','.join(targets)}"
+    )
+    fetched = res.get("rates", {})
+    for target in targets:
+        rate = fetched.get(target)
+        rate = float(rate) if rate is not None else None
+        quote_cache.set(("fx", base, target), rate, FRANKFURTER_TTL)
+        rates[target] = rate
+    return rates
+
+
+async def get_fx_series(base, target, start_date, end_date):
+    """
+    Returns the daily Frankfurter rates base -> target between two dates
+    (fetched with one time-series request) as two sorted NumPy arrays:
+    publication dates in epoch milliseconds and the rates.
+    """
+
+    async def fetch():
+        res = await http_client.get_json(
+            f"{http_client.FRANKFURTER_API}/{start_date}..{end_date}?from={base}&to={target}"
+        )
+        rates = res.get("rates", {})
+        dates = sorted(d for d in rates if target in rates[d])
+        return dates_to_ms(dates), np.array(
+            [rates[d][target] for d in dates], dtype=np.float64
+        )
+
+    key = ("fx_series", base, target, str(start_date), str(end_date))
+    return await quote_cache.get_or_fetch(key, FRANKFURTER_TTL, fetch)
@@ -0,0 +1,50 @@
+"""
+Code running in the chart render worker processes (see ChartRenderer in charts.py).
+
+The workers import only this module, so it must stay free of the bot, its stores
+and its network clients.
+"""
+
+import os
+from io import BytesIO
+
+# Width of the rendered image in pixels (14 inches at 100 dpi); longer series are
+# downsampled to about one point per pixel before plotting
+CHART_DPI = 100
+CHART_WIDTH_PX = 14 * CHART_DPI
+
+
+def render_png(dates_dt, prices, title, ylabel, kolor):
+    """
+    Renders a line chart and returns it as PNG bytes.
+
+    Uses the object-oriented Figure API with the Agg canvas, so no pyplot
+    global state is touched. Runs inside the worker processes, which are the
+    only ones importing matplotlib (it is slow to import).
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import MaxNLocator
+
+    fig = Figure(figsize=(14, 7), dpi=CHART_DPI)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(dates_dt, prices, color=kolor, linewidth=2)
+    ax.tick_params(axis="both", labelsize=12)
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.xaxis.set_major_locator(MaxNLocator(10))
+    ax.grid(True, linestyle="--", alpha=0.7)
+    ax.set_title(title, fontsize=16)
+    ax.set_xlabel("Date", fontsize=14)
+    ax.set_ylabel(ylabel, fontsize=14)
+    fig.tight_layout()
+
+    buf = BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+def warm_up_worker():
+    # Imports matplotlib and loads fonts and the Agg backend once, so the first real chart is fast
+    render_png([0, 1], [0, 1], "warm-up", "", "royalblue")
+    return os.getpid()
@@ -0,0 +1,79 @@
+import numpy as np
+
+
+def dates_to_ms(dates):
+    """Converts "YYYY-MM-DD" strings to int64 epoch milliseconds (UTC midnight)."""
+    return (
+        np.array(dates, dtype="datetime64[D]").astype("datetime64[ms]").astype(np.int64)
+    )
+
+
+def asof_join(times_ms, ref_times_ms, ref_values):
+    """
+    For every timestamp in ``times_ms`` returns the last reference value published
+    at or before it (as-of join with forward fill, e.g. across weekends and holidays).
+
+    ``ref_times_ms`` must be sorted. Timestamps older than the first reference point
+    get the first value. Runs in O(n log m) with a single vectorized searchsorted.
+    """
+    ref_values = np.asarray(ref_values, dtype=np.float64)
+    idx = np.searchsorted(ref_times_ms, times_ms, side="right") - 1
+    np.clip(idx, 0, len(ref_values) - 1, out=idx)
+    return ref_values[idx]
+
+
+# Column indices of the OHLCV matrix returned by parse_klines
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(5)
+
+
+def parse_klines(klines):
+    """
+    Decodes Binance klines ([open_time, open, high, low, close, volume, ...],
+    values as strings or numbers) into compact arrays in one pass:
+    int64 open times in epoch milliseconds and a float64 (n, 5) OHLCV matrix.
+    """
+    count = len(klines)
+    open_times = np.fromiter((k[0] for k in klines), dtype=np.int64, count=count)
+    ohlcv = np.array([k[1:6] for k in klines], dtype=np.float64).reshape(count, 5)
+    return open_times, ohlcv
+
+
+def lttb(x, y, threshold):
+    """
+    Downsamples a series to ``threshold`` points with the Largest-Triangle-Three-Buckets
+    algorithm, which keeps the visual shape (peaks and troughs) of the line.
+
+    ``x`` must be sorted and numeric. Series that are already short enough are returned as is.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    xf = x.astype(np.float64)
+    # The first and last points are always kept; the rest is split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point for the final bucket)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = xf[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = xf[-1], y[-1]
+        # Pick the point forming the largest triangle with the previous pick and that average
+        px, py = xf[previous], y[previous]
+        areas = np.abs(
+            (px - avg_x) * (y[start:end] - py) - (px - xf[start:end]) * (avg_y - py)
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    return x[selected], y[selected]
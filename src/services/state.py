@@ -0,0 +1,265 @@
+import os
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+
+# Message -> favorite metadata is kept only for recent bot messages
+MESSAGE_FAV_LIMIT = int(os.getenv("MESSAGE_FAV_LIMIT", "50000"))
+MESSAGE_FAV_TTL = float(os.getenv("MESSAGE_FAV_TTL", str(7 * 24 * 60 * 60)))
+# Location of the user preferences database and how many users are kept in memory
+PREFERENCES_DB = os.getenv("PREFERENCES_DB", "preferences.db")
+PREFERENCES_CACHE_SIZE = int(os.getenv("PREFERENCES_CACHE_SIZE", "100000"))
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class PriceFavorite:
+    """A dynamic price entry (e.g. BTC in PLN, or the USD/PLN fiat conversion)."""
+
+    __slots__ = ("symbol", "currency", "fiat_conversion")
+    type = "price"
+
+    def __init__(self, symbol, currency=None, fiat_conversion=False):
+        # Symbols and currencies repeat across thousands of records, so share one string object
+        self.symbol = _intern(symbol)
+        self.currency = _intern(currency)
+        self.fiat_conversion = bool(fiat_conversion)
+
+    def __eq__(self, other):
+        return isinstance(other, PriceFavorite) and (
+            self.symbol,
+            self.currency,
+            self.fiat_conversion,
+        ) == (other.symbol, other.currency, other.fiat_conversion)
+
+    def __hash__(self):
+        return hash((self.symbol, self.currency, self.fiat_conversion))
+
+    def __repr__(self):
+        return (
+            f"PriceFavorite({self.symbol!r}, {self.currency!r}, "
+            f"fiat_conversion={self.fiat_conversion})"
+        )
+
+    def __str__(self):
+        return f"{self.symbol}/{self.currency}" if self.currency else self.symbol
+
+    def to_dict(self):
+        return {
+            "type": self.type,
+            "symbol": self.symbol,
+            "currency": self.currency,
+            "fiat_conversion": self.fiat_conversion,
+        }
+
+
+class StaticFavorite:
+    """A favorite message saved as plain text."""
+
+    __slots__ = ("content",)
+    type = "static"
+
+    def __init__(self, content):
+        self.content = content
+
+    def __eq__(self, other):
+        return isinstance(other, StaticFavorite) and self.content == other.content
+
+    def __hash__(self):
+        return hash(self.content)
+
+    def __repr__(self):
+        return f"StaticFavorite({self.content!r})"
+
+    def __str__(self):
+        return str(self.content)
+
+    def to_dict(self):
+        return {"type": self.type, "content": self.content}
+
+
+def favorite_from_dict(data):
+    """Builds a favorite record from its JSON form (as stored in favorites.json)."""
+    if isinstance(data, dict) and data.get("type") == "price":
+        return PriceFavorite(
+            data.get("symbol"), data.get("currency"), data.get("fiat_conversion")
+        )
+    if isinstance(data, dict):
+        return StaticFavorite(data.get("content"))
+    return StaticFavorite(data)  # Very old entries were stored as plain text
+
+
+class BoundedMap:
+    """
+    Dict-like map with a fixed maximum size and a time-to-live for every entry.
+
+    The least recently used entry is evicted when the map is full, and expired
+    entries disappear on access, so memory use has a fixed ceiling.
+    """
+
+    def __init__(self, max_entries, ttl, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __setitem__(self, key, value):
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __getitem__(self, key):
+        expires_at, value = self._entries[key]
+        if expires_at <= self._clock():
+            del self._entries[key]
+            raise KeyError(key)
+        self._entries.move_to_end(key)
+        return value
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key, default=None):
+        value = self.get(key, default)
+        self._entries.pop(key, None)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+
+class UserPreferences:
+    """
+    Per-user preferences (language, currency) persisted in SQLite.
+
+    A user's row is read on first access and kept in a bounded LRU cache,
+    so only active users occupy memory. Writes go straight to the database
+    (a single-row upsert in WAL mode).
+    """
+
+    FIELDS = ("lang", "currency")
+
+    def __init__(self, path=PREFERENCES_DB, max_cached=PREFERENCES_CACHE_SIZE):
+        self.path = path
+        self.max_cached = max_cached
+        self._conn = None
+        self._cache = OrderedDict()  # user_id -> {field: value}
+
+    def _connection(self, create):
+        if self._conn is None:
+            if not create and self.path != ":memory:" and not os.path.exists(self.path):
+                return None
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS preferences ("
+                "user_id INTEGER PRIMARY KEY, lang TEXT, currency TEXT)"
+            )
+        return self._conn
+
+    def _row(self, user_id):
+        row = self._cache.get(user_id)
+        if row is not None:
+            self._cache.move_to_end(user_id)
+            return row
+        row = {}
+        conn = self._connection(create=False)
+        if conn is not None:
+            found = conn.execute(
+                "SELECT lang, currency FROM preferences WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if found:
+                row = {
+                    field: _intern(value)
+                    for field, value in zip(self.FIELDS, found)
+                    if value is not None
+                }
+        self._cache[user_id] = row
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return row
+
+    def get(self, user_id, field):
+        return self._row(user_id).get(field)
+
+    def set(self, user_id, field, value):
+        row = self._row(user_id)
+        conn = self._connection(create=True)
+        with conn:
+            conn.execute(
+                "INSERT INTO preferences (user_id) VALUES (?) ON CONFLICT DO NOTHING",
+                (user_id,),
+            )
+            conn.execute(
+                f"UPDATE preferences SET {field} = ? WHERE user_id = ?",
+                (value, user_id),
+            )
+        if value is None:
+            row.pop(field, None)
+        else:
+            row[field] = _intern(value)
+
+    def view(self, field):
+        """Returns a dict-like view of one preference, keyed by user id."""
+        if field not in self.FIELDS:
+            raise ValueError(f"Unknown preference: {field}")
+        return PreferenceView(self, field)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._cache.clear()
+
+
+class PreferenceView:
+    """Dict-like access to one preference field (e.g. user_lang[user_id])."""
+
+    def __init__(self, preferences, field):
+        self._preferences = preferences
+        self._field = field
+
+    def __getitem__(self, user_id):
+        value = self._preferences.get(user_id, self._field)
+        if value is None:
+            raise KeyError(user_id)
+        return value
+
+    def __setitem__(self, user_id, value):
+        self._preferences.set(user_id, self._field, value)
+
+    def __delitem__(self, user_id):
+        if user_id not in self:
+            raise KeyError(user_id)
+        self._preferences.set(user_id, self._field, None)
+
+    def __contains__(self, user_id):
+        return self._preferences.get(user_id, self._field) is not None
+
+    def get(self, user_id, default=None):
+        value = self._preferences.get(user_id, self._field)
+        return default if value is None else value
+
+    def pop(self, user_id, default=None):
+        value = self.get(user_id, default)
+        if user_id in self:
+            self._preferences.set(user_id, self._field, None)
+        return value
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+import aiohttp
+
+from . import http_client
+
+# Streaming of Binance prices is optional (PRICE_STREAMING=1 enables it)
+STREAMING_ENABLED = os.getenv("PRICE_STREAMING", "0") == "1"
+BINANCE_STREAM_URL = os.getenv(
+    "BINANCE_STREAM_URL", "wss://stream.binance.com:9443/stream"
+)
+# A price older than this (seconds) is stale and !price falls back to REST
+STREAM_STALE_AFTER = float(os.getenv("PRICE_STREAM_STALE_AFTER", "10"))
+# Pairs nobody asked for during this time (seconds) are unsubscribed
+STREAM_IDLE_AFTER = float(os.getenv("PRICE_STREAM_IDLE_AFTER", "900"))
+# Binance allows at most 1024 streams per connection
+STREAM_MAX_PAIRS = int(os.getenv("PRICE_STREAM_MAX_PAIRS", "500"))
+# Subscription changes are batched, Binance allows only 5 messages per second
+MAINTENANCE_INTERVAL = 0.5
+MAX_RECONNECT_DELAY = 30
+
+
+class PriceFeed:
+    """
+    Last-price book fed by Binance WebSocket mini-ticker streams.
+
+    Pairs are subscribed once a REST lookup proved they exist (``track``) and
+    are dropped again when nobody asked for them for ``idle_after`` seconds.
+    The connection is re-established with exponential backoff and all pairs
+    are resubscribed. Prices older than ``stale_after`` seconds are not served.
+    """
+
+    def __init__(
+        self,
+        url=BINANCE_STREAM_URL,
+        stale_after=STREAM_STALE_AFTER,
+        idle_after=STREAM_IDLE_AFTER,
+        max_pairs=STREAM_MAX_PAIRS,
+        client=None,
+        min_reconnect_delay=1,
+        clock=time.monotonic,
+    ):
+        self.url = url
+        self.client = client or http_client.client
+        self.min_reconnect_delay = min_reconnect_delay
+        self.stale_after = stale_after
+        self.idle_after = idle_after
+        self.max_pairs = max_pairs
+        self._clock = clock
+        self.book = {}  # pair -> (price, received_at)
+        self.demand = {}  # pair -> last time the price was requested
+        self._subscribed = set()
+        self._to_subscribe = set()
+        self._to_unsubscribe = set()
+        self._ws = None
+        self._task = None
+        self._request_id = 0
+        self.connected = None  # asyncio.Event, created in start() on the bot's loop
+        self.reconnects = 0
+        self.listeners = []  # Called with ("ticker", pair) on every tick
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def last_price(self, pair):
+        """Returns the streamed price of a pair, or None if it is unknown or stale."""
+        if not self.running:
+            return None
+        if pair in self.demand:
+            self.demand[pair] = self._clock()
+        entry = self.book.get(pair)
+        if entry is None or self._clock() - entry[1] > self.stale_after:
+            return None
+        return entry[0]
+
+    def track(self, pair):
+        """Subscribes to a pair that users query (after REST confirmed it exists)."""
+        if not self.running:
+            return
+        if pair not in self.demand and len(self.demand) >= self.max_pairs:
+            return
+        self.demand[pair] = self._clock()
+        if pair not in self._subscribed:
+            self._to_subscribe.add(pair)
+            self._to_unsubscribe.discard(pair)
+
+    def start(self):
+        if not self.running:
+            self.connected = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.connected is not None:
+            self.connected.clear()
+
+    # -- Connection handling ---------------------------------------------------
+
+    async def _run(self):
+        delay = self.min_reconnect_delay
+        while True:
+            try:
+                session = await self.client.start()
+                async with session.ws_connect(self.url, heartbeat=30) as ws:
+                    self._ws = ws
+                    delay = self.min_reconnect_delay
+                    # Everything we were subscribed to has to be requested again
+                    self._to_subscribe |= self._subscribed | set(self.demand)
+                    self._subscribed.clear()
+                    self.connected.set()
+                    logging.info("Binance price stream connected")
+                    maintenance = asyncio.create_task(self._maintain())
+                    try:
+                        await self._read(ws)
+                    finally:
+                        maintenance.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"Binance price stream error: {e}")
+            finally:
+                self._ws = None
+                self.connected.clear()
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _read(self, ws):
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                break
+            payload = json.loads(msg.data)
+            data = payload.get("data", payload)  # Combined streams wrap the event
+            if isinstance(data, dict) and data.get("e") == "24hrMiniTicker":
+                # Ticks can still arrive for a pair that was just unsubscribed
+                if data["s"] in self.demand:
+                    self.book[data["s"]] = (float(data["c"]), self._clock())
+                    for listener in self.listeners:
+                        listener(("ticker", data["s"]))
+
+    async def _maintain(self):
+        while True:
+            now = self._clock()
+            for pair, requested_at in list(self.demand.items()):
+                if now - requested_at > self.idle_after:
+                    del self.demand[pair]
+                    self.book.pop(pair, None)
+                    self._to_subscribe.discard(pair)
+                    if pair in self._subscribed:
+                        self._to_unsubscribe.add(pair)
+            unsubscribe, self._to_unsubscribe = self._to_unsubscribe, set()
+            subscribe, self._to_subscribe = self._to_subscribe, set()
+            try:
+                if unsubscribe:
+                    await self._send("UNSUBSCRIBE", unsubscribe)
+                    self._subscribed -= unsubscribe
+                    unsubscribe = set()
+                if subscribe:
+                    await self._send("SUBSCRIBE", subscribe)
+                    self._subscribed |= subscribe
+                    subscribe = set()
+            except ConnectionError:
+                # Keep the changes for later, the reader notices the closed socket and reconnects
+                self._to_unsubscribe |= unsubscribe
+                self._to_subscribe |= subscribe
+                return
+            await asyncio.sleep(MAINTENANCE_INTERVAL)
+
+    async def _send(self, method, pairs):
+        self._request_id += 1
+        await self._ws.send_json(
+            {
+                "method": method,
+                "params": sorted(f"{pair.lower()}@miniTicker" for pair in pairs),
+                "id": self._request_id,
+            }
+        )
+
+
+# Feed shared by the whole bot (started in on_ready when PRICE_STREAMING=1)
+feed = PriceFeed()
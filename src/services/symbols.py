@@ -0,0 +1,162 @@
+import asyncio
+import difflib
+import json
+import logging
+import os
+import time
+
+from . import binance_limits, http_client
+
+# Local copy of Binance's exchangeInfo symbol list, so the bot starts without a network call
+SYMBOLS_FILE = os.getenv("SYMBOLS_FILE", "symbols.json")
+# How often the list is downloaded again (seconds); exchangeInfo costs 20 request weight
+SYMBOLS_REFRESH_INTERVAL = float(os.getenv("SYMBOLS_REFRESH_INTERVAL", "3600"))
+TRADING = "TRADING"
+# Number of similar symbols suggested for an unknown one
+MAX_SUGGESTIONS = 3
+
+
+class UnknownSymbol(Exception):
+    """Raised for a symbol without a trading pair on Binance, with similar symbols."""
+
+    def __init__(self, symbol, suggestions=(), status=None):
+        self.symbol = symbol
+        self.suggestions = list(suggestions)
+        if status is not None:
+            message = f"{symbol} is not trading on Binance ({status})"
+        else:
+            message = f"Unknown symbol {symbol}"
+        if self.suggestions:
+            message += f". Did you mean: {', '.join(self.suggestions)}?"
+        super().__init__(message)
+
+
+class SymbolIndex:
+    """
+    Binance trading pairs by (base asset, quote asset), loaded from a disk snapshot.
+
+    Pair lookups and validation are dictionary lookups, so a typo or a pair that
+    does not exist costs no request and no Binance weight. The list is downloaded
+    from ``/exchangeInfo`` periodically in the background. Until the first list is
+    available the index is not ``ready`` and callers ask Binance as before.
+    """
+
+    def __init__(self, path=SYMBOLS_FILE, refresh_interval=SYMBOLS_REFRESH_INTERVAL):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.fetched_at = None
+        self.loaded = False
+        self.version = 0  # Bumped whenever the list changes
+        self._task = None
+        self._set([])
+
+    def _set(self, symbols):
+        """``symbols`` is a list of [symbol, base asset, quote asset, status]."""
+        self.version += 1
+        self._symbols = {symbol: status for symbol, _, _, status in symbols}
+        self._pairs = {(base, quote): symbol for symbol, base, quote, _ in symbols}
+        self._base_of = {symbol: base for symbol, base, _, _ in symbols}
+        self._bases = {}  # Quote asset -> base assets trading against it
+        for _, base, quote, status in symbols:
+            if status == TRADING:
+                self._bases.setdefault(quote, []).append(base)
+
+    @property
+    def ready(self):
+        return bool(self._symbols)
+
+    def __len__(self):
+        return len(self._symbols)
+
+    def pairs(self):
+        """(symbol, base, quote) of every trading pair."""
+        for (base, quote), symbol in self._pairs.items():
+            if self._symbols[symbol] == TRADING:
+                yield symbol, base, quote
+
+    def tradable(self, symbol):
+        """Whether ``symbol`` trades; without a list every symbol might."""
+        return not self.ready or self._symbols.get(symbol) == TRADING
+
+    def suggest(self, base, quote="USDT"):
+        """Base assets trading against ``quote`` that look like ``base``."""
+        if base in self._base_of:  # A whole pair was given, e.g. "BTCUSDT"
+            return [self._base_of[base]]
+        return difflib.get_close_matches(
+            base, self._bases.get(quote, ()), n=MAX_SUGGESTIONS, cutoff=0.6
+        )
+
+    def unknown(self, base, quote="USDT"):
+        """
+        The UnknownSymbol error for ``base``: with the status of its pair when it
+        is listed but not trading, otherwise with similar symbols.
+        """
+        listed = self._pairs.get((base, quote))
+        if listed is not None:
+            return UnknownSymbol(base, status=self._symbols[listed])
+        return UnknownSymbol(base, self.suggest(base, quote))
+
+    # -- Snapshot ------------------------------------------------------------
+
+    def load(self):
+        """Reads the snapshot (once). Without one the index stays empty until refreshed."""
+        if self.loaded:
+            return
+        self.loaded = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._set(data["symbols"])
+        except (ValueError, KeyError) as e:
+            logging.error(f"Error decoding {self.path}: {e}")
+            return
+        self.fetched_at = data.get("fetched_at")
+
+    def _write_snapshot(self, data):
+        # Bot processes started in one directory share the snapshot
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    # -- Refreshing ----------------------------------------------------------
+
+    async def refresh(self):
+        """Downloads the symbol list and stores the snapshot. Returns the number of symbols."""
+        data = await http_client.get_json(f"{http_client.BINANCE_API}/exchangeInfo")
+        symbols = [
+            [s["symbol"], s["baseAsset"], s["quoteAsset"], s["status"]]
+            for s in data["symbols"]
+        ]
+        self._set(symbols)
+        self.fetched_at = time.time()
+        await asyncio.to_thread(
+            self._write_snapshot, {"fetched_at": self.fetched_at, "symbols": symbols}
+        )
+        return len(symbols)
+
+    def start(self):
+        """Starts the periodic refresh (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        # The download gives way to user commands when the Binance weight runs low
+        binance_limits.priority.set(binance_limits.BACKGROUND)
+        if self.fetched_at is not None:
+            # A recent snapshot does not need to be downloaded right away
+            await asyncio.sleep(
+                max(0, self.fetched_at + self.refresh_interval - time.time())
+            )
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logging.warning(f"Failed to refresh the Binance symbol list: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+
+# Index shared by the whole bot (loaded during the warm-up)
+index = SymbolIndex()
@@ -0,0 +1,4 @@
+import os
+
+# User preferences set by the tests stay in memory instead of ./preferences.db
+os.environ.setdefault("PREFERENCES_DB", ":memory:")
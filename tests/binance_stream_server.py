@@ -0,0 +1,79 @@
+import asyncio
+import json
+import os
+from aiohttp import web
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_ticks(name="binance_ticks.jsonl"):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayStreamServer:
+    """
+    Local stand-in for the Binance combined-stream WebSocket endpoint.
+
+    Handles SUBSCRIBE/UNSUBSCRIBE requests and replays recorded mini-ticker
+    events (in a loop) for the subscribed symbols, one event every ``interval`` seconds.
+    """
+
+    def __init__(self, ticks=None, interval=0.005):
+        self.ticks = ticks if ticks is not None else load_ticks()
+        self.interval = interval
+        self.requests = []  # All SUBSCRIBE/UNSUBSCRIBE messages received
+        self.connections = 0
+        self._sockets = set()
+        self._runner = None
+        self.url = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/stream", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/stream"
+        return self
+
+    async def stop(self):
+        await self.drop_connections()
+        await self._runner.cleanup()
+
+    async def drop_connections(self):
+        """Closes every client connection (simulates a Binance disconnect)."""
+        for ws in list(self._sockets):
+            await ws.close()
+
+    async def _handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        self._sockets.add(ws)
+        subscribed = set()
+        replay = asyncio.create_task(self._replay(ws, subscribed))
+        try:
+            async for msg in ws:
+                message = json.loads(msg.data)
+                self.requests.append(message)
+                streams = set(message.get("params", []))
+                if message["method"] == "SUBSCRIBE":
+                    subscribed |= streams
+                elif message["method"] == "UNSUBSCRIBE":
+                    subscribed -= streams
+                await ws.send_json({"result": None, "id": message["id"]})
+        finally:
+            replay.cancel()
+            self._sockets.discard(ws)
+        return ws
+
+    async def _replay(self, ws, subscribed):
+        while not ws.closed:
+            for tick in self.ticks:
+                stream = f"{tick['s'].lower()}@miniTicker"
+                if stream in subscribed and not ws.closed:
+                    await ws.send_json({"stream": stream, "data": tick})
+                await asyncio.sleep(self.interval)
@@ -0,0 +1,11 @@
+import pytest
+
+from src.app import preferences
+
+
+@pytest.fixture(autouse=True)
+def fresh_preferences():
+    """Every test starts with empty user preferences (a new in-memory database)."""
+    preferences.close()
+    yield
+    preferences.close()
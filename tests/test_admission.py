@@ -0,0 +1,166 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+import numpy as np
+from src.app import (
+    CommandBusy,
+    build_chart,
+    on_command_error,
+    price,
+    release_admission,
+    t,
+)
+from src.services import admission, charts
+from src.services.admission import AdmissionController, Busy, CostClass, Limit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_controller(clock, user="1,6,3", guild="3,60,10", command="10,600,100"):
+    classes = {
+        "chart": CostClass(
+            user=Limit(*map(float, user.split(","))),
+            guild=Limit(*map(float, guild.split(","))),
+            command=Limit(*map(float, command.split(","))),
+        )
+    }
+    return AdmissionController(classes, clock=clock)
+
+
+class TestAdmissionController(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_concurrency_cap_per_user(self):
+        """
+        A user can run one chart at a time; the slot is free again after release.
+        """
+        controller = make_controller(self.clock)
+        ticket = controller.admit("chart", "chart", user_id=1, guild_id=10)
+        with self.assertRaises(Busy):
+            controller.admit("chart", "chart", user_id=1, guild_id=10)
+        controller.admit("chart", "chart", user_id=2, guild_id=10).release()
+        ticket.release()
+        ticket.release()  # Releasing twice does not free a slot of somebody else
+        self.assertEqual(controller.running("user", "chart", 1), 0)
+        controller.admit("chart", "chart", user_id=1, guild_id=10).release()
+
+    def test_token_bucket_per_user(self):
+        """
+        After the burst a user gets new tokens at the configured rate.
+        """
+        controller = make_controller(self.clock)  # 6 per minute, burst of 3
+        for _ in range(3):
+            controller.admit("chart", "chart", user_id=1).release()
+        with self.assertRaises(Busy) as raised:
+            controller.admit("chart", "chart", user_id=1)
+        self.assertAlmostEqual(raised.exception.retry_after, 10)
+        self.clock.now += 10
+        controller.admit("chart", "chart", user_id=1).release()
+        self.assertEqual(controller.rejected, 1)
+
+    def test_guild_and_command_limits(self):
+        """
+        Different users share the limits of their guild and of the command.
+        """
+        controller = make_controller(self.clock, guild="2,60,10", command="3,600,100")
+        controller.admit("chart", "chart", user_id=1, guild_id=10)
+        controller.admit("chart", "chart", user_id=2, guild_id=10)
+        with self.assertRaises(Busy):
+            controller.admit("chart", "chart", user_id=3, guild_id=10)
+        controller.admit("chart", "chart", user_id=3, guild_id=20)
+        with self.assertRaises(Busy):
+            controller.admit("chart", "chart", user_id=4, guild_id=30)
+
+
+class FakeAuthor:
+    def __init__(self, id):
+        self.id = id
+
+
+class FakeCommand:
+    qualified_name = "price"
+
+
+class FakeContext:
+    def __init__(self, author_id):
+        self.author = FakeAuthor(author_id)
+        self.guild = None
+        self.command = FakeCommand()
+        self.sent_messages = []
+
+    async def send(self, message):
+        self.sent_messages.append(message)
+
+
+class TestAdmissionCheck(unittest.IsolatedAsyncioTestCase):
+    async def test_overload_gets_localized_busy_reply(self):
+        """
+        The check of !price rejects the third concurrent lookup of a user
+        and on_command_error answers with a short "try again" message.
+        """
+        controller = AdmissionController(
+            {
+                "quote": CostClass(
+                    Limit(2, 60, 10), Limit(10, 60, 10), Limit(50, 600, 100)
+                )
+            }
+        )
+        with patch.object(admission, "controller", controller):
+            contexts = [FakeContext(author_id=50) for _ in range(3)]
+            check = price.checks[0]
+            self.assertTrue(await check(contexts[0]))
+            self.assertTrue(await check(contexts[1]))
+            with self.assertRaises(CommandBusy) as raised:
+                await check(contexts[2])
+
+            await on_command_error(contexts[2], raised.exception)
+            self.assertEqual(
+                contexts[2].sent_messages,
+                [
+                    t(
+                        50,
+                        {
+                            "en": "⏳ I'm busy right now, please try again in 1 s.",
+                            "pl": "⏳ Jestem teraz zajęty, spróbuj ponownie za 1 s.",
+                        },
+                    )
+                ],
+            )
+            await release_admission(contexts[0])
+            self.assertEqual(controller.running("user", "quote", 50), 1)
+
+
+class TestChartDeduplication(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        charts.chart_cache.clear()
+
+    async def test_identical_charts_are_generated_once(self):
+        calls = []
+
+        async def fake_data(symbol, target, days, interval):
+            calls.append(symbol)
+            await asyncio.sleep(0.01)
+            return np.array([0, 1], dtype="datetime64[ms]"), [1.0, 2.0], "t", "y"
+
+        async def fake_chart(dates, prices, title, ylabel, kolor):
+            return b"png"
+
+        with patch("src.app.get_crypto_data", fake_data), patch(
+            "src.app.create_chart", fake_chart
+        ):
+            results = await asyncio.gather(
+                *(build_chart("ETH", "USDT", 365, "1h", "red") for _ in range(5))
+            )
+        self.assertEqual(results, [b"png"] * 5)
+        self.assertEqual(calls, ["ETH"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,316 @@
+import asyncio
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch, AsyncMock
+from src.app import alert, cached_alert_price, user_currency
+from src.services import alerts
+from src.services.alerts import AlertEngine, Notifier, ThresholdIndex, TooManyAlerts
+from src.services.quotes import BINANCE_TTL, quote_cache
+
+
+class FakeAuthor:
+    def __init__(self, id):
+        self.id = id
+
+
+class FakeChannel:
+    id = 555
+
+
+class FakeContext:
+    def __init__(self, author_id):
+        self.author = FakeAuthor(author_id)
+        self.channel = FakeChannel()
+        self.sent_messages = []
+
+    async def send(self, message):
+        self.sent_messages.append(message)
+
+
+class TestThresholdIndex(unittest.TestCase):
+    def test_only_crossed_thresholds_fire(self):
+        """
+        A price update returns exactly the alerts whose thresholds were crossed.
+        """
+        engine = AlertEngine(":memory:")
+        engine.add(1, None, "BTC", "USD", above=70000)
+        engine.add(1, None, "BTC", "USD", above=80000)
+        engine.add(2, None, "BTC", "USD", below=60000)
+        engine.add(2, None, "BTC", "PLN", above=1)
+
+        self.assertEqual(engine.update("BTC", "USD", 65000), [])
+        fired = engine.update("BTC", "USD", 75000)
+        self.assertEqual([a.above for a in fired], [70000])
+        self.assertEqual([a.below for a in engine.update("BTC", "USD", 50000)], [60000])
+        self.assertEqual(len(engine), 2)  # 80000 USD and the PLN alert are still active
+
+    def test_percent_alert_fires_once(self):
+        """
+        A percent-move alert fires on the first crossing in either direction and is then gone.
+        """
+        engine = AlertEngine(":memory:")
+        engine.add(
+            1, None, "ETH", "USD", above=2100, below=1900, percent=5, reference=2000
+        )
+        self.assertEqual(len(engine.update("ETH", "USD", 1850)), 1)
+        self.assertEqual(engine.update("ETH", "USD", 2200), [])
+        self.assertEqual(engine.keys(), [])
+
+    def test_left_over_entries_do_not_fire_a_newer_alert(self):
+        """
+        Entries left in the heaps by a fired or removed alert are never matched
+        to a later alert, even one stored under the same id.
+        """
+        engine = AlertEngine(":memory:")
+        engine.add(1, None, "BTC", "USD", above=100000)  # Keeps the index alive
+        engine.add(
+            1, None, "BTC", "USD", above=73500, below=66500, percent=5, reference=70000
+        )
+        self.assertEqual(len(engine.update("BTC", "USD", 74000)), 1)
+        newer = engine.add(1, None, "BTC", "USD", above=80000)
+
+        self.assertEqual(engine.update("BTC", "USD", 66000), [])
+        self.assertEqual(engine.update("BTC", "USD", 81000), [newer])
+
+    def test_many_alerts_match_linear_scan(self):
+        """
+        With 100k alerts the heaps fire the same alerts as scanning all of them,
+        and removed alerts are never returned.
+        """
+        rng = random.Random(7)
+        engine = AlertEngine(":memory:", max_per_user=10**6)
+        for user in range(100_000):
+            if user % 2:
+                engine.add(user, None, "BTC", "USD", above=rng.uniform(50000, 90000))
+            else:
+                engine.add(user, None, "BTC", "USD", below=rng.uniform(30000, 70000))
+        for user in range(0, 100_000, 3):
+            engine.remove(user, user + 1)  # Alert ids start at 1
+
+        for price in (60000, 52000, 81000, 40000):
+            expected = {
+                a.id
+                for a in engine._indexes[("BTC", "USD")].alerts.values()
+                if (a.above is not None and a.above <= price)
+                or (a.below is not None and a.below >= price)
+            }
+            fired = {a.id for a in engine.update("BTC", "USD", price)}
+            self.assertEqual(fired, expected)
+
+    def test_index_rebuilds_when_mostly_removed(self):
+        index = ThresholdIndex()
+        engine = AlertEngine(":memory:", max_per_user=10**6)
+        for i in range(1000):
+            alert = engine.add(1, None, "BTC", "USD", above=i)
+            index.add(alert)
+        for i in range(1, 1000):
+            index.remove(i)
+        self.assertLess(len(index._above), 200)
+        self.assertEqual([a.id for a in index.pop_triggered(10**6)], [1000])
+
+
+class TestAlertEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "alerts.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_alerts_persist_across_restarts(self):
+        """
+        Active alerts are loaded by a new engine; fired and removed ones are not.
+        """
+        engine = AlertEngine(self.path)
+        kept = engine.add(1, 10, "BTC", "USD", above=70000)
+        removed = engine.add(1, 10, "BTC", "USD", below=50000)
+        engine.add(2, 20, "ETH", "PLN", above=100)
+        engine.remove(1, removed.id)
+        engine.update("ETH", "PLN", 200)
+        engine.close()
+
+        restarted = AlertEngine(self.path)
+        restarted.load()
+        self.assertEqual([a.id for a in restarted.for_user(1)], [kept.id])
+        self.assertEqual(restarted.for_user(2), [])
+        self.assertEqual(restarted.keys(), [("BTC", "USD")])
+        restarted.close()
+
+    def test_reading_does_not_create_database(self):
+        engine = AlertEngine(self.path)
+        engine.load()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_per_user_limit(self):
+        engine = AlertEngine(":memory:", max_per_user=2)
+        engine.add(1, None, "BTC", "USD", above=1)
+        engine.add(1, None, "BTC", "USD", above=2)
+        with self.assertRaises(TooManyAlerts):
+            engine.add(1, None, "BTC", "USD", above=3)
+        engine.add(2, None, "BTC", "USD", above=3)  # Other users are not affected
+
+
+class TestRateUpdates(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "alerts.db")
+        self.engine = AlertEngine(self.path, check_interval=3600)
+        self.addCleanup(self.engine.close)
+        self.prices = {("BTC", "USD"): 65000.0, ("ETH", "USD"): 2000.0}
+        self.notified = []
+
+        def quote(symbol, currency):
+            rate_key = ("ticker", symbol + "USDT")
+            return self.prices.get((symbol, currency)), [rate_key]
+
+        self.engine.start(AsyncMock(return_value={}), self.notified.extend, quote)
+
+    async def test_alerts_are_checked_on_rate_updates(self):
+        """
+        An update of a rate an alert is priced with checks it right away, without
+        waiting for the periodic fetch; other updates check nothing.
+        """
+        btc = self.engine.add(1, 10, "BTC", "USD", above=70000)
+        self.engine.add(1, 10, "ETH", "USD", above=2500)
+
+        self.prices["BTC", "USD"] = self.prices["ETH", "USD"] = 80000.0
+        self.engine.rate_updated(("ticker", "BTCUSDT"))
+        self.engine.rate_updated(("ticker", "BTCUSDT"))
+        self.engine.rate_updated(("ticker", "SOLUSDT"))
+        await asyncio.sleep(0)
+
+        self.assertEqual(self.notified, [(btc, 80000.0)])
+        self.assertEqual(self.engine.keys(), [("ETH", "USD")])
+
+    async def test_changes_are_written_in_batches_off_the_loop(self):
+        kept = self.engine.add(1, 10, "BTC", "USD", above=70000)
+        removed = self.engine.add(1, 10, "BTC", "USD", below=60000)
+        self.engine.remove(1, removed.id)
+        self.assertFalse(os.path.exists(self.path))
+
+        await self.engine.flush()
+        restarted = AlertEngine(self.path)
+        self.addCleanup(restarted.close)
+        restarted.load()
+
+        self.assertEqual([a.id for a in restarted.for_user(1)], [kept.id])
+        self.assertEqual(restarted.add(1, 10, "ETH", "USD", above=1).id, 3)
+
+
+class TestNotifier(unittest.IsolatedAsyncioTestCase):
+    async def test_alerts_are_grouped_and_rate_limited(self):
+        """
+        Alerts fired together for one user are delivered in a single message,
+        and messages are spaced according to the rate.
+        """
+        sent = []
+
+        async def send(user_id, channel_id, batch):
+            sent.append((user_id, asyncio.get_running_loop().time(), len(batch)))
+
+        engine = AlertEngine(":memory:")
+        for user in (1, 1, 1, 2):
+            engine.add(user, 10, "BTC", "USD", above=100)
+        notifier = Notifier(send, rate=20)
+        notifier.start()
+        notifier.notify([(a, 150) for a in engine.update("BTC", "USD", 150)])
+        while notifier.sent < 2:
+            await asyncio.sleep(0.01)
+        notifier._task.cancel()
+
+        self.assertEqual([(user, n) for user, _, n in sent], [(1, 3), (2, 1)])
+        self.assertGreaterEqual(sent[1][1] - sent[0][1], 0.04)
+
+    async def test_alerts_fired_before_start_are_delivered(self):
+        sent = []
+        notifier = Notifier(AsyncMock(side_effect=lambda *a: sent.append(a)), rate=20)
+        engine = AlertEngine(":memory:")
+        engine.add(1, 10, "BTC", "USD", above=100)
+        notifier.notify([(a, 150) for a in engine.update("BTC", "USD", 150)])
+
+        notifier.start()
+        while notifier.sent < 1:
+            await asyncio.sleep(0.01)
+        notifier._task.cancel()
+
+        self.assertEqual([(user, channel) for user, channel, _ in sent], [(1, 10)])
+
+    async def test_check_fetches_prices_once_for_all_keys(self):
+        engine = AlertEngine(":memory:")
+        engine.add(1, None, "BTC", "USD", above=100)
+        engine.add(1, None, "ETH", "EUR", below=10)
+        fetch = AsyncMock(return_value={("BTC", "USD"): 150, ("ETH", "EUR"): 20})
+        notified = []
+
+        fired = await engine.check(fetch, notified.extend)
+
+        fetch.assert_awaited_once()
+        self.assertCountEqual(
+            fetch.await_args.args[0], [("BTC", "USD"), ("ETH", "EUR")]
+        )
+        self.assertEqual([(a.symbol, price) for a, price in fired], [("BTC", 150)])
+        self.assertEqual(notified, fired)
+
+
+class TestAlertCommand(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        quote_cache.clear()
+        user_currency.pop(30, None)
+        # Keep the alerts created by the tests in memory instead of alerts.db
+        alerts.engine.close()
+        self.addCleanup(setattr, alerts.engine, "path", alerts.engine.path)
+        self.addCleanup(alerts.engine.close)
+        alerts.engine.path = ":memory:"
+
+    @patch("src.app.http_client.get_json", new_callable=AsyncMock)
+    async def test_set_list_and_remove_alerts(self, mock_get_json):
+        mock_get_json.return_value = [{"symbol": "BTCUSDT", "price": "65000"}]
+        ctx = FakeContext(author_id=30)
+
+        await alert(ctx, "btc", ">", "70000")
+        await alert(ctx, "BTC", "5%")
+        self.assertTrue(
+            ctx.sent_messages[0].startswith("🔔 Alert #1 set: BTC > 70,000.00 USD")
+        )
+        self.assertIn("BTC ±5% (from 65,000.00 USD)", ctx.sent_messages[1])
+
+        await alert(ctx)
+        self.assertIn("#1: BTC > 70,000.00 USD", ctx.sent_messages[2])
+        self.assertIn("#2: BTC ±5%", ctx.sent_messages[2])
+
+        await alert(ctx, "remove", "1")
+        self.assertTrue(ctx.sent_messages[3].startswith("✅ Alert removed"))
+        self.assertEqual([a.id for a in alerts.engine.for_user(30)], [2])
+        self.assertEqual(
+            mock_get_json.await_count, 1
+        )  # The second price came from the cache
+
+    async def test_cached_prices_check_the_alerts(self):
+        """
+        A price stored in the quote cache (by any command or the prefetching)
+        fires the alerts priced with it.
+        """
+        notified = []
+        alerts.engine.start(
+            AsyncMock(return_value={}), notified.extend, cached_alert_price
+        )
+        above = alerts.engine.add(30, 555, "BTC", "USD", above=70000)
+
+        quote_cache.set(("ticker", "BTCUSDT"), 71000.0, BINANCE_TTL)
+        await asyncio.sleep(0)
+
+        self.assertEqual(notified, [(above, 71000.0)])
+
+    @patch("src.app.http_client.get_json", new_callable=AsyncMock)
+    async def test_invalid_alert_shows_usage(self, mock_get_json):
+        ctx = FakeContext(author_id=30)
+        await alert(ctx, "BTC", "=", "5")
+        self.assertIn("Usage", ctx.sent_messages[0])
+        mock_get_json.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()
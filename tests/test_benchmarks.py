@@ -0,0 +1,87 @@
+import io
+import unittest
+from contextlib import redirect_stderr
+from benchmarks import run
+from benchmarks.replay import ReplayUpstream
+from src.services import candles, quotes
+
+
+class TestReplayUpstream(unittest.IsolatedAsyncioTestCase):
+    async def test_overlapping_kline_pages_agree(self):
+        """
+        Klines are replayed onto any window; the same candle is identical in every page.
+        """
+        upstream = ReplayUpstream()
+        url = "https://api.binance.com/api/v3/klines"
+        step = 3600 * 1000
+        first = await upstream.get_json(
+            url,
+            {
+                "symbol": "BTCUSDT",
+                "interval": "1h",
+                "startTime": 0,
+                "endTime": 9 * step,
+            },
+        )
+        second = await upstream.get_json(
+            url,
+            {"symbol": "BTCUSDT", "interval": "1h", "startTime": 5 * step, "limit": 3},
+        )
+        self.assertEqual(len(first), 10)
+        self.assertEqual(first[5:8], second)
+
+    async def test_unknown_symbol_is_rejected_like_binance(self):
+        with self.assertRaises(Exception) as raised:
+            await ReplayUpstream().get_json(
+                "https://api.binance.com/api/v3/ticker/price?symbol=NOPEUSDT"
+            )
+        self.assertEqual(raised.exception.status, 400)
+
+
+class TestBenchmarkRun(unittest.IsolatedAsyncioTestCase):
+    async def test_price_benchmarks_run_offline(self):
+        """
+        A short run drives the real !price command through the replayed upstream,
+        without errors, and puts the bot's stores back afterwards.
+        """
+        store = candles.store
+        quotes.quote_cache.clear()
+        with redirect_stderr(io.StringIO()):
+            results, requests = await run.run_benchmarks(ops=8, latency=0, only="price")
+        self.assertIn("price.crypto@c8", results)
+        self.assertIn("price.fiat@c1", results)
+        self.assertGreater(requests, 0)
+        for result in results.values():
+            self.assertEqual(result["errors"], 0)
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        self.assertIs(candles.store, store)
+
+    def test_regressions_are_reported_against_the_baseline(self):
+        baseline = {
+            "a": {"p50_ms": 10.0, "throughput": 100.0},
+            "b": {"p50_ms": 10.0, "throughput": 100.0},
+            "c": {"p50_ms": 0.01, "throughput": 1e5},
+        }
+        results = {
+            "a": {"p50_ms": 11.0, "throughput": 90.0},
+            "b": {"p50_ms": 20.0, "throughput": 50.0},
+            "c": {
+                "p50_ms": 0.02,
+                "throughput": 5e4,
+            },  # Doubled, but below the noise floor
+            "new": {"p50_ms": 1.0, "throughput": 1.0},
+        }
+        comparison, regressions = run.compare(results, baseline, threshold=0.25)
+        self.assertEqual(regressions, ["b"])
+        self.assertAlmostEqual(comparison["a"]["p50_change"], 0.1)
+        self.assertNotIn("new", comparison)
+
+    def test_import_time_is_broken_down_by_package(self):
+        total, packages = run.import_times("json")
+        self.assertGreater(total, 0)
+        self.assertIn("json", packages)
+        self.assertLessEqual(packages["json"], total)
+
+
+if __name__ == "__main__":
+    unittest.main()
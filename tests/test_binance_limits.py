@@ -0,0 +1,152 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+from aiohttp import web
+from src.services import binance_limits, http_client
+from src.services.binance_limits import (
+    BACKGROUND,
+    BULK,
+    INTERACTIVE,
+    RateLimited,
+    WeightLimiter,
+    request_weight,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 60_000.0  # Start of a minute
+
+    def __call__(self):
+        return self.now
+
+
+class TestRequestWeight(unittest.TestCase):
+    def test_weights_follow_binance_documentation(self):
+        api = "https://api.binance.com/api/v3"
+        self.assertEqual(request_weight(f"{api}/ticker/price?symbol=BTCUSDT"), 2)
+        self.assertEqual(
+            request_weight(f"{api}/ticker/price", {"symbols": '["BTCUSDT"]'}), 4
+        )
+        pairs = [f"PAIR{i}USDT" for i in range(150)]
+        for count, weight in ((20, 4), (21, 40), (100, 40), (150, 80)):
+            params = {"symbols": json.dumps(pairs[:count])}
+            self.assertEqual(request_weight(f"{api}/ticker/price", params), weight)
+        self.assertEqual(request_weight(f"{api}/ticker/price"), 80)
+        self.assertEqual(request_weight(f"{api}/klines", {"limit": 2}), 1)
+        self.assertEqual(request_weight(f"{api}/klines", {"limit": 1000}), 5)
+        self.assertEqual(request_weight(f"{api}/exchangeInfo"), 20)
+
+
+class TestWeightLimiter(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = WeightLimiter(limit=100, clock=self.clock)
+
+    async def test_background_requests_leave_room_for_users(self):
+        """
+        Background work may only use half of the budget and is shed beyond it,
+        while user commands can still use the rest.
+        """
+        for _ in range(10):
+            await self.limiter.acquire(5, BACKGROUND)
+        with self.assertRaises(RateLimited):
+            await self.limiter.acquire(5, BACKGROUND)
+        await self.limiter.acquire(45, INTERACTIVE)
+        self.assertEqual(self.limiter.used, 95)
+        self.assertEqual(self.limiter.shed, 1)
+
+    async def test_large_ticker_batch_uses_its_real_weight(self):
+        params = {"symbols": json.dumps([f"PAIR{i}USDT" for i in range(150)])}
+        weight = request_weight("https://api.binance.com/api/v3/ticker/price", params)
+        await self.limiter.acquire(weight, INTERACTIVE)
+        self.assertEqual(self.limiter.used, 80)
+        with self.assertRaises(RateLimited):
+            await self.limiter.acquire(weight, BACKGROUND)
+
+    async def test_used_weight_header_is_authoritative(self):
+        self.limiter.update(200, {"X-MBX-USED-WEIGHT-1M": "99"})
+        with patch.dict(binance_limits.MAX_WAIT, {INTERACTIVE: 0}):
+            with self.assertRaises(RateLimited):
+                await self.limiter.acquire(2, INTERACTIVE)
+        self.clock.now += 60  # A new minute starts with an empty budget
+        await self.limiter.acquire(2, INTERACTIVE)
+        self.assertEqual(self.limiter.used, 2)
+
+    async def test_ban_stops_all_requests_until_retry_after(self):
+        self.limiter.update(429, {"Retry-After": "30"})
+        with self.assertRaises(RateLimited) as raised:
+            await self.limiter.acquire(1, INTERACTIVE)
+        self.assertEqual(raised.exception.retry_after, 30)
+        self.clock.now += 31
+        await self.limiter.acquire(1, INTERACTIVE)
+
+    async def test_queued_requests_are_admitted_by_priority(self):
+        """
+        When the budget is used up, waiting requests are admitted at the next
+        minute with user commands ahead of bulk downloads.
+        """
+        self.limiter.update(200, {"X-MBX-USED-WEIGHT-1M": "100"})
+        admitted = []
+
+        async def request(name, weight, prio):
+            await self.limiter.acquire(weight, prio)
+            admitted.append(name)
+
+        with patch.dict(binance_limits.MAX_WAIT, {INTERACTIVE: 120, BULK: 120}):
+            bulk = asyncio.create_task(request("bulk", 70, BULK))
+            await asyncio.sleep(0)
+            user = asyncio.create_task(request("user", 40, INTERACTIVE))
+            await asyncio.sleep(0)
+
+            self.clock.now += 60
+            self.limiter._drain_handle.cancel()
+            self.limiter._drain()
+            await asyncio.sleep(0)
+            self.assertEqual(admitted, ["user"])  # 40 + 70 would exceed the bulk share
+
+            self.clock.now += 60
+            self.limiter._drain_handle.cancel()
+            self.limiter._drain()
+            await asyncio.gather(bulk, user)
+        self.assertEqual(admitted, ["user", "bulk"])
+
+
+class TestHttpClientWeights(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        async def ticker(request):
+            return web.json_response(
+                {"symbol": "BTCUSDT", "price": "50000"},
+                headers={"X-MBX-USED-WEIGHT-1M": "1234"},
+            )
+
+        app = web.Application()
+        app.router.add_get("/api/v3/ticker/price", ticker)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.api = f"http://127.0.0.1:{port}/api/v3"
+        self.client = http_client.HttpClient()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.runner.cleanup()
+
+    async def test_binance_responses_update_the_limiter(self):
+        limiter = WeightLimiter()
+        with patch.object(http_client, "BINANCE_API", self.api), patch.object(
+            binance_limits, "limiter", limiter
+        ):
+            await self.client.get_json(f"{self.api}/ticker/price?symbol=BTCUSDT")
+            self.assertEqual(limiter.used, 1234)
+
+            limiter.update(418, {"Retry-After": "120"})
+            with self.assertRaises(RateLimited):
+                await self.client.get_json(f"{self.api}/ticker/price?symbol=BTCUSDT")
+
+
+if __name__ == "__main__":
+    unittest.main()
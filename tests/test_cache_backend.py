@@ -0,0 +1,141 @@
+import asyncio
+import os
+import tempfile
+import unittest
+import uuid
+from unittest.mock import patch, AsyncMock
+from src.app import bot, check_unsharded_stores, shard_config, shard_path
+from discord.ext import commands
+from src.services import cache_backend, candles
+from src.services.cache import QuoteCache
+from src.services.cache_backend import CacheBackend, MemoryBackend
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+REDIS_TEST_URL = os.getenv("REDIS_TEST_URL", "redis://localhost:6379/15")
+
+
+class TestSharding(unittest.TestCase):
+    def test_bot_is_auto_sharded(self):
+        self.assertIsInstance(bot, commands.AutoShardedBot)
+
+    def test_shard_settings_are_validated(self):
+        self.assertEqual(shard_config(None, None), (None, None))
+        self.assertEqual(shard_config("4", "0,1"), (4, [0, 1]))
+        with self.assertRaisesRegex(ValueError, "SHARD_IDS needs SHARD_COUNT"):
+            shard_config(None, "0,1")
+        with self.assertRaises(ValueError):
+            shard_config("2", "2")
+
+    def test_each_process_keeps_its_own_local_stores(self):
+        self.assertEqual(
+            shard_path("favorites.json", [0, 1]), "favorites-shards-0-1.json"
+        )
+        self.assertEqual(shard_path("alerts.db", [2]), "alerts-shards-2.db")
+        self.assertEqual(shard_path("alerts.db", None), "alerts.db")
+        self.assertEqual(shard_path(":memory:", [0]), ":memory:")
+
+    def test_shards_refuse_to_start_next_to_unsharded_stores(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy = os.path.join(tmp, "favorites.json")
+            missing = os.path.join(tmp, "alerts.db")
+            check_unsharded_stores([missing], [0])
+            open(legacy, "w").close()
+            check_unsharded_stores([legacy], None)
+            with self.assertRaisesRegex(ValueError, "favorites-shards-0.json"):
+                check_unsharded_stores([legacy, missing], [0])
+
+    def test_backends_implement_the_whole_interface(self):
+        class Incomplete(CacheBackend):
+            async def get_entry(self, key):
+                return None
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+class SharedTierTests:
+    """Two QuoteCaches stand for two bot processes using one shared tier."""
+
+    async def make_backend(self):
+        raise NotImplementedError
+
+    async def asyncSetUp(self):
+        self.backend = await self.make_backend()
+        self.shard_a = QuoteCache(backend=self.backend)
+        self.shard_b = QuoteCache(backend=self.backend)
+
+    async def test_only_one_process_fetches_a_key(self):
+        """
+        Concurrent misses in two processes lead to a single upstream fetch.
+        """
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 50000.0
+
+        results = await asyncio.gather(
+            *(
+                cache.get_or_fetch(("ticker", "BTCUSDT"), 5, fetch)
+                for cache in (self.shard_a, self.shard_b, self.shard_a, self.shard_b)
+            )
+        )
+        self.assertEqual(results, [50000.0] * 4)
+        self.assertEqual(len(calls), 1)
+        # The value keeps the remaining lifetime from the shared tier
+        self.assertLessEqual(self.shard_b.expires_in(("ticker", "BTCUSDT")), 5)
+
+    async def test_values_set_in_one_process_are_found_by_another(self):
+        self.shard_a.set(("fx", "USD", "PLN"), 4.0, 60)
+        await asyncio.gather(*self.shard_a._writes)
+        found = await self.shard_b.get_shared(
+            [("fx", "USD", "PLN"), ("fx", "USD", "EUR")]
+        )
+        self.assertEqual(found, {("fx", "USD", "PLN"): 4.0})
+        self.assertEqual(self.shard_b.get(("fx", "USD", "PLN")), 4.0)
+
+
+class TestMemoryBackend(SharedTierTests, unittest.IsolatedAsyncioTestCase):
+    async def make_backend(self):
+        return MemoryBackend()
+
+    async def test_kline_pages_are_downloaded_once(self):
+        """
+        With a shared tier, a kline page downloaded by one process is reused by the others.
+        """
+        with patch.object(cache_backend, "shared", self.backend), patch(
+            "src.services.candles.http_client.get_json", new_callable=AsyncMock
+        ) as mock_get_json:
+            mock_get_json.return_value = [[0, "1", "1", "1", "1", "1", 59999]]
+            first = await candles.fetch_klines("BTCUSDT", "1m", 0, 59999, 1)
+            second = await candles.fetch_klines("BTCUSDT", "1m", 0, 59999, 1)
+        self.assertEqual(first, second)
+        mock_get_json.assert_awaited_once()
+
+
+@unittest.skipIf(redis is None, "redis package not installed")
+class TestRedisBackend(SharedTierTests, unittest.IsolatedAsyncioTestCase):
+    async def make_backend(self):
+        client = redis.from_url(REDIS_TEST_URL)
+        try:
+            await client.ping()
+        except Exception:
+            self.skipTest(f"no Redis server at {REDIS_TEST_URL}")
+        finally:
+            await client.aclose()
+        # A unique prefix keeps test runs apart
+        return cache_backend.RedisBackend(
+            REDIS_TEST_URL, prefix=f"test-{uuid.uuid4().hex}:"
+        )
+
+    async def asyncTearDown(self):
+        await self.backend.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, AsyncMock
+from src.services.candles import CandleStore, fetch_klines_range
+from src.services.intervals import HOUR_MS
+
+NOW_MS = 1_700_000_000_000 // HOUR_MS * HOUR_MS + 30 * 60 * 1000  # Half past the hour
+
+
+def make_klines(start_ms, count):
+    return [
+        [t, "1", "2", "0.5", str(t // HOUR_MS), "10", t + HOUR_MS - 1]
+        for t in range(start_ms, start_ms + count * HOUR_MS, HOUR_MS)
+    ]
+
+
+class FakeBinance:
+    """Serves hourly klines up to the current candle, like /api/v3/klines."""
+
+    def __init__(self, now_ms, listed_ms=0):
+        self.now_ms = now_ms
+        self.listed_ms = listed_ms  # No klines before the pair was listed
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get_json(self, url, params=None):
+        self.calls.append(dict(params))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        current_open = self.now_ms // HOUR_MS * HOUR_MS
+        start = -(-max(params["startTime"], self.listed_ms) // HOUR_MS) * HOUR_MS
+        end = min(params["endTime"], current_open)
+        count = max(0, (end - start) // HOUR_MS + 1)
+        return make_klines(start, min(count, params["limit"]))
+
+
+class TestCandleStore(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "candles.db")
+        self.store = CandleStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    @patch("src.services.candles.http_client.get_json", new_callable=AsyncMock)
+    async def test_second_request_fetches_only_new_candles(self, mock_get_json):
+        """
+        The first request downloads the whole window; a later one only asks Binance
+        for candles since the last stored open time and still returns the full window.
+        """
+        binance = FakeBinance(NOW_MS)
+        mock_get_json.side_effect = binance.get_json
+
+        first = await self.store.get_klines("BTCUSDT", "1h", 48, now_ms=NOW_MS)
+        self.assertEqual(len(first), 48)
+        self.assertEqual(len(binance.calls), 1)
+
+        binance.now_ms = NOW_MS + 3 * HOUR_MS
+        second = await self.store.get_klines("BTCUSDT", "1h", 48, now_ms=binance.now_ms)
+        self.assertEqual(binance.calls[1]["startTime"], first[-1][0])
+        self.assertEqual(len(second), 48)
+        self.assertEqual(second[-1][0], first[-1][0] + 3 * HOUR_MS)
+        self.assertEqual([k[0] for k in second], sorted({k[0] for k in second}))
+
+    @patch("src.services.candles.http_client.get_json", new_callable=AsyncMock)
+    async def test_stored_candles_survive_restart_and_upstream_errors(
+        self, mock_get_json
+    ):
+        """
+        Candles persist on disk, so a new store instance can serve them even when Binance fails.
+        """
+        mock_get_json.side_effect = FakeBinance(NOW_MS).get_json
+        await self.store.get_klines("ETHUSDT", "1h", 24, now_ms=NOW_MS)
+        self.store.close()
+
+        restarted = CandleStore(self.path)
+        mock_get_json.side_effect = TimeoutError("Binance is slow")
+        klines = await restarted.get_klines("ETHUSDT", "1h", 24, now_ms=NOW_MS)
+        restarted.close()
+        self.assertEqual(len(klines), 24)
+
+    @patch("src.services.candles.http_client.get_json", new_callable=AsyncMock)
+    async def test_history_start_survives_restart(self, mock_get_json):
+        """
+        Candles older than a recent listing are not asked for again after a restart.
+        """
+        binance = FakeBinance(NOW_MS, listed_ms=NOW_MS - 10 * HOUR_MS)
+        mock_get_json.side_effect = binance.get_json
+        await self.store.get_klines("NEWUSDT", "1h", 48, now_ms=NOW_MS)
+        self.store.close()
+
+        self.store = CandleStore(self.path)
+        klines = await self.store.get_klines("NEWUSDT", "1h", 48, now_ms=NOW_MS)
+
+        self.assertEqual(len(klines), 10)
+        self.assertEqual(len(binance.calls), 2)
+        self.assertEqual(binance.calls[1]["startTime"], klines[-1][0])
+
+    @patch("src.services.candles.http_client.get_json", new_callable=AsyncMock)
+    async def test_old_candles_are_deleted_past_the_retention(self, mock_get_json):
+        """
+        Only the last ``retention`` candles of an interval stay stored, unless the
+        requested window is longer.
+        """
+        binance = FakeBinance(NOW_MS)
+        mock_get_json.side_effect = binance.get_json
+        self.store.close()
+        self.store = CandleStore(self.path, retention={"1h": 24})
+
+        await self.store.get_klines("BTCUSDT", "1h", 48, now_ms=NOW_MS)
+        later = NOW_MS + 5 * HOUR_MS
+        binance.now_ms = later
+        klines = await self.store.get_klines("BTCUSDT", "1h", 12, now_ms=later)
+
+        first, last, history_start = self.store._bounds("BTCUSDT", "1h")
+        self.assertEqual(len(klines), 12)
+        self.assertEqual((last - first) // HOUR_MS + 1, 24)
+        self.assertEqual(history_start, first)
+
+    @patch("src.services.candles.http_client.get_json", new_callable=AsyncMock)
+    async def test_stale_history_is_not_joined_to_a_later_window(self, mock_get_json):
+        """
+        When the stored candles end before the requested window, they are dropped
+        rather than counted as history, so a later, larger window has no gap.
+        """
+        binance = FakeBinance(NOW_MS)
+        mock_get_json.side_effect = binance.get_json
+        await self.store.get_klines("BTCUSDT", "1h", 10, now_ms=NOW_MS)
+
+        later = NOW_MS + 20 * HOUR_MS
+        binance.now_ms = later
+        await self.store.get_klines("BTCUSDT", "1h", 5, now_ms=later)
+        klines = await self.store.get_klines("BTCUSDT", "1h", 30, now_ms=later)
+
+        open_times = [k[0] for k in klines]
+        self.assertEqual(len(klines), 30)
+        self.assertEqual(open_times, list(range(open_times[0], later, HOUR_MS)))
+
+    @patch("src.services.candles.http_client.get_json", new_callable=AsyncMock)
+    async def test_unknown_pair_error_is_raised(self, mock_get_json):
+        """
+        Without stored candles, upstream errors (e.g. an invalid pair) are propagated.
+        """
+        mock_get_json.side_effect = ValueError("Invalid symbol")
+        with self.assertRaises(ValueError):
+            await self.store.get_klines("BTCXYZ", "1h", 24, now_ms=NOW_MS)
+
+
+class TestFetchKlinesRange(unittest.IsolatedAsyncioTestCase):
+    @patch("src.services.candles.http_client.get_json", new_callable=AsyncMock)
+    async def test_long_range_is_paginated_concurrently(self, mock_get_json):
+        """
+        2500 hourly candles (more than the 1000-kline cap) are fetched as 3 concurrent pages
+        and stitched into one ordered series without gaps or duplicates.
+        """
+        binance = FakeBinance(NOW_MS)
+        mock_get_json.side_effect = binance.get_json
+        end = NOW_MS // HOUR_MS * HOUR_MS
+        start = end - 2499 * HOUR_MS
+
+        klines = await fetch_klines_range("BTCUSDT", "1h", start, end, concurrency=2)
+
+        self.assertEqual(len(binance.calls), 3)
+        self.assertEqual(binance.max_in_flight, 2)
+        self.assertEqual([k[0] for k in klines], list(range(start, end + 1, HOUR_MS)))
+
+
+if __name__ == "__main__":
+    unittest.main()
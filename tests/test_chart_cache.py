@@ -0,0 +1,101 @@
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch, AsyncMock
+from src.app import wykres, user_currency
+from src.services.cache import ByteLRUCache
+from src.services.charts import chart_cache
+from src.services.intervals import candle_bounds
+
+
+def utc_ms(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+class FakeAuthor:
+    def __init__(self, id):
+        self.id = id
+
+
+class FakeContext:
+    def __init__(self, author_id):
+        self.author = FakeAuthor(author_id)
+        self.sent = []
+
+    async def send(self, content=None, file=None):
+        self.sent.append(file if file is not None else content)
+
+
+class TestByteLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used_over_budget(self):
+        """
+        Adding an entry over the byte budget evicts the least recently used entries.
+        """
+        cache = ByteLRUCache(max_bytes=10, clock=lambda: 0)
+        cache.set("a", b"1234", expires_at=100)
+        cache.set("b", b"1234", expires_at=100)
+        cache.get("a")
+        cache.set("c", b"1234", expires_at=100)
+        self.assertEqual(cache.get("a"), b"1234")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.memory_usage, 8)
+
+    def test_entry_expires_at_given_time(self):
+        """
+        An entry is dropped once its absolute expiry time is reached.
+        """
+        now = [0]
+        cache = ByteLRUCache(max_bytes=100, clock=lambda: now[0])
+        cache.set("k", b"png", expires_at=60)
+        now[0] = 59
+        self.assertEqual(cache.get("k"), b"png")
+        now[0] = 60
+        self.assertIsNone(cache.get("k"))
+        self.assertEqual(cache.memory_usage, 0)
+
+
+class TestCandleBounds(unittest.TestCase):
+    def test_hourly_candle(self):
+        now = utc_ms(2024, 5, 10, 13, 42)
+        self.assertEqual(
+            candle_bounds("1h", now), (utc_ms(2024, 5, 10, 13), utc_ms(2024, 5, 10, 14))
+        )
+
+    def test_weekly_candle_opens_on_monday(self):
+        now = utc_ms(2024, 5, 10, 13, 42)  # Friday
+        self.assertEqual(
+            candle_bounds("1w", now), (utc_ms(2024, 5, 6), utc_ms(2024, 5, 13))
+        )
+
+    def test_monthly_candle(self):
+        now = utc_ms(2024, 12, 10)
+        self.assertEqual(
+            candle_bounds("1M", now), (utc_ms(2024, 12, 1), utc_ms(2025, 1, 1))
+        )
+
+
+class TestChartCommandCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        chart_cache.clear()
+        user_currency.pop(30, None)
+
+    @patch("src.app.create_chart", new_callable=AsyncMock)
+    @patch("src.app.get_crypto_data", new_callable=AsyncMock)
+    async def test_repeated_chart_is_served_from_cache(self, mock_data, mock_chart):
+        """
+        Asking for the same chart twice within one candle fetches data and renders only once.
+        """
+        mock_data.return_value = ([1, 2], [1.0, 2.0], "title", "ylabel")
+        mock_chart.return_value = b"\x89PNG-fake"
+        ctx = FakeContext(author_id=30)
+
+        await wykres(ctx, "btc", "usdt", "30d", "1h")
+        await wykres(ctx, "btc", "usdt", "30d", "1h")
+
+        self.assertEqual(mock_data.await_count, 1)
+        self.assertEqual(mock_chart.await_count, 1)
+        self.assertEqual(len(ctx.sent), 2)
+        self.assertEqual(chart_cache.stats()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import subprocess
+import sys
+import unittest
+from datetime import datetime, timedelta
+from src.services.charts import ChartRenderer, RenderQueueFull, render_png
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+# What a spawned render worker of "python main.py" imports before rendering
+WORKER_IMPORTS = """
+import runpy, sys
+runpy.run_path("main.py", run_name="__mp_main__")
+import services.render_worker
+print(",".join(m for m in ("app", "discord", "aiohttp", "services.cache_backend") if m in sys.modules))
+"""
+
+
+def sample_series(n=30):
+    start = datetime(2024, 1, 1)
+    return [start + timedelta(days=i) for i in range(n)], [float(i) for i in range(n)]
+
+
+class TestRenderPng(unittest.TestCase):
+    def test_render_png_returns_png_bytes(self):
+        """
+        render_png should produce a PNG image without using pyplot.
+        """
+        dates, prices = sample_series()
+        png = render_png(dates, prices, "BTC/USDT", "Price (USDT)", "royalblue")
+        self.assertTrue(png.startswith(PNG_SIGNATURE))
+
+    def test_workers_do_not_import_the_bot(self):
+        """
+        A spawned worker imports the main module again; main.py must not build the
+        bot, its stores or the shared cache there.
+        """
+        result = subprocess.run(
+            [sys.executable, "-c", WORKER_IMPORTS],
+            cwd=SRC_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(result.stdout.strip(), "")
+
+
+class TestChartRenderer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.renderer = ChartRenderer(workers=1, max_queue=1)
+
+    async def asyncTearDown(self):
+        self.renderer.close()
+
+    async def test_render_in_worker_process(self):
+        """
+        The renderer should return PNG bytes produced in the process pool.
+        """
+        dates, prices = sample_series()
+        png = await self.renderer.render(dates, prices, "title", "ylabel", "red")
+        self.assertTrue(png.startswith(PNG_SIGNATURE))
+        self.assertEqual(self.renderer.queue_depth, 0)
+
+    async def test_render_rejects_requests_over_queue_limit(self):
+        """
+        With a queue limit of 1, a second concurrent render is rejected immediately.
+        """
+        dates, prices = sample_series()
+        results = await asyncio.gather(
+            self.renderer.render(dates, prices, "a", "", "red"),
+            self.renderer.render(dates, prices, "b", "", "red"),
+            return_exceptions=True,
+        )
+        self.assertTrue(results[0].startswith(PNG_SIGNATURE))
+        self.assertIsInstance(results[1], RenderQueueFull)
+
+
+if __name__ == "__main__":
+    unittest.main()
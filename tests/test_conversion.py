@@ -0,0 +1,164 @@
+import json
+import unittest
+from unittest.mock import patch, AsyncMock
+from src.app import price, user_currency
+from src.services import conversion, prefetch, symbols
+from src.services.conversion import ConversionEngine, NoConversion
+from src.services.quotes import BINANCE_TTL, quote_cache
+from src.services.symbols import SymbolIndex, UnknownSymbol
+
+
+class FakeAuthor:
+    def __init__(self, id):
+        self.id = id
+
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+        self.id = 9998
+
+    async def add_reaction(self, reaction):
+        pass
+
+
+class FakeContext:
+    def __init__(self, author_id):
+        self.author = FakeAuthor(author_id)
+        self.sent_messages = []
+
+    async def send(self, message):
+        self.sent_messages.append(message)
+        return FakeMessage(message)
+
+
+SYMBOLS = [
+    ["BTCUSDT", "BTC", "USDT", "TRADING"],
+    ["ETHUSDT", "ETH", "USDT", "TRADING"],
+    ["BTCPLN", "BTC", "PLN", "TRADING"],
+    ["ETHBTC", "ETH", "BTC", "TRADING"],
+    ["SOLBTC", "SOL", "BTC", "TRADING"],
+    ["LUNAUSDT", "LUNA", "USDT", "BREAK"],
+]
+PRICES = {
+    "BTCUSDT": "50000",
+    "ETHUSDT": "2000",
+    "BTCPLN": "210000",
+    "ETHBTC": "0.04",
+    "SOLBTC": "0.002",
+}
+
+
+async def fake_get_json(url, params=None):
+    """Simulates the Binance ticker endpoints and Frankfurter latest rates."""
+    if "ticker/price" in url:
+        if params is None:
+            symbol = url.split("symbol=")[1]
+            return {"symbol": symbol, "price": PRICES[symbol]}
+        return [
+            {"symbol": s, "price": PRICES[s]} for s in json.loads(params["symbols"])
+        ]
+    if "latest?from=USD" in url:
+        return {"rates": {"PLN": 4.0, "EUR": 0.9}}
+    raise AssertionError(f"Unexpected URL: {url}")
+
+
+class TestConversionEngine(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        quote_cache.clear()
+        index = SymbolIndex("missing.json")
+        index._set(SYMBOLS)
+        self.engine = ConversionEngine()
+        patches = [
+            patch.object(symbols, "index", index),
+            patch.object(conversion, "engine", self.engine),
+            patch.object(prefetch, "scheduler", prefetch.PrefetchScheduler()),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def route(self, source, target):
+        return [(e.kind, e.pair or e.target) for e in self.engine.path(source, target)]
+
+    def test_best_paths_prefer_direct_pairs_then_usdt_books(self):
+        self.assertEqual(self.route("BTC", "PLN"), [("ticker", "BTCPLN")])
+        # Two hops either way: through USDT/USD rather than through BTC
+        self.assertEqual(
+            self.route("ETH", "PLN"),
+            [("ticker", "ETHUSDT"), ("peg", "USD"), ("fx", "PLN")],
+        )
+        # SOL only trades against BTC
+        self.assertEqual(
+            self.route("SOL", "PLN"), [("ticker", "SOLBTC"), ("ticker", "BTCPLN")]
+        )
+        self.assertEqual(self.route("PLN", "EUR"), [("fx", "EUR")])
+        self.assertTrue(self.engine.path("USDT", "BTC")[0].inverse)
+
+    def test_unknown_and_unreachable_currencies(self):
+        with self.assertRaises(UnknownSymbol) as raised:
+            self.engine.path("BTCC", "USD")
+        self.assertIn("BTC", raised.exception.suggestions)
+        with self.assertRaisesRegex(UnknownSymbol, "BREAK"):
+            self.engine.path("LUNA", "USD")
+        with self.assertRaises(NoConversion):
+            self.engine.path("BTC", "XYZ")
+
+    @patch("src.services.quotes.http_client.get_json", new_callable=AsyncMock)
+    async def test_missing_rates_are_fetched_together_then_served_from_memory(
+        self, mock_get_json
+    ):
+        """
+        All conversions need one Binance batch and one Frankfurter request; asked
+        again, they are answered from memory and the rates count as prefetch demand.
+        """
+        mock_get_json.side_effect = fake_get_json
+        keys = [("BTC", "PLN"), ("ETH", "EUR"), ("SOL", "USD"), ("USD", "PLN")]
+
+        results = await self.engine.convert_many(keys)
+        again = await self.engine.convert_many(keys)
+
+        self.assertEqual(mock_get_json.await_count, 2)
+        self.assertEqual(results["BTC", "PLN"].rate, 210000.0)
+        self.assertAlmostEqual(results["ETH", "EUR"].rate, 1800.0)
+        self.assertAlmostEqual(again["SOL", "USD"].rate, 0.002 * 50000)
+        self.assertEqual(again["USD", "PLN"].rate, 4.0)
+        self.assertIn(("ticker", "BTCPLN"), prefetch.scheduler.hot_keys())
+
+    async def test_cached_conversions_fetch_nothing(self):
+        quote_cache.set(("ticker", "BTCPLN"), 210000.0, BINANCE_TTL)
+        with patch.object(self.engine, "_fetch", new_callable=AsyncMock) as fetch:
+            results = await self.engine.convert_many([("BTC", "PLN")])
+
+        fetch.assert_not_awaited()
+        self.assertEqual(results["BTC", "PLN"].rate, 210000.0)
+
+    async def test_rate_updates_keep_the_paths_and_list_changes_rebuild_them(self):
+        quote_cache.set(("ticker", "ETHUSDT"), 2000.0, BINANCE_TTL)
+        quote_cache.set(("fx", "USD", "PLN"), 4.0, 60)
+        self.assertEqual(self.engine.convert_cached("ETH", "PLN").rate, 8000.0)
+        tree = self.engine._tree("PLN")
+
+        quote_cache.set(("ticker", "ETHUSDT"), 2500.0, BINANCE_TTL)
+        self.assertEqual(self.engine.convert_cached("ETH", "PLN").rate, 10000.0)
+        self.assertIs(self.engine._tree("PLN"), tree)
+
+        symbols.index._set(SYMBOLS + [["ETHPLN", "ETH", "PLN", "TRADING"]])
+        self.assertEqual(self.route("ETH", "PLN"), [("ticker", "ETHPLN")])
+        self.assertIsNone(self.engine.convert_cached("ETH", "PLN"))
+
+    @patch("src.app.http_client.get_json", new_callable=AsyncMock)
+    async def test_price_uses_the_direct_pair(self, mock_get_json):
+        mock_get_json.side_effect = fake_get_json
+        user_currency[42] = "PLN"
+        self.addCleanup(user_currency.pop, 42, None)
+        ctx = FakeContext(author_id=42)
+
+        await price(ctx, "btc")
+
+        self.assertEqual(ctx.sent_messages, ["💰 Price of BTC: 210,000.00 PLN"])
+        self.assertEqual(mock_get_json.await_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
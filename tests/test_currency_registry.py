@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, AsyncMock
+from src.app import currencies, currency_info, user_currency
+from src.services.currency_registry import CurrencyRegistry
+from src.services.quotes import quote_cache
+
+
+class FakeAuthor:
+    def __init__(self, id):
+        self.id = id
+
+
+class FakeContext:
+    def __init__(self, author_id):
+        self.author = FakeAuthor(author_id)
+        self.sent_messages = []
+
+    async def send(self, message):
+        self.sent_messages.append(message)
+
+
+FRANKFURTER_CURRENCIES = {"EUR": "Euro", "SEK": "Swedish Krona", "USD": "US Dollar"}
+
+
+class TestCurrencyRegistry(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "currencies.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_builtin_list_without_snapshot(self):
+        """
+        Without a snapshot (first start, offline) the built-in fiat list and USDT are known.
+        """
+        registry = CurrencyRegistry(self.path)
+        registry.load()
+        self.assertTrue(registry.is_fiat("PLN"))
+        self.assertIn("USDT", registry)
+        self.assertFalse(registry.is_fiat("USDT"))
+        self.assertEqual(registry.name("USDT"), "Tether (US Dollar Pegged)")
+        self.assertNotIn("BTC", registry)
+
+    @patch(
+        "src.services.currency_registry.http_client.get_json_conditional",
+        new_callable=AsyncMock,
+    )
+    async def test_revalidation_writes_snapshot_loaded_on_restart(self, mock_get):
+        """
+        A changed list is stored with its validators, and a new registry starts from it.
+        """
+        mock_get.return_value = (FRANKFURTER_CURRENCIES, '"v1"', None)
+        registry = CurrencyRegistry(self.path)
+        self.assertTrue(await registry.revalidate())
+        self.assertTrue(registry.is_fiat("SEK"))
+
+        restarted = CurrencyRegistry(self.path)
+        restarted.load()
+        self.assertTrue(restarted.is_fiat("SEK"))
+        self.assertFalse(restarted.is_fiat("PLN"))
+        self.assertEqual(restarted.etag, '"v1"')
+
+        # The next check sends the ETag; 304 Not Modified keeps everything as it is
+        mock_get.return_value = (None, '"v1"', None)
+        mtime = os.path.getmtime(self.path)
+        self.assertFalse(await restarted.revalidate())
+        self.assertEqual(mock_get.await_args.kwargs["etag"], '"v1"')
+        self.assertEqual(restarted.name("SEK"), "Swedish Krona")
+        self.assertEqual(os.path.getmtime(self.path), mtime)
+
+    def test_damaged_snapshot_is_ignored(self):
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        registry = CurrencyRegistry(self.path)
+        registry.load()
+        self.assertTrue(registry.is_fiat("USD"))
+
+
+class TestCurrenciesCommand(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        quote_cache.clear()
+        user_currency.pop(40, None)
+
+    @patch("src.app.http_client.get_json", new_callable=AsyncMock)
+    async def test_setting_currency_uses_registry(self, mock_get_json):
+        """
+        Setting a currency is validated against the registry, without upstream requests.
+        """
+        ctx = FakeContext(author_id=40)
+        await currencies(ctx, "usdt")
+        await currencies(ctx, "xyz")
+        self.assertIn("USDT – Tether (US Dollar Pegged)", ctx.sent_messages[0])
+        self.assertIn("Unknown currency code", ctx.sent_messages[1])
+        self.assertEqual(user_currency.get(40), "USDT")
+        mock_get_json.assert_not_awaited()
+
+    @patch("src.app.http_client.get_json", new_callable=AsyncMock)
+    async def test_listing_fetches_only_rates(self, mock_get_json):
+        mock_get_json.return_value = {"rates": {"EUR": 0.9, "GBP": 0.8, "PLN": 4.0}}
+        ctx = FakeContext(author_id=40)
+        await currencies(ctx)
+        mock_get_json.assert_awaited_once()
+        self.assertIn(
+            "/latest?from=USD&to=EUR,GBP,PLN", mock_get_json.await_args.args[0]
+        )
+        self.assertIn(f"**USD – {currency_info.name('USD')}**", ctx.sent_messages[0])
+        self.assertIn("• `PLN`: 4.0", ctx.sent_messages[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import patch, AsyncMock
+from src.app import show_favorites, user_favorites, user_currency
+from src.services.quotes import quote_cache
+from src.services.state import PriceFavorite, StaticFavorite
+
+
+# Fake classes for simulating Discord context
+class FakeAuthor:
+    def __init__(self, id):
+        self.id = id
+
+
+class FakeContext:
+    def __init__(self, author_id):
+        self.author = FakeAuthor(author_id)
+        self.sent_messages = []
+
+    async def send(self, message):
+        self.sent_messages.append(message)
+
+
+async def fake_get_json(url, params=None):
+    """Simulates the Binance batch ticker endpoint and Frankfurter latest rates."""
+    if "ticker/price" in url:
+        prices = {"BTCUSDT": "50000", "ETHUSDT": "2000"}
+        symbols = params["symbols"].strip("[]").replace('"', "").split(",")
+        return [{"symbol": s, "price": prices[s]} for s in symbols]
+    if "latest?from=USD" in url:
+        return {"rates": {"PLN": 4.0, "EUR": 0.9}}
+    raise AssertionError(f"Unexpected URL: {url}")
+
+
+class TestFavoritesCommand(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        quote_cache.clear()
+        user_currency.pop(20, None)
+
+    @patch("src.app.http_client.get_json", new_callable=AsyncMock)
+    async def test_show_favorites_batches_upstream_requests(self, mock_get_json):
+        """
+        Test that all price favorites are refreshed with one Binance and one Frankfurter request
+        and that the whole list (more than 5 entries) is displayed with numbers.
+
+        Scenario:
+        - The user has 6 favorites: crypto prices in USD/PLN/EUR, a fiat conversion and a static entry.
+        - Expect exactly two upstream calls, whatever the number of entries.
+        """
+        mock_get_json.side_effect = fake_get_json
+        user_favorites[20] = [
+            PriceFavorite("BTC", "USD"),
+            PriceFavorite("ETH", "PLN"),
+            StaticFavorite("note"),
+            PriceFavorite("BTC", "EUR"),
+            PriceFavorite("USD", "PLN", fiat_conversion=True),
+            PriceFavorite("ETH", "USDT"),
+        ]
+        ctx = FakeContext(author_id=20)
+
+        await show_favorites(ctx)
+
+        self.assertEqual(mock_get_json.await_count, 2)
+        text = "\n".join(ctx.sent_messages)
+        self.assertIn("🔸 1. 💰 Price of BTC: 50,000.00 USD", text)
+        self.assertIn("🔸 2. 💰 Price of ETH: 8,000.00 PLN", text)
+        self.assertIn("🔸 3. note", text)
+        self.assertIn("🔸 4. 💰 Price of BTC: 45,000.00 EUR", text)
+        self.assertIn("🔸 5. 💱 1 USD = 4.00 PLN", text)
+        self.assertIn("🔸 6. 💰 Price of ETH: 2,000.00 USDT", text)
+
+    @patch("src.app.http_client.get_json", new_callable=AsyncMock)
+    async def test_favorite_added_while_listing(self, mock_get_json):
+        """
+        A favorite added (❤️) while the prices are being fetched does not break the listing;
+        it shows up the next time.
+        """
+
+        async def add_favorite_meanwhile(url, params=None):
+            user_favorites[20].append(PriceFavorite("ETH", "USD"))
+            return await fake_get_json(url, params)
+
+        mock_get_json.side_effect = add_favorite_meanwhile
+        user_favorites[20] = [PriceFavorite("BTC", "USD")]
+        ctx = FakeContext(author_id=20)
+
+        await show_favorites(ctx)
+
+        self.assertEqual(len(ctx.sent_messages), 1)
+        self.assertIn("🔸 1. 💰 Price of BTC: 50,000.00 USD", ctx.sent_messages[0])
+        self.assertEqual(len(user_favorites[20]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import unittest
+from src.services.favorites import FavoritesStore
+from src.services.state import PriceFavorite, StaticFavorite
+
+BTC = PriceFavorite("BTC", "USD")
+NOTE = StaticFavorite("note")
+
+
+class TestFavoritesStore(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "favorites.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    async def test_changes_are_replayed_from_journal(self):
+        """
+        Added and removed favorites are written to the journal in one batch
+        and restored by a new store instance.
+        """
+        store = FavoritesStore(self.path)
+        favs = store.load()
+        favs[1] = [BTC, NOTE]
+        store.record_add(1, BTC)
+        store.record_add(1, NOTE)
+        favs[1].pop(0)
+        store.record_remove(1, 0)
+        self.assertFalse(os.path.exists(store.journal_path))
+
+        await store.flush()
+
+        self.assertEqual(FavoritesStore(self.path).load(), {1: [NOTE]})
+
+    async def test_compaction_writes_snapshot_and_empties_journal(self):
+        """
+        Once the journal reaches the threshold it is folded into an atomically replaced snapshot.
+        """
+        store = FavoritesStore(self.path, compact_threshold=2)
+        favs = store.load()
+        favs[1] = [BTC, NOTE]
+        store.record_add(1, BTC)
+        store.record_add(1, NOTE)
+
+        await store.flush()
+
+        self.assertEqual(os.path.getsize(store.journal_path), 0)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["seq"], 2)
+        self.assertEqual(FavoritesStore(self.path).load(), {1: [BTC, NOTE]})
+
+    async def test_entries_already_in_snapshot_are_not_replayed_twice(self):
+        """
+        If the process dies after writing the snapshot but before emptying the journal,
+        the journal entries covered by the snapshot are skipped.
+        """
+        store = FavoritesStore(self.path)
+        favs = store.load()
+        favs[1] = [BTC]
+        store.record_add(1, BTC)
+        await store.flush()
+        with open(store.journal_path, encoding="utf-8") as f:
+            journal = f.read()
+        await store.compact()
+        with open(store.journal_path, "w", encoding="utf-8") as f:
+            f.write(journal)  # Simulate the crash: old journal is still there
+
+        self.assertEqual(FavoritesStore(self.path).load(), {1: [BTC]})
+
+    def test_legacy_file_and_torn_journal_line(self):
+        """
+        A plain favorites.json from older versions is loaded, and a half-written
+        last journal line is ignored and cut off.
+        """
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"7": [BTC.to_dict()]}, f)
+        with open(self.path + ".journal", "w", encoding="utf-8") as f:
+            entry = {"seq": 1, "op": "add", "user": 7, "item": NOTE.to_dict()}
+            f.write(json.dumps(entry) + "\n")
+            f.write('{"seq": 2, "op": "ad')
+
+        store = FavoritesStore(self.path)
+        self.assertEqual(store.load(), {7: [BTC, NOTE]})
+        self.assertEqual(store.seq, 1)
+        with open(store.journal_path, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from unittest.mock import patch, AsyncMock
+import aiohttp
+from aiohttp import web
+from discord.ext import commands
+from src.app import bot
+from src.services import http_client
+from src.services.http_client import HttpClient
+
+
+def make_app():
+    async def ticker(request):
+        return web.json_response({"symbol": request.query["symbol"], "price": "1.5"})
+
+    async def missing(request):
+        return web.json_response({"code": -1121, "msg": "Invalid symbol."}, status=400)
+
+    app = web.Application()
+    app.router.add_get("/ticker", ticker)
+    app.router.add_get("/missing", missing)
+    return app
+
+
+class TestHttpClient(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.runner = web.AppRunner(make_app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base = f"http://127.0.0.1:{port}"
+        self.client = HttpClient(connect_timeout=1, read_timeout=1)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.runner.cleanup()
+
+    async def test_get_json_reuses_single_session(self):
+        """
+        Two requests made through the client should be served by the same session
+        (and therefore the same keep-alive connection pool).
+        """
+        first = await self.client.get_json(f"{self.base}/ticker?symbol=BTCUSDT")
+        session = self.client._session
+        second = await self.client.get_json(
+            f"{self.base}/ticker", params={"symbol": "ETHUSDT"}
+        )
+        self.assertEqual(first, {"symbol": "BTCUSDT", "price": "1.5"})
+        self.assertEqual(second["symbol"], "ETHUSDT")
+        self.assertIs(self.client._session, session)
+
+    async def test_get_json_raises_for_error_status(self):
+        """
+        A non-2xx response should raise instead of returning the error body.
+        """
+        with self.assertRaises(aiohttp.ClientResponseError) as cm:
+            await self.client.get_json(f"{self.base}/missing")
+        self.assertEqual(cm.exception.status, 400)
+
+    async def test_session_is_closed_with_the_bot(self):
+        await self.client.get_json(f"{self.base}/ticker?symbol=BTCUSDT")
+        session = self.client._session
+        with patch.object(http_client, "client", self.client), patch.object(
+            commands.AutoShardedBot, "close", new_callable=AsyncMock
+        ):
+            await bot.close()
+        self.assertTrue(session.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from src.app import lang, user_lang, t
+from src.app import lang, preferences, user_lang, t
 
 
 # Fake classes for simulating Discord context
@@ -18,6 +18,15 @@ class FakeContext:
 
 
 class TestLangCommand(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Keep preferences set by the tests in memory instead of preferences.db
+        preferences.close()
+        self.path = preferences.path
+        preferences.path = ":memory:"
+
+    def tearDown(self):
+        preferences.close()
+        preferences.path = self.path
 
     async def test_lang_no_argument(self):
         """
@@ -0,0 +1,41 @@
+import unittest
+from benchmarks import loadgen
+from src.services import quotes
+
+
+class TestLoadGenerator(unittest.IsolatedAsyncioTestCase):
+    def test_synthesized_trace_is_reproducible(self):
+        first = loadgen.synthesize_trace(users=50, rate=20, duration=5, seed=3)
+        second = loadgen.synthesize_trace(users=50, rate=20, duration=5, seed=3)
+        self.assertEqual(first, second)
+        self.assertTrue(all(0 <= e["ts"] < 5 for e in first))
+        self.assertEqual(first, sorted(first, key=lambda e: e["ts"]))
+
+    async def test_trace_replays_through_the_command_pipeline(self):
+        """
+        Commands are parsed and invoked by the bot itself; reactions hit the
+        bot's last reply to that user.
+        """
+        quotes.quote_cache.clear()
+        events = [
+            {"ts": 0.0, "user": 501, "guild": None, "text": "!cena btc"},
+            {"ts": 0.0, "user": 502, "guild": 100, "text": "!price usd"},
+            {"ts": 0.2, "user": 501, "guild": None, "reaction": "❤️"},
+            {"ts": 0.2, "user": 503, "guild": None, "reaction": "❤️"},
+            {"ts": 0.4, "user": 501, "guild": None, "text": "!ulubione"},
+            {"ts": 0.4, "user": 504, "guild": None, "text": "!nieznane"},
+        ]
+        report = await loadgen.run_trace(events, speed=1)
+
+        commands = report["commands"]
+        self.assertEqual(commands["price"]["outcomes"], {"ok": 2})
+        self.assertEqual(commands["price"]["count"], 2)  # !cena is an alias
+        self.assertEqual(commands["favorite"]["outcomes"], {"ok": 1})
+        self.assertEqual(commands["reaction"]["outcomes"], {"ok": 1, "skipped": 1})
+        self.assertEqual(commands["!nieznane"]["outcomes"], {"unknown": 1})
+        self.assertEqual(report["events"], len(events))
+        self.assertIn("p99_ms", report["event_loop_lag"])
+
+
+if __name__ == "__main__":
+    unittest.main()
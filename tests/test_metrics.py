@@ -0,0 +1,152 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+import aiohttp
+from aiohttp import web
+from src import app
+from src.services import metrics
+from src.services.favorites import FavoritesStore
+from src.services.http_client import HttpClient
+from src.services.metrics import LoopLagMonitor, MetricsServer, Registry
+from src.services.state import PriceFavorite
+
+
+class TestRegistry(unittest.TestCase):
+    def test_text_format(self):
+        """
+        Counters and histograms are rendered in the Prometheus text format,
+        with cumulative buckets.
+        """
+        registry = Registry()
+        counter = registry.counter("requests_total", "Requests.", ("path",))
+        histogram = registry.histogram(
+            "latency_seconds", "Latency.", ("path",), buckets=(0.1, 1)
+        )
+        counter.inc('/a"b')
+        counter.inc('/a"b')
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.5, "/a")
+        histogram.observe(3, "/a")
+        registry.gauge("queue_depth", "Depth.", lambda: 7)
+
+        text = registry.render()
+        self.assertIn("# TYPE requests_total counter", text)
+        self.assertIn('requests_total{path="/a\\"b"} 2', text)
+        self.assertIn('latency_seconds_bucket{path="/a",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{path="/a",le="1"} 2', text)
+        self.assertIn('latency_seconds_bucket{path="/a",le="+Inf"} 3', text)
+        self.assertIn('latency_seconds_count{path="/a"} 3', text)
+        self.assertIn('latency_seconds_sum{path="/a"} 3.55', text)
+        self.assertIn("queue_depth 7", text)
+
+    def test_endpoints_with_dates_share_a_label(self):
+        self.assertEqual(
+            metrics.endpoint_of(
+                "https://api.frankfurter.app/2024-01-01..2024-02-01?from=USD"
+            ),
+            ("api.frankfurter.app", "/{date}..{date}"),
+        )
+
+
+class TestUpstreamMetrics(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        async def ticker(request):
+            return web.json_response({"price": "1.5"})
+
+        async def missing(request):
+            return web.json_response({}, status=400)
+
+        server = web.Application()
+        server.router.add_get("/ticker", ticker)
+        server.router.add_get("/missing", missing)
+        self.runner = web.AppRunner(server)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base = f"http://127.0.0.1:{port}"
+        self.client = HttpClient()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.runner.cleanup()
+
+    async def test_requests_are_counted_by_endpoint_and_status(self):
+        ok = metrics.upstream_requests.value("127.0.0.1", "/ticker", "200")
+        failed = metrics.upstream_requests.value("127.0.0.1", "/missing", "400")
+        timed = metrics.upstream_latency.count("127.0.0.1", "/ticker")
+
+        await self.client.get_json(f"{self.base}/ticker?symbol=BTCUSDT")
+        with self.assertRaises(aiohttp.ClientResponseError):
+            await self.client.get_json(f"{self.base}/missing")
+
+        self.assertEqual(
+            metrics.upstream_requests.value("127.0.0.1", "/ticker", "200"), ok + 1
+        )
+        self.assertEqual(
+            metrics.upstream_requests.value("127.0.0.1", "/missing", "400"),
+            failed + 1,
+        )
+        self.assertEqual(
+            metrics.upstream_latency.count("127.0.0.1", "/ticker"), timed + 1
+        )
+
+
+class TestBotMetrics(unittest.IsolatedAsyncioTestCase):
+    async def test_command_invocations_and_latency(self):
+        """
+        The invoke hooks count every command with its outcome and time it.
+        """
+        ok = metrics.command_invocations.value("price", "ok")
+        failed = metrics.command_invocations.value("price", "error")
+        timed = metrics.command_latency.count("price")
+        for command_failed in (False, True):
+            ctx = SimpleNamespace(
+                command=SimpleNamespace(qualified_name="price"),
+                command_failed=command_failed,
+            )
+            await app.start_command_timer(ctx)
+            await app.finish_command(ctx)
+
+        self.assertEqual(metrics.command_invocations.value("price", "ok"), ok + 1)
+        self.assertEqual(
+            metrics.command_invocations.value("price", "error"), failed + 1
+        )
+        self.assertEqual(metrics.command_latency.count("price"), timed + 2)
+
+    async def test_favorites_flush_is_timed(self):
+        flushes = metrics.favorites_flush_latency.count()
+        with tempfile.TemporaryDirectory() as tmp:
+            store = FavoritesStore(os.path.join(tmp, "favorites.json"))
+            store.record_add(1, PriceFavorite("BTC", "USD"))
+            await store.flush()
+        self.assertEqual(metrics.favorites_flush_latency.count(), flushes + 1)
+
+    async def test_loop_lag_is_sampled(self):
+        monitor = LoopLagMonitor(
+            interval=0.01, histogram=Registry().histogram("lag", "Lag.")
+        )
+        monitor.start()
+        await asyncio.sleep(0.05)
+        monitor._task.cancel()
+        self.assertGreater(monitor.histogram.count(), 0)
+
+    async def test_endpoint_serves_bot_metrics(self):
+        server = MetricsServer(port=0)
+        port = await server.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                    self.assertEqual(response.status, 200)
+                    text = await response.text()
+        finally:
+            await server.close()
+        self.assertIn("# TYPE bot_command_duration_seconds histogram", text)
+        self.assertIn('bot_cache_hit_ratio{cache="quotes"}', text)
+        self.assertIn("bot_render_queue_depth 0", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
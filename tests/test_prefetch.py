@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import patch, AsyncMock
+from src.services import prefetch
+from src.services.prefetch import PrefetchScheduler
+from src.services.quotes import quote_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPrefetchScheduler(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.expiry = {}  # key -> seconds until it expires
+        self.refreshed = []
+
+        async def refresh(keys):
+            self.refreshed.append(keys)
+            return 1
+
+        self.scheduler = PrefetchScheduler(
+            budget_per_minute=2,
+            top_k=2,
+            lead_time=1,
+            half_life=60,
+            busy=lambda: False,
+            clock=self.clock,
+        )
+        self.scheduler.register("ticker", self.expiry.get, refresh)
+
+    def test_recent_demand_outweighs_old_demand(self):
+        """
+        Request counts decay, so a key popular an hour ago loses to one popular now.
+        """
+        for _ in range(10):
+            self.scheduler.record("ticker", "OLDUSDT")
+        self.clock.now += 3600
+        for _ in range(2):
+            self.scheduler.record("ticker", "NEWUSDT")
+        self.scheduler.record("ticker", "RAREUSDT")
+        self.assertEqual(
+            self.scheduler.hot_keys(),
+            [("ticker", "NEWUSDT"), ("ticker", "RAREUSDT")],
+        )
+
+    async def test_refreshes_hot_keys_about_to_expire_in_one_batch(self):
+        """
+        Only the top-K keys that expire within the lead time are refreshed,
+        all keys of one kind together.
+        """
+        for pair, hits in (("BTCUSDT", 5), ("ETHUSDT", 4), ("SOLUSDT", 1)):
+            for _ in range(hits):
+                self.scheduler.record("ticker", pair)
+        self.expiry[("ticker", "BTCUSDT")] = 0.5
+        self.expiry[("ticker", "ETHUSDT")] = None  # Not cached at all
+        self.expiry[("ticker", "SOLUSDT")] = 0.1  # Due, but not hot enough
+
+        self.assertEqual(await self.scheduler.run_once(), 1)
+        self.assertEqual(
+            self.refreshed, [[("ticker", "BTCUSDT"), ("ticker", "ETHUSDT")]]
+        )
+
+        self.expiry[("ticker", "BTCUSDT")] = 4.5
+        self.expiry[("ticker", "ETHUSDT")] = 4.5
+        self.assertEqual(await self.scheduler.run_once(), 0)
+
+    async def test_budget_per_minute(self):
+        self.scheduler.record("ticker", "BTCUSDT")
+        for _ in range(3):
+            await self.scheduler.run_once()
+        self.assertEqual(len(self.refreshed), 2)  # Budget of 2 requests per minute
+        self.clock.now += 61
+        await self.scheduler.run_once()
+        self.assertEqual(len(self.refreshed), 3)
+
+    async def test_yields_to_interactive_requests(self):
+        """
+        Nothing is refreshed while interactive requests keep running.
+        """
+        self.scheduler._busy = lambda: True
+        self.scheduler.record("ticker", "BTCUSDT")
+        with patch.object(prefetch, "PREFETCH_YIELD_TIMEOUT", 0):
+            self.assertEqual(await self.scheduler.run_once(), 0)
+        self.assertEqual(self.refreshed, [])
+
+
+class TestQuotePrefetch(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        quote_cache.clear()
+
+    @patch("src.services.quotes.http_client.get_json", new_callable=AsyncMock)
+    async def test_ticker_refresh_replaces_cached_prices(self, mock_get_json):
+        """
+        The registered ticker handler refreshes cached prices with a single batch request.
+        """
+        quote_cache.set(("ticker", "BTCUSDT"), 1.0, 0.5)
+        mock_get_json.return_value = [
+            {"symbol": "BTCUSDT", "price": "50000"},
+            {"symbol": "ETHUSDT", "price": "2000"},
+        ]
+        scheduler = PrefetchScheduler(busy=lambda: False)
+        for pair in ("BTCUSDT", "ETHUSDT"):
+            scheduler.record("ticker", pair)
+        scheduler._handlers = prefetch.scheduler._handlers
+
+        self.assertEqual(await scheduler.run_once(), 1)
+        self.assertEqual(quote_cache.get(("ticker", "BTCUSDT")), 50000.0)
+        self.assertGreater(quote_cache.expires_in(("ticker", "ETHUSDT")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
-from unittest.mock import patch, Mock
+from unittest.mock import patch, AsyncMock
 from src.app import price, user_currency, message_fav_data
+from src.services.quotes import quote_cache
 
 
 # Fake classes for simulating Discord context
@@ -33,8 +34,8 @@ class FakeContext:
 
 
 class TestPriceCommand(unittest.IsolatedAsyncioTestCase):
-    @patch("src.app.requests.get")
-    async def test_price_command_fiat(self, mock_get):
+    @patch("src.app.http_client.get_json", new_callable=AsyncMock)
+    async def test_price_command_fiat(self, mock_get_json):
         """
         Tests the !price command in the fiat currency branch.
         If the user does not have a preferred currency (target) set, it will default to PLN.
@@ -42,7 +43,7 @@ class TestPriceCommand(unittest.IsolatedAsyncioTestCase):
         Scenario:
         - Call the !price command with the argument "usd" (this is a fiat currency).
         - Due to the lack of a set currency, the target will be set to "PLN".
-        - Patch requests.get to return a sample response from the Frankfurter API:
+        - Patch http_client.get_json to return a sample response from the Frankfurter API:
             { "rates": {"PLN": 4.0} }
         - Expect that the resulting message will contain the text "💱 1 USD = 4.00 PLN".
         - Check if the global dictionary message_fav_data has been updated
@@ -51,13 +52,11 @@ class TestPriceCommand(unittest.IsolatedAsyncioTestCase):
         # Reset global settings to ensure the test is repeatable.
         user_currency.pop(10, None)
         message_fav_data.clear()
+        quote_cache.clear()
 
         # Prepare a simulated API response.
         fake_response = {"rates": {"PLN": 4.0}}
-        mock_response = Mock()
-        mock_response.json.return_value = fake_response
-        mock_response.raise_for_status.return_value = None
-        mock_get.return_value = mock_response
+        mock_get_json.return_value = fake_response
 
         # Create a simulated context: user with id=10.
         ctx = FakeContext(author_id=10)
@@ -73,10 +72,10 @@ class TestPriceCommand(unittest.IsolatedAsyncioTestCase):
         # Check if the global dictionary message_fav_data has been updated.
         self.assertIn(9999, message_fav_data)
         fav_entry = message_fav_data[9999]
-        self.assertEqual(fav_entry["type"], "price")
-        self.assertEqual(fav_entry["symbol"], "USD")
-        self.assertEqual(fav_entry["currency"], "PLN")
-        self.assertEqual(fav_entry["fiat_conversion"], True)
+        self.assertEqual(fav_entry.type, "price")
+        self.assertEqual(fav_entry.symbol, "USD")
+        self.assertEqual(fav_entry.currency, "PLN")
+        self.assertEqual(fav_entry.fiat_conversion, True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+import asyncio
+import unittest
+from src.services.cache import QuoteCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestQuoteCache(unittest.IsolatedAsyncioTestCase):
+    async def test_entry_expires_after_ttl(self):
+        """
+        A cached value is served until its TTL passes, after which a new fetch is made.
+        """
+        clock = FakeClock()
+        cache = QuoteCache(clock=clock)
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(await cache.get_or_fetch("BTCUSDT", 5, fetch), 1)
+        clock.now = 4.9
+        self.assertEqual(await cache.get_or_fetch("BTCUSDT", 5, fetch), 1)
+        clock.now = 5.0
+        self.assertEqual(await cache.get_or_fetch("BTCUSDT", 5, fetch), 2)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    async def test_least_recently_used_entry_is_evicted(self):
+        """
+        When the cache is full, the entry that was used least recently is dropped.
+        """
+        cache = QuoteCache(max_entries=2)
+        cache.set("a", 1, 60)
+        cache.set("b", 2, 60)
+        cache.get("a")
+        cache.set("c", 3, 60)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+
+    async def test_concurrent_misses_share_one_fetch(self):
+        """
+        Many concurrent requests for the same missing key should trigger only one upstream call.
+        """
+        cache = QuoteCache()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 42.0
+
+        results = await asyncio.gather(
+            *(cache.get_or_fetch(("ticker", "BTCUSDT"), 5, fetch) for _ in range(20))
+        )
+        self.assertEqual(results, [42.0] * 20)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()["coalesced"], 19)
+
+    async def test_errors_are_shared_but_not_cached(self):
+        """
+        A failing fetch propagates to every waiter and the next call retries upstream.
+        """
+        cache = QuoteCache()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream down")
+
+        results = await asyncio.gather(
+            cache.get_or_fetch("k", 5, failing),
+            cache.get_or_fetch("k", 5, failing),
+            return_exceptions=True,
+        )
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+        async def working():
+            return 1.0
+
+        self.assertEqual(await cache.get_or_fetch("k", 5, working), 1.0)
+
+    async def test_cancelled_first_caller_does_not_fail_the_others(self):
+        """
+        When the caller that started a fetch is cancelled, the callers waiting for
+        the same key still get the value; the fetch is only cancelled with the last one.
+        """
+        cache = QuoteCache()
+        started = asyncio.Event()
+
+        async def fetch():
+            started.set()
+            await asyncio.sleep(0.01)
+            return 42.0
+
+        first = asyncio.ensure_future(cache.get_or_fetch("k", 5, fetch))
+        await started.wait()
+        second = asyncio.ensure_future(cache.get_or_fetch("k", 5, fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        self.assertEqual(await second, 42.0)
+        self.assertTrue(first.cancelled())
+        self.assertIn("k", cache)
+
+        stopped = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            finally:
+                stopped.set()
+
+        alone = asyncio.ensure_future(cache.get_or_fetch("slow", 5, slow))
+        await asyncio.sleep(0)
+        alone.cancel()
+        await asyncio.wait_for(stopped.wait(), 1)
+        await asyncio.sleep(0)
+        self.assertNotIn("slow", cache._flights)
+
+    async def test_caller_after_the_last_one_cancelled_starts_a_new_fetch(self):
+        cache = QuoteCache()
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+
+        async def fast():
+            return 7.0
+
+        alone = asyncio.ensure_future(cache.get_or_fetch("k", 5, slow))
+        await started.wait()
+        alone.cancel()
+        await asyncio.sleep(0)  # The cancelled fetch has not finished yet
+
+        self.assertEqual(await cache.get_or_fetch("k", 5, fast), 7.0)
+        self.assertTrue(alone.cancelled())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from unittest.mock import patch, AsyncMock
+import numpy as np
+from src.app import get_crypto_data
+from src.services.quotes import quote_cache
+from src.services.series import asof_join, dates_to_ms, lttb, parse_klines
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+class TestAsofJoin(unittest.TestCase):
+    def test_weekend_candles_use_friday_rate(self):
+        """
+        Candles on Saturday and Sunday get the rate published on Friday (forward fill),
+        and candles before the first publication get the first rate.
+        """
+        fx_times = dates_to_ms(["2024-05-03", "2024-05-06"])  # Friday, Monday
+        fx_rates = np.array([4.0, 4.1])
+        candles = dates_to_ms(
+            ["2024-05-02", "2024-05-03", "2024-05-04", "2024-05-05", "2024-05-06"]
+        ) + (12 * 60 * 60 * 1000)
+        result = asof_join(candles, fx_times, fx_rates)
+        np.testing.assert_array_equal(result, [4.0, 4.0, 4.0, 4.0, 4.1])
+
+
+class TestParseKlines(unittest.TestCase):
+    def test_parse_string_klines(self):
+        """
+        Binance klines (numbers as strings) are decoded into int64 times and a float64 OHLCV matrix.
+        """
+        klines = [
+            [1000, "1.0", "2.0", "0.5", "1.5", "10", 1999, "0", 5],
+            [2000, "1.5", "3.0", "1.0", "2.5", "20", 2999, "0", 7],
+        ]
+        open_times, ohlcv = parse_klines(klines)
+        self.assertEqual(open_times.dtype, np.int64)
+        np.testing.assert_array_equal(open_times, [1000, 2000])
+        np.testing.assert_array_equal(ohlcv[:, 3], [1.5, 2.5])
+        self.assertEqual(ohlcv.shape, (2, 5))
+
+    def test_parse_empty_klines(self):
+        open_times, ohlcv = parse_klines([])
+        self.assertEqual(len(open_times), 0)
+        self.assertEqual(ohlcv.shape, (0, 5))
+
+
+class TestLttb(unittest.TestCase):
+    def test_downsampling_keeps_extremes_and_endpoints(self):
+        """
+        A long series is reduced to the threshold while the global peak, trough
+        and both endpoints survive.
+        """
+        x = np.arange(10_000, dtype=np.int64)
+        y = np.sin(x / 500.0)
+        y[1234] = 5.0
+        y[8765] = -5.0
+        dx, dy = lttb(x, y, 500)
+        self.assertEqual(len(dx), 500)
+        self.assertTrue(np.all(np.diff(dx) > 0))
+        self.assertEqual((dx[0], dx[-1]), (0, 9999))
+        self.assertIn(1234, dx)
+        self.assertIn(8765, dx)
+
+    def test_short_series_is_unchanged(self):
+        x, y = np.arange(10), np.arange(10.0)
+        dx, dy = lttb(x, y, 100)
+        self.assertIs(dx, x)
+
+
+class TestCryptoFallbackConversion(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        quote_cache.clear()
+
+    @patch("src.app.http_client.get_json", new_callable=AsyncMock)
+    @patch("src.app.candles.store.get_klines", new_callable=AsyncMock)
+    async def test_fallback_pair_is_converted_with_historical_rates(
+        self, mock_klines, mock_get_json
+    ):
+        """
+        When BTCPLN is not listed, BTCUSDT candles (fetched right away, without probing
+        BTCPLN) are converted with the USD/PLN rate of each candle's day, fetched with a
+        single Frankfurter time-series request.
+        """
+        start = int(dates_to_ms(["2024-05-03"])[0])
+        usdt_klines = [
+            [start + i * DAY_MS, "0", "0", "0", "100", "0", 0] for i in range(4)
+        ]
+        mock_klines.return_value = usdt_klines
+        mock_get_json.return_value = {
+            "rates": {"2024-05-03": {"PLN": 4.0}, "2024-05-06": {"PLN": 5.0}}
+        }
+
+        _, prices, _, ylabel = await get_crypto_data("BTC", "PLN", 4, "1d")
+
+        np.testing.assert_array_equal(prices, [400.0, 400.0, 400.0, 500.0])
+        self.assertEqual(ylabel, "Price (PLN)")
+        mock_klines.assert_awaited_once_with("BTCUSDT", "1d", 4)
+        self.assertEqual(mock_get_json.await_count, 1)
+        self.assertIn("..2024-05-06?from=USD&to=PLN", mock_get_json.await_args.args[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
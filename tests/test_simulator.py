@@ -0,0 +1,139 @@
+import asyncio
+import time
+import unittest
+from datetime import date
+from unittest.mock import patch
+import aiohttp
+from benchmarks.simulator import LatencyModel, UpstreamSimulator
+from src.services import binance_limits, candles, http_client, quotes
+from src.services.binance_limits import WeightLimiter
+from src.services.http_client import HttpClient
+
+
+class SimulatorTestCase(unittest.IsolatedAsyncioTestCase):
+    """Points the bot's HTTP client at a local simulator."""
+
+    simulator_options = {}
+
+    async def asyncSetUp(self):
+        self.simulator = await UpstreamSimulator(**self.simulator_options).start()
+        self.client = HttpClient()
+        self.limiter = WeightLimiter()
+        env = self.simulator.env
+        for patcher in (
+            patch.object(http_client, "BINANCE_API", env["BINANCE_API"]),
+            patch.object(http_client, "FRANKFURTER_API", env["FRANKFURTER_API"]),
+            patch.object(http_client, "client", self.client),
+            patch.object(binance_limits, "limiter", self.limiter),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        quotes.quote_cache.clear()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.simulator.stop()
+
+
+class TestSimulatedEndpoints(SimulatorTestCase):
+    async def test_bot_requests_are_served(self):
+        """
+        Quotes, rates, rate series and multi-page kline downloads work against the simulator.
+        """
+        price = await quotes.get_ticker_price("BTCUSDT")
+        prices = await quotes.get_ticker_prices(["ETHUSDT", "SOLUSDT", "NOPEUSDT"])
+        rate = (await quotes.get_fx_rates("USD", ["PLN"]))["PLN"]
+        times, rates = await quotes.get_fx_series(
+            "USD", "PLN", date(2024, 1, 1), date(2024, 1, 31)
+        )
+        now = int(time.time() * 1000)
+        klines = await candles.fetch_klines_range(
+            "BTCUSDT", "1h", now - 1500 * 3600 * 1000, now
+        )
+
+        self.assertGreater(price, 0)
+        self.assertEqual(set(prices), {"ETHUSDT", "SOLUSDT"})
+        self.assertGreater(rate, 0)
+        self.assertEqual(len(rates), 23)  # Working days of January 2024
+        self.assertGreaterEqual(len(klines), 1500)
+        open_times = [k[0] for k in klines]
+        self.assertEqual(open_times, sorted(set(open_times)))
+        self.assertEqual(self.simulator.used_weight, self.limiter.used)
+
+    async def test_data_is_deterministic(self):
+        url = f"{http_client.BINANCE_API}/klines"
+        params = {"symbol": "ETHUSDT", "interval": "1d", "startTime": 0, "limit": 5}
+        first = await http_client.get_json(url, params)
+        second = await http_client.get_json(url, dict(params, limit=3))
+        self.assertEqual(first[:3], second)
+
+
+class TestFaultInjection(SimulatorTestCase):
+    simulator_options = {"seed": 7}
+
+    async def test_server_errors(self):
+        self.simulator.error_rate = 1.0
+        with self.assertRaises(aiohttp.ClientResponseError) as raised:
+            await http_client.get_json(f"{http_client.FRANKFURTER_API}/currencies")
+        self.assertIn(raised.exception.status, (500, 502, 503))
+
+    async def test_rate_limit_pauses_the_bot(self):
+        """
+        A simulated 429 with Retry-After makes the bot's limiter stop sending Binance requests.
+        """
+        self.simulator.rate_limit_rate = 1.0
+        with self.assertRaises(aiohttp.ClientResponseError) as raised:
+            await quotes.get_ticker_price("BTCUSDT")
+        self.assertEqual(raised.exception.status, 429)
+        self.simulator.rate_limit_rate = 0.0
+        with self.assertRaises(binance_limits.RateLimited):
+            await http_client.get_json(
+                f"{http_client.BINANCE_API}/ticker/price?symbol=BTCUSDT"
+            )
+
+    async def test_ban_lasts_retry_after(self):
+        self.simulator.ban_rate = 1.0
+        self.simulator.retry_after = 60
+        async with aiohttp.ClientSession() as session:
+            url = f"{self.simulator.base_url}/api/v3/ticker/price?symbol=BTCUSDT"
+            async with session.get(url) as response:
+                self.assertEqual(response.status, 418)
+            self.simulator.ban_rate = 0.0
+            async with session.get(url) as response:
+                self.assertEqual(response.status, 418)
+                self.assertLessEqual(int(response.headers["Retry-After"]), 60)
+
+    async def test_weight_limit(self):
+        self.simulator.weight_limit = 5
+        async with aiohttp.ClientSession() as session:
+            url = f"{self.simulator.base_url}/api/v3/ticker/price?symbol=BTCUSDT"
+            statuses = []
+            for _ in range(4):
+                async with session.get(url) as response:
+                    statuses.append(response.status)
+        self.assertEqual(statuses, [200, 200, 429, 429])
+
+    async def test_slow_drip_body(self):
+        self.simulator.slow_drip_rate = 1.0
+        self.simulator.drip_chunk = 16
+        self.simulator.drip_interval = 0.01
+        started = time.perf_counter()
+        names = await http_client.get_json(f"{http_client.FRANKFURTER_API}/currencies")
+        self.assertIn("PLN", names)
+        self.assertGreater(time.perf_counter() - started, 0.1)
+
+
+class TestLatencyModel(unittest.TestCase):
+    def test_distributions(self):
+        self.assertEqual(LatencyModel("fixed:0.05").sample(), 0.05)
+        samples = [LatencyModel("uniform:0.01,0.02", seed=1).sample() for _ in range(5)]
+        self.assertTrue(all(0.01 <= s <= 0.02 for s in samples))
+        first = [LatencyModel("lognormal:0.05,0.6", seed=3).sample() for _ in range(3)]
+        again = [LatencyModel("lognormal:0.05,0.6", seed=3).sample() for _ in range(3)]
+        self.assertEqual(first, again)
+        with self.assertRaises(ValueError):
+            LatencyModel("pareto:1")
+
+
+if __name__ == "__main__":
+    unittest.main()
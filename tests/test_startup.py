@@ -0,0 +1,112 @@
+import asyncio
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from src import app
+from src.services import prefetch, symbols
+from src.services.quotes import quote_cache
+from src.services.state import PriceFavorite, StaticFavorite
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def fake_get_json(url, params=None):
+    """Simulates the Binance batch ticker endpoint and Frankfurter latest rates."""
+    if "ticker/price" in url:
+        prices = {"BTCUSDT": "50000", "ETHUSDT": "2000"}
+        symbols = params["symbols"].strip("[]").replace('"', "").split(",")
+        return [{"symbol": s, "price": prices[s]} for s in symbols]
+    if "latest?from=USD" in url:
+        return {"rates": {"PLN": 4.0}}
+    raise AssertionError(f"Unexpected URL: {url}")
+
+
+class TestImports(unittest.TestCase):
+    def test_importing_the_app_does_not_load_matplotlib(self):
+        """
+        matplotlib is imported only by the chart render workers, so importing the
+        bot (e.g. in tests) does not pay for it.
+        """
+        output = subprocess.run(
+            [sys.executable, "-c", "import sys, src.app; print(sorted(sys.modules))"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        self.assertIn("'src.app'", output)
+        self.assertNotIn("'matplotlib'", output)
+
+
+class TestWarmUp(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        quote_cache.clear()
+        favorites = {
+            1: [PriceFavorite("BTC", "PLN"), StaticFavorite("note")],
+            2: [PriceFavorite("BTC", "USD"), PriceFavorite("ETH", None)],
+            3: [PriceFavorite("USD", "PLN", fiat_conversion=True)],
+        }
+        patches = [
+            patch.dict(app.user_favorites, favorites, clear=True),
+            patch.object(app, "favorites_loaded", True),
+            patch.object(app.currency_info, "load"),
+            patch.object(app.http_client.client, "start", new_callable=AsyncMock),
+            patch.object(app.charts.renderer, "warm_up", new_callable=AsyncMock),
+            patch.object(prefetch, "scheduler", prefetch.PrefetchScheduler()),
+            patch.object(symbols, "index", symbols.SymbolIndex("missing.json")),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        # A snapshot was loaded, so no exchangeInfo download is needed
+        symbols.index.loaded = True
+        symbols.index._set(
+            [
+                ["BTCUSDT", "BTC", "USDT", "TRADING"],
+                ["ETHUSDT", "ETH", "USDT", "TRADING"],
+            ]
+        )
+
+    def test_hot_prices_are_ranked_by_favorites(self):
+        app.user_favorites[4] = [PriceFavorite("USD", "PLN", fiat_conversion=True)]
+        self.assertEqual(app.hot_conversions(1), [("USD", "PLN")])
+
+    @patch("src.app.http_client.get_json", new_callable=AsyncMock)
+    async def test_warm_up_fills_the_hot_prices(self, mock_get_json):
+        """
+        One batch request per source fills the quote cache, and the keys are
+        handed to the prefetch scheduler to be kept warm.
+        """
+        mock_get_json.side_effect = fake_get_json
+
+        await app.warm_up()
+
+        self.assertEqual(mock_get_json.await_count, 2)
+        self.assertEqual(quote_cache.get(("ticker", "BTCUSDT")), 50000.0)
+        self.assertEqual(quote_cache.get(("ticker", "ETHUSDT")), 2000.0)
+        self.assertEqual(quote_cache.get(("fx", "USD", "PLN")), 4.0)
+        app.charts.renderer.warm_up.assert_awaited_once()
+        self.assertEqual(len(prefetch.scheduler.hot_keys()), 3)
+
+    @patch("src.app.http_client.get_json", new_callable=AsyncMock)
+    async def test_slow_or_failing_steps_do_not_block_startup(self, mock_get_json):
+        mock_get_json.side_effect = ConnectionError("upstream down")
+
+        async def slow_render_pool():
+            await asyncio.sleep(5)
+
+        app.charts.renderer.warm_up.side_effect = slow_render_pool
+
+        with self.assertLogs(level="WARNING") as logs:
+            elapsed = await app.warm_up(timeout=0.1)
+
+        self.assertLess(elapsed, 1)
+        self.assertTrue(any("upstream down" in line for line in logs.output))
+        self.assertTrue(any("not finished" in line for line in logs.output))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import sys
+import tempfile
+import unittest
+from src.services.state import (
+    BoundedMap,
+    PriceFavorite,
+    StaticFavorite,
+    UserPreferences,
+    favorite_from_dict,
+)
+
+
+class TestBoundedMap(unittest.TestCase):
+    def test_size_limit_evicts_oldest_entries(self):
+        """
+        The map never holds more than max_entries items.
+        """
+        messages = BoundedMap(max_entries=100, ttl=60)
+        for message_id in range(1000):
+            messages[message_id] = PriceFavorite("BTC", "USD")
+        self.assertEqual(len(messages), 100)
+        self.assertNotIn(0, messages)
+        self.assertIn(999, messages)
+
+    def test_entries_expire(self):
+        now = [0]
+        messages = BoundedMap(max_entries=10, ttl=60, clock=lambda: now[0])
+        messages[1] = "fav"
+        now[0] = 60
+        self.assertIsNone(messages.get(1))
+        self.assertEqual(len(messages), 0)
+
+
+class TestFavoriteRecords(unittest.TestCase):
+    def test_records_are_compact_and_round_trip(self):
+        """
+        Records use __slots__, share interned strings and survive a JSON round trip.
+        """
+        fav = PriceFavorite("".join(["B", "T", "C"]), "USD", fiat_conversion=False)
+        self.assertFalse(hasattr(fav, "__dict__"))
+        self.assertIs(fav.symbol, sys.intern("BTC"))
+        self.assertEqual(favorite_from_dict(fav.to_dict()), fav)
+        note = StaticFavorite("note")
+        self.assertEqual(favorite_from_dict(note.to_dict()), note)
+
+
+class TestUserPreferences(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "preferences.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_preferences_persist_and_load_lazily(self):
+        """
+        Preferences written by one instance are read by a new one on first access.
+        """
+        prefs = UserPreferences(self.path)
+        prefs.view("lang")[1] = "pl"
+        prefs.view("currency")[1] = "EUR"
+        prefs.close()
+
+        restarted = UserPreferences(self.path)
+        self.assertEqual(len(restarted._cache), 0)
+        self.assertEqual(restarted.view("lang")[1], "pl")
+        self.assertEqual(restarted.view("currency").get(1), "EUR")
+        self.assertEqual(restarted.view("currency").get(2, "USD"), "USD")
+        self.assertEqual(restarted.view("lang").pop(1, None), "pl")
+        self.assertNotIn(1, restarted.view("lang"))
+        restarted.close()
+
+    def test_reading_unknown_user_does_not_create_database(self):
+        prefs = UserPreferences(self.path)
+        self.assertIsNone(prefs.view("lang").get(5))
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import asyncio
+import unittest
+from unittest.mock import patch, AsyncMock
+from src.services import quotes, stream
+from src.services.http_client import HttpClient
+from src.services.stream import PriceFeed
+from tests.binance_stream_server import ReplayStreamServer, load_ticks
+
+RECORDED_BTC_PRICES = {float(t["c"]) for t in load_ticks() if t["s"] == "BTCUSDT"}
+
+
+async def wait_for(condition, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("Condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+class TestPriceFeed(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = await ReplayStreamServer().start()
+        self.client = HttpClient()
+        self.feed = PriceFeed(
+            url=self.server.url, client=self.client, min_reconnect_delay=0.05
+        )
+        self.feed.start()
+        await asyncio.wait_for(self.feed.connected.wait(), 3)
+
+    async def asyncTearDown(self):
+        await self.feed.close()
+        await self.server.stop()
+        await self.client.close()
+
+    def subscribed_streams(self):
+        return [
+            set(r["params"]) for r in self.server.requests if r["method"] == "SUBSCRIBE"
+        ]
+
+    async def test_tracked_pair_is_served_from_memory(self):
+        """
+        After a pair is tracked, its price arrives over the stream and is served from the book.
+        """
+        self.feed.track("BTCUSDT")
+        await wait_for(lambda: self.feed.last_price("BTCUSDT") is not None)
+        self.assertIn(self.feed.last_price("BTCUSDT"), RECORDED_BTC_PRICES)
+        self.assertIn({"btcusdt@miniTicker"}, self.subscribed_streams())
+        self.assertIsNone(self.feed.last_price("ETHUSDT"))
+
+    async def test_reconnect_resubscribes(self):
+        """
+        When the server drops the connection, the feed reconnects and subscribes again.
+        """
+        self.feed.track("ETHUSDT")
+        await wait_for(lambda: self.feed.last_price("ETHUSDT") is not None)
+
+        await self.server.drop_connections()
+        await wait_for(lambda: self.server.connections == 2)
+        await wait_for(lambda: len(self.subscribed_streams()) == 2)
+        self.assertEqual(self.subscribed_streams()[-1], {"ethusdt@miniTicker"})
+        self.assertGreaterEqual(self.feed.reconnects, 1)
+
+    async def test_idle_pair_is_unsubscribed(self):
+        """
+        A pair nobody asks for is unsubscribed and removed from the book.
+        """
+        self.feed.track("SOLUSDT")
+        await wait_for(lambda: self.subscribed_streams() == [{"solusdt@miniTicker"}])
+        self.feed.idle_after = 0.1
+        await wait_for(
+            lambda: any(r["method"] == "UNSUBSCRIBE" for r in self.server.requests)
+        )
+        self.assertNotIn("SOLUSDT", self.feed.book)
+
+
+class TestStalePrices(unittest.IsolatedAsyncioTestCase):
+    async def test_stale_price_is_not_served(self):
+        """
+        A price older than stale_after is ignored, so callers fall back to REST.
+        """
+        now = [100.0]
+        feed = PriceFeed(url="unused", stale_after=10, clock=lambda: now[0])
+        feed._task = asyncio.get_running_loop().create_future()  # Pretend it is running
+        feed.book["BTCUSDT"] = (50000.0, 100.0)
+        self.assertEqual(feed.last_price("BTCUSDT"), 50000.0)
+        now[0] = 111.0
+        self.assertIsNone(feed.last_price("BTCUSDT"))
+        feed._task.cancel()
+
+
+class TestQuotesUseStream(unittest.IsolatedAsyncioTestCase):
+    @patch("src.services.quotes.http_client.get_json", new_callable=AsyncMock)
+    async def test_streamed_price_skips_rest(self, mock_get_json):
+        with patch.object(stream.feed, "last_price", return_value=123.0):
+            self.assertEqual(await quotes.get_ticker_price("BTCUSDT"), 123.0)
+        mock_get_json.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()
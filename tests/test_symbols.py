@@ -0,0 +1,174 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, AsyncMock
+from src.app import get_crypto_data, price, user_currency
+from src.services import candles, quotes, symbols
+from src.services.quotes import quote_cache
+from src.services.symbols import SymbolIndex
+
+
+class FakeAuthor:
+    def __init__(self, id):
+        self.id = id
+
+
+class FakeContext:
+    def __init__(self, author_id):
+        self.author = FakeAuthor(author_id)
+        self.sent_messages = []
+
+    async def send(self, message):
+        self.sent_messages.append(message)
+
+
+EXCHANGE_INFO = {
+    "timezone": "UTC",
+    "symbols": [
+        {
+            "symbol": "BTCUSDT",
+            "status": "TRADING",
+            "baseAsset": "BTC",
+            "quoteAsset": "USDT",
+        },
+        {
+            "symbol": "ETHUSDT",
+            "status": "TRADING",
+            "baseAsset": "ETH",
+            "quoteAsset": "USDT",
+        },
+        {
+            "symbol": "BCHUSDT",
+            "status": "TRADING",
+            "baseAsset": "BCH",
+            "quoteAsset": "USDT",
+        },
+        {
+            "symbol": "BTCPLN",
+            "status": "TRADING",
+            "baseAsset": "BTC",
+            "quoteAsset": "PLN",
+        },
+        {
+            "symbol": "LUNAUSDT",
+            "status": "BREAK",
+            "baseAsset": "LUNA",
+            "quoteAsset": "USDT",
+        },
+    ],
+}
+# The same list as [symbol, base asset, quote asset, status] rows
+SYMBOLS = [
+    [s["symbol"], s["baseAsset"], s["quoteAsset"], s["status"]]
+    for s in EXCHANGE_INFO["symbols"]
+]
+KLINE = [1700000000000, "100", "100", "100", "100", "1", 1700003599999]
+
+
+class TestSymbolIndex(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "symbols.json")
+        self.index = SymbolIndex(self.path)
+
+    @patch("src.services.symbols.http_client.get_json", new_callable=AsyncMock)
+    async def test_refresh_stores_a_snapshot_read_on_the_next_start(
+        self, mock_get_json
+    ):
+        mock_get_json.return_value = EXCHANGE_INFO
+
+        self.assertEqual(await self.index.refresh(), 5)
+        restarted = SymbolIndex(self.path)
+        restarted.load()
+
+        self.assertTrue(restarted.ready)
+        self.assertTrue(restarted.tradable("BTCPLN"))
+        self.assertFalse(restarted.tradable("LUNAUSDT"))
+        self.assertEqual(mock_get_json.await_count, 1)
+
+    def test_only_trading_pairs_are_listed(self):
+        self.index._set(SYMBOLS)
+        self.assertCountEqual(
+            self.index.pairs(),
+            [
+                ("BTCUSDT", "BTC", "USDT"),
+                ("ETHUSDT", "ETH", "USDT"),
+                ("BCHUSDT", "BCH", "USDT"),
+                ("BTCPLN", "BTC", "PLN"),
+            ],
+        )
+        self.assertFalse(self.index.tradable("ETHPLN"))
+
+    def test_unknown_symbols_come_with_suggestions(self):
+        """
+        A typo is rejected with similar listed symbols, a whole pair with its base asset
+        and a delisted symbol with its status.
+        """
+        self.index._set(SYMBOLS)
+        error = self.index.unknown("BTCC")
+        self.assertEqual(error.suggestions[0], "BTC")
+        self.assertIn("Did you mean: BTC", str(error))
+        self.assertEqual(self.index.unknown("BTCUSDT").suggestions, ["BTC"])
+        self.assertIn("BREAK", str(self.index.unknown("LUNA")))
+
+    def test_without_a_list_every_pair_is_left_to_binance(self):
+        self.assertFalse(self.index.ready)
+        self.assertTrue(self.index.tradable("NOPEUSDT"))
+
+
+class TestSymbolValidation(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        quote_cache.clear()
+        user_currency.pop(41, None)
+        index = SymbolIndex("missing.json")
+        index._set(SYMBOLS)
+        patcher = patch.object(symbols, "index", index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch("src.app.http_client.get_json", new_callable=AsyncMock)
+    async def test_price_of_a_typo_is_rejected_without_a_request(self, mock_get_json):
+        ctx = FakeContext(author_id=41)
+
+        await price(ctx, "btcc")
+
+        self.assertEqual(len(ctx.sent_messages), 1)
+        self.assertIn("Unknown symbol BTCC. Did you mean: BTC", ctx.sent_messages[0])
+        mock_get_json.assert_not_awaited()
+
+    async def test_chart_pairs_are_not_probed(self):
+        """
+        A listed direct pair is used as it is; otherwise the USDT pair is fetched
+        right away instead of after a failed request for the direct one.
+        """
+        with patch.object(
+            candles.store, "get_klines", new_callable=AsyncMock
+        ) as get_klines, patch.object(
+            quotes, "get_fx_series", new_callable=AsyncMock
+        ) as get_fx_series:
+            get_klines.return_value = [KLINE]
+            get_fx_series.return_value = ([1699990000000], [0.9])
+
+            await get_crypto_data("BTC", "PLN", 1, "1h")
+            await get_crypto_data("ETH", "EUR", 1, "1h")
+
+        pairs = [call.args[0] for call in get_klines.await_args_list]
+        self.assertEqual(pairs, ["BTCPLN", "ETHUSDT"])
+        get_fx_series.assert_awaited_once()
+
+    @patch("src.services.quotes.http_client.get_json", new_callable=AsyncMock)
+    async def test_unlisted_pairs_are_left_out_of_batches(self, mock_get_json):
+        mock_get_json.return_value = [{"symbol": "BTCUSDT", "price": "50000"}]
+
+        prices = await quotes.get_ticker_prices(["BTCUSDT", "NOPEUSDT"])
+
+        self.assertEqual(prices, {"BTCUSDT": 50000.0})
+        self.assertEqual(mock_get_json.await_count, 1)
+        self.assertIn(
+            '["BTCUSDT"]', mock_get_json.await_args.kwargs["params"]["symbols"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()